@@ -0,0 +1 @@
+"""Бенчмарки продуктивності classbot (не входять у пакет, запускаються з кореня репозиторію)."""
@@ -0,0 +1,68 @@
+"""
+Перевірка команди note get between: діапазон дат і повідомлення про помилки.
+
+    python -m benchmarks.between
+
+У порожньому каталозі створюється нотатка, і для кожного випадку з CASES
+перевіряється, що вивід команди містить очікуваний рядок: нотатку з діапазону
+або повідомлення про неправильну межу діапазону (а не про день народження).
+Код виходу 1, якщо хоча б один випадок не пройшов.
+"""
+import io
+import os
+import sys
+import tempfile
+from datetime import date
+from classbot.console import use_plain_output
+from classbot.main import dispatch
+from classbot.storage import open_storage, LazyData
+
+TODAY = date.today().strftime("%d.%m.%Y")
+# (команда, рядок, який має бути у виводі, рядок, якого не має бути)
+CASES = (
+    (f"note get between 01.01.2000 {TODAY}", "Milk", None),
+    ("note get between 01.01.2000 02.01.2000", "No notes created", None),
+    (f"note get between 31.02.2024 {TODAY}", "Invalid start date '31.02.2024'", "birthday"),
+    ("note get between 01.01.2000 2024-05-31", "Invalid end date '2024-05-31'", "birthday"),
+    (f"note get between {TODAY} 01.01.2000", "must not be after", None),
+    (f"note get between 01.01.2000 {TODAY} --bogus", "Usage: note get between", None),
+)
+
+
+def run(storage, data, command):
+    """Виконує команду і повертає її текстовий вивід."""
+    out = io.StringIO()
+    use_plain_output(out)
+    try:
+        dispatch(command, storage, data)
+    finally:
+        use_plain_output(None)
+    return out.getvalue()
+
+
+def main():
+    failures = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            storage = open_storage("journal")
+            data = LazyData(storage)
+            run(storage, data, 'note set "Milk" "buy milk"')
+            for command, expected, forbidden in CASES:
+                output = run(storage, data, command)
+                if expected not in output or (forbidden and forbidden in output.lower()):
+                    failures.append((command, output.strip()))
+            storage.close(data)
+        finally:
+            os.chdir(cwd)
+    for command, output in failures:
+        print(f"FAIL {command}: {output}", file=sys.stderr)
+    if failures:
+        return 1
+    print(f"note get between: {len(CASES)} cases passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Перевірка, що обидва сховища однаково відповідають на "дні народження найближчими днями".
+
+    python -m benchmarks.birthdays [--days 7]
+
+Для кожного дня невисокосного (2025) і високосного (2024) року і кожного
+вікна 0..days порівнюються AddressBook.iter_upcoming_birthdays у пам'яті
+і в SQLite на книзі з днем народження на кожен день року, включно з 29 лютого.
+Окремо перевіряються випадки 29 лютого у невисокосний рік (27.02 + 1 день,
+28.02 + 0 днів). Код виходу 1, якщо відповіді розходяться.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+from classbot.address_book import AddressBook, Record
+from classbot.sqlite_storage import SQLiteStorage
+
+YEARS = (2024, 2025)
+# (сьогодні, вікно) -> імена, які мають потрапити у відповідь
+EXPECTED = {
+    (date(2025, 2, 27), 1): {"d0227", "d0228", "leap"},
+    (date(2025, 2, 28), 0): {"d0228", "leap"},
+}
+
+
+def make_book(book):
+    """Додає контакт на кожен день (високосного) року і контакт leap з 29.02.2000."""
+    day = date(2000, 1, 1)
+    while day.year == 2000:
+        if (day.month, day.day) != (2, 29):
+            record = Record(f"d{day:%m%d}")
+            record.set_birthday(day.strftime("%d.%m.1990"))
+            book.add_record(record)
+        day += timedelta(days=1)
+    record = Record("leap")
+    record.set_birthday("29.02.2000")
+    book.add_record(record)
+
+
+def upcoming(book, today, days):
+    return [(record.name.value, bday) for record, bday in book.iter_upcoming_birthdays(days, today)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=7, help="largest window to compare")
+    options = parser.parse_args(argv)
+
+    cwd = os.getcwd()
+    mismatches = []
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            memory = AddressBook()
+            make_book(memory)
+            storage = SQLiteStorage(legacy=None)
+            data = storage.load()
+            with storage.transaction(data, write=True):
+                make_book(data['contacts'])
+                for name in data['contacts'].data:
+                    storage.contact_changed(data['contacts'], name)
+            sqlite = data['contacts']
+            for year in YEARS:
+                today = date(year, 1, 1)
+                while today.year == year:
+                    for days in range(options.days + 1):
+                        expected = upcoming(memory, today, days)
+                        if upcoming(sqlite, today, days) != expected:
+                            mismatches.append(f"{today} +{days}")
+                    today += timedelta(days=1)
+            for (today, days), names in EXPECTED.items():
+                for label, book in (("memory", memory), ("sqlite", sqlite)):
+                    found = {name for name, _ in upcoming(book, today, days)}
+                    if found != names:
+                        mismatches.append(f"{label} {today} +{days}: {sorted(found)}")
+            storage.close(data)
+        finally:
+            os.chdir(cwd)
+
+    if mismatches:
+        print(f"{len(mismatches)} mismatches, e.g. {', '.join(mismatches[:5])}", file=sys.stderr)
+        return 1
+    print(f"both storages agree for every day of {', '.join(map(str, YEARS))} and windows 0..{options.days}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
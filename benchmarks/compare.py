@@ -0,0 +1,65 @@
+"""
+Порівнює два JSON-результати benchmarks.run і показує регресії.
+
+    python -m benchmarks.compare baseline.json current.json [--threshold 10]
+
+Для кожної метрики виводиться старе і нове значення медіани та зміна у відсотках.
+Код виходу 1, якщо хоча б одна метрика повільніша більш ніж на threshold відсотків
+(метрики коротші за --min-ms ігноруються як шум).
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _value(metric):
+    return metric.get("median_ms", metric.get("value"))
+
+
+def compare(old, new, threshold, min_ms=0.5):
+    """
+    Повертає список рядків (розмір, метрика, старе, нове, зміна %, регресія)
+    для метрик, присутніх в обох результатах.
+    """
+    rows = []
+    for size, metrics in new["results"].items():
+        baseline = old["results"].get(size, {})
+        for name, metric in metrics.items():
+            if name not in baseline:
+                continue
+            before, after = _value(baseline[name]), _value(metric)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before * 100 if before else 0.0
+            regressed = change > threshold and max(before, after) >= min_ms and "median_ms" in metric
+            rows.append((size, name, before, after, change, regressed))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed slowdown, percent")
+    parser.add_argument("--min-ms", type=float, default=0.5, help="ignore metrics faster than this")
+    options = parser.parse_args(argv)
+
+    old, new = load(options.baseline), load(options.current)
+    print(f"baseline: {old['meta'].get('commit')}  current: {new['meta'].get('commit')}")
+    rows = compare(old, new, options.threshold, options.min_ms)
+    width = max((len(name) for _, name, *_ in rows), default=10)
+    for size, name, before, after, change, regressed in rows:
+        mark = "  REGRESSION" if regressed else ""
+        print(f"{size:>5} {name:<{width}} {before:>12.3f} {after:>12.3f} {change:>+8.1f}%{mark}")
+    regressions = sum(row[-1] for row in rows)
+    print(f"{regressions} regression(s) over {options.threshold:g}%")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Стрес-тест одночасної роботи кількох процесів classbot з тими самими файлами.
+
+    python -m benchmarks.concurrency [--processes 8] [--ops 100] [--storage journal|sqlite] [--autosave 0.2]
+
+Кожен процес виконує ops разів: створює власний контакт, додає свій номер
+до спільного контакту "Shared" і свій тег до спільної нотатки "Shared".
+Поріг стискання журналу занижений, тож процеси постійно стискають журнал
+один у одного під рукою (з --autosave - ще й фоновими потоками). Наприкінці дані перечитуються і перевіряється,
+що жодна зміна не загубилася. Код виходу 1, якщо щось загубилося.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+from classbot.console import use_plain_output
+from classbot.main import dispatch
+from classbot.storage import open_storage, LazyData, STORAGE_BACKENDS
+
+# Поріг стискання журналу в процесах тесту (замість COMPACT_THRESHOLD)
+COMPACT_EVERY = 50
+
+
+def phone(worker, op):
+    """Унікальний 10-значний номер для операції op процесу worker."""
+    return f"05{worker:02d}{op:06d}"
+
+
+def worker(job):
+    """Виконує команди одного процесу; повертає час роботи в секундах."""
+    directory, backend, worker_id, ops, autosave = job
+    os.chdir(directory)
+    storage = open_storage(backend)
+    if hasattr(storage, "compact_threshold"):
+        storage.compact_threshold = COMPACT_EVERY
+    data = LazyData(storage)
+    if autosave:
+        storage.start_autosave(data, autosave)
+    start = time.perf_counter()
+    with open(os.devnull, "w", encoding="utf-8") as null:
+        use_plain_output(null)
+        for op in range(ops):
+            dispatch(f"contact set w{worker_id}-{op}", storage, data)
+            dispatch(f"contact set Shared phone {phone(worker_id, op)}", storage, data)
+            dispatch(f'note set "Shared" tag t{worker_id}x{op}', storage, data)
+            if op % 10 == 0:
+                dispatch("contact get Shared", storage, data)
+        storage.close(data)
+    return time.perf_counter() - start
+
+
+def verify(directory, backend, processes, ops):
+    """Перечитує дані і повертає список загублених змін."""
+    os.chdir(directory)
+    storage = open_storage(backend)
+    data = storage.load()
+    book, notebook = data['contacts'], data['notes']
+    shared = book.find("Shared")
+    phones = set(shared.phone_values()) if shared else set()
+    note = notebook.find_note("Shared")
+    tags = set(note.tag_values()) if note else set()
+    missing = []
+    for w in range(processes):
+        for op in range(ops):
+            if book.find(f"w{w}-{op}") is None:
+                missing.append(f"contact w{w}-{op}")
+            if phone(w, op) not in phones:
+                missing.append(f"phone {phone(w, op)}")
+            if f"t{w}x{op}" not in tags:
+                missing.append(f"tag t{w}x{op}")
+    storage.close(data)
+    return missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=100, help="operations per process")
+    parser.add_argument("--storage", choices=STORAGE_BACKENDS, default="journal")
+    parser.add_argument("--autosave", metavar="SECONDS", type=float, default=0,
+                        help="run the background saver in every process")
+    options = parser.parse_args(argv)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            # Спільний контакт і нотатка мають існувати до початку тесту
+            storage = open_storage(options.storage)
+            data = LazyData(storage)
+            with open(os.devnull, "w", encoding="utf-8") as null:
+                use_plain_output(null)
+                dispatch("contact set Shared", storage, data)
+                dispatch('note set "Shared" "shared note"', storage, data)
+                use_plain_output(None)
+            storage.close(data)
+
+            jobs = [(tmp, options.storage, w, options.ops, options.autosave)
+                    for w in range(options.processes)]
+            start = time.perf_counter()
+            with Pool(options.processes) as pool:
+                times = pool.map(worker, jobs)
+            elapsed = time.perf_counter() - start
+            missing = verify(tmp, options.storage, options.processes, options.ops)
+        finally:
+            os.chdir(cwd)
+
+    commands = options.processes * options.ops * 3
+    print(f"{options.processes} processes x {options.ops} ops ({options.storage}): "
+          f"{elapsed:.2f} s, {commands / elapsed:.0f} writes/s, slowest process {max(times):.2f} s")
+    if missing:
+        print(f"LOST {len(missing)} updates, e.g. {', '.join(missing[:5])}", file=sys.stderr)
+        return 1
+    print("no lost updates")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
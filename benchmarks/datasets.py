@@ -0,0 +1,122 @@
+"""
+Генератор відтворюваних синтетичних даних для бенчмарків.
+
+Однаковий seed і розмір завжди дають однакові контакти і нотатки:
+кириличні імена, телефони українських операторів, email, дні народження,
+адреси, а також нотатки з українським текстом і тегами, частота яких
+спадає за законом Ципфа (кілька популярних тегів і довгий хвіст).
+"""
+import random
+from datetime import datetime, timedelta
+from classbot.address_book import AddressBook, Record
+from classbot.notebook import NoteBook, Note
+
+FIRST_NAMES = (
+    "Олександр", "Андрій", "Богдан", "Василь", "Дмитро", "Євген", "Іван", "Максим",
+    "Микола", "Олег", "Петро", "Роман", "Сергій", "Тарас", "Юрій", "Ярослав",
+    "Анна", "Вікторія", "Галина", "Дарина", "Єлизавета", "Ірина", "Катерина", "Людмила",
+    "Марія", "Наталія", "Оксана", "Олена", "Софія", "Тетяна", "Уляна", "Юлія",
+)
+LAST_NAMES = (
+    "Шевченко", "Коваленко", "Бондаренко", "Ткаченко", "Кравченко", "Олійник", "Шевчук",
+    "Поліщук", "Мельник", "Бойко", "Коваль", "Лисенко", "Руденко", "Савченко", "Петренко",
+    "Марченко", "Мороз", "Павленко", "Левченко", "Гончаренко", "Кузьменко", "Мазур",
+    "Сидоренко", "Клименко", "Карпенко", "Іваненко", "Федоренко", "Романенко", "Яковенко",
+    "Гнатюк", "Ковальчук", "Литвиненко", "Кушнір", "Приходько", "Остапенко", "Соловйов",
+)
+# Транслітерація для email (спрощена, за офіційною схемою)
+TRANSLIT = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "h", "ґ": "g", "д": "d", "е": "e", "є": "ie",
+    "ж": "zh", "з": "z", "и": "y", "і": "i", "ї": "i", "й": "i", "к": "k", "л": "l",
+    "м": "m", "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "shch", "ь": "", "ю": "iu",
+    "я": "ia", "'": "",
+})
+EMAIL_DOMAINS = ("gmail.com", "ukr.net", "i.ua", "meta.ua", "outlook.com", "example.com")
+PHONE_PREFIXES = ("050", "063", "066", "067", "068", "073", "093", "095", "096", "097", "098", "099")
+CITIES = ("Київ", "Львів", "Харків", "Одеса", "Дніпро", "Запоріжжя", "Вінниця", "Полтава", "Чернігів")
+STREETS = ("Шевченка", "Франка", "Лесі Українки", "Хрещатик", "Соборна", "Садова", "Незалежності")
+
+WORDS = (
+    "купити", "молоко", "хліб", "зустріч", "проєкт", "звіт", "дзвінок", "лікар", "книга",
+    "подарунок", "квиток", "поїзд", "робота", "план", "ідея", "список", "рахунок", "оплата",
+    "зарплата", "відпустка", "море", "гори", "день", "народження", "вечеря", "ресторан",
+    "спорт", "тренування", "курс", "python", "лекція", "іспит", "домашнє", "завдання",
+    "ремонт", "квартира", "машина", "сервіс", "страховка", "документи", "паспорт", "банк",
+    "кредит", "депозит", "подорож", "готель", "бронювання", "зима", "літо", "осінь", "весна",
+    "м'ясо", "овочі", "фрукти", "кава", "чай", "сир", "яйця", "олія", "сіль", "цукор",
+)
+TAGS = (
+    "робота", "дім", "терміново", "покупки", "ідеї", "навчання", "здоров'я", "фінанси",
+    "подорожі", "сім'я", "друзі", "спорт", "книги", "фільми", "рецепти", "авто", "ремонт",
+    "документи", "проєкти", "свята", "python", "work", "home", "todo", "done", "later",
+)
+# Ваги тегів за законом Ципфа: перший тег у ~26 разів популярніший за останній
+TAG_WEIGHTS = tuple(1 / rank for rank in range(1, len(TAGS) + 1))
+
+BASE_DATE = datetime(2024, 1, 1, 9, 0)
+
+
+def contact_names(count, seed=0):
+    """Повертає count унікальних кириличних імен (однакових для однакового seed)."""
+    rng = random.Random(seed)
+    names = []
+    used = {}
+    for _ in range(count):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        n = used.get(name, 0) + 1
+        used[name] = n
+        names.append(name if n == 1 else f"{name} {n}")
+    return names
+
+
+def make_record(name, rng):
+    """Створює контакт із випадковими, але правдоподібними полями."""
+    record = Record(name)
+    for _ in range(rng.choice((1, 1, 1, 2, 2, 3))):
+        record.add_phone(rng.choice(PHONE_PREFIXES) + f"{rng.randrange(10 ** 7):07d}")
+    if rng.random() < 0.8:
+        login = name.lower().replace(" ", ".").translate(TRANSLIT)
+        record.set_email(f"{login}@{rng.choice(EMAIL_DOMAINS)}")
+    if rng.random() < 0.7:
+        birthday = datetime(1950, 1, 1) + timedelta(days=rng.randrange(60 * 365))
+        record.set_birthday(birthday.strftime("%d.%m.%Y"))
+    if rng.random() < 0.5:
+        record.set_address(f"м. {rng.choice(CITIES)}, вул. {rng.choice(STREETS)}, {rng.randrange(1, 200)}")
+    return record
+
+
+def make_address_book(count, seed=0):
+    """Генерує адресну книгу з count контактів."""
+    rng = random.Random(seed + 1)
+    book = AddressBook()
+    book.add_records(make_record(name, rng) for name in contact_names(count, seed))
+    return book
+
+
+def make_note(i, rng):
+    """Створює нотатку з кількома реченнями і 0-4 тегами."""
+    words = rng.choices(WORDS, k=rng.randrange(8, 60))
+    note = Note(f"Нотатка {i}: {' '.join(words[:3])}", " ".join(words))
+    for tag in set(rng.choices(TAGS, weights=TAG_WEIGHTS, k=rng.randrange(0, 5))):
+        note.add_tag(tag)
+    note.created_date = BASE_DATE + timedelta(minutes=i)
+    note.modified_date = note.created_date + timedelta(minutes=rng.randrange(10000))
+    return note
+
+
+def make_notebook(count, seed=0):
+    """Генерує нотатник з count нотаток."""
+    rng = random.Random(seed + 2)
+    notebook = NoteBook()
+    for i in range(count):
+        notebook.add_note(make_note(i, rng))
+    return notebook
+
+
+def make_data(contacts, notes=None, seed=0):
+    """Повертає словник {'contacts', 'notes'} у форматі, з яким працює storage."""
+    return {
+        "contacts": make_address_book(contacts, seed),
+        "notes": make_notebook(contacts if notes is None else notes, seed),
+    }
@@ -0,0 +1,89 @@
+"""
+Перевірка, що зміни вже збережених контактів і нотаток переживають перезапуск.
+
+    python -m benchmarks.reload [--storage journal|sqlite]
+
+Перша сесія створює контакт і нотатку, друга (нове відкриття сховища)
+змінює їх командами contact set / note set: номер, email, тег і зміст.
+Третя сесія перечитує дані і перевіряє, що всі зміни на місці.
+Без --storage перевіряються обидва сховища. Код виходу 1, якщо щось загубилося.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from classbot.console import use_plain_output
+from classbot.main import dispatch
+from classbot.storage import open_storage, LazyData, STORAGE_BACKENDS
+
+PHONE = "0501234567"
+EMAIL = "shared@example.com"
+TAG = "reloaded"
+CONTENT = "edited after reload"
+
+
+def session(backend, commands):
+    """Відкриває сховище, виконує команди і закриває його."""
+    storage = open_storage(backend)
+    data = LazyData(storage)
+    with open(os.devnull, "w", encoding="utf-8") as null:
+        use_plain_output(null)
+        try:
+            for command in commands:
+                dispatch(command, storage, data)
+        finally:
+            use_plain_output(None)
+    storage.close(data)
+
+
+def check(backend):
+    """Повертає список змін, які не пережили перезапуск."""
+    session(backend, ["contact set Shared", 'note set "Shared" "original"'])
+    session(backend, [
+        f"contact set Shared phone {PHONE}",
+        f"contact set Shared email {EMAIL}",
+        f'note set "Shared" tag {TAG}',
+        f'note set "Shared" content "{CONTENT}"',
+    ])
+    storage = open_storage(backend)
+    data = storage.load()
+    record = data['contacts'].find("Shared")
+    note = data['notes'].find_note("Shared")
+    missing = []
+    if record is None or PHONE not in record.phone_values():
+        missing.append("phone")
+    if record is None or not record.email or record.email.value != EMAIL:
+        missing.append("email")
+    if note is None or TAG not in note.tag_values():
+        missing.append("tag")
+    if note is None or note.content != CONTENT:
+        missing.append("content")
+    storage.close(data)
+    return missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--storage", choices=STORAGE_BACKENDS)
+    options = parser.parse_args(argv)
+    backends = [options.storage] if options.storage else list(STORAGE_BACKENDS)
+
+    failed = False
+    cwd = os.getcwd()
+    for backend in backends:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                missing = check(backend)
+            finally:
+                os.chdir(cwd)
+        if missing:
+            failed = True
+            print(f"{backend}: LOST {', '.join(missing)} after reload", file=sys.stderr)
+        else:
+            print(f"{backend}: edits of reloaded contact and note survive reopening")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
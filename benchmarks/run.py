@@ -0,0 +1,189 @@
+"""
+Бенчмарк гарячих шляхів classbot на синтетичних даних.
+
+    python -m benchmarks.run [--sizes 10k,100k] [--repeat 5] [--output results.json]
+    python -m benchmarks.run --sizes 1m --output results-1m.json
+
+Для кожного розміру генерується відтворюваний набір контактів і нотаток
+(benchmarks.datasets) і вимірюються:
+- AddressBook.find, search_contacts, get_upcoming_birthdays;
+- запити contact get where (classbot.query);
+- NoteBook.search_by_content, search_by_tags, sort_by_tags, recent;
+- storage.save_data / load_data (у тимчасовому каталозі);
+- write_snapshot / read_snapshot і find у щойно відкритому знімку;
+- display_contacts - рендеринг перших DISPLAY_ROWS рядків у нульову консоль.
+
+Операції з індексами міряються двічі: перший виклик (*.cold, з побудовою
+індексу) і повторні виклики (медіана). Пошуки, результати яких кешуються
+(ResultCache), у повторних викликах міряються з очищеним кешем, а влучання
+в кеш - окремо (*.cached). Результат - JSON, який можна
+порівняти з іншим запуском: python -m benchmarks.compare old.json new.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from benchmarks.datasets import make_data, contact_names
+from classbot import storage
+from classbot.console import use_plain_output
+from classbot.handlers import display_contacts
+from classbot.query import QueryPlan, parse_query
+from classbot.snapshot import read_snapshot, write_snapshot
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+# Скільки імен шукати в одному вимірі find
+FIND_LOOKUPS = 1000
+# Скільки рядків рендерить display_contacts
+DISPLAY_ROWS = 1000
+CONTACT_QUERIES = ("шевч", "олена", "067", "ukr.net", "15.05")
+NOTE_QUERIES = ("молоко", "купити хліб", '"день народження"', "квит*", "python")
+TAG_QUERIES = ("робота", "python", "later")
+WHERE_QUERIES = (
+    'email.domain = ukr.net and birthday.month = 5',
+    'phone ^= 067 and address ~ "київ"',
+    'name ^= олена and birthday.year < 1990',
+)
+
+
+def measure(func, repeat, setup=None):
+    """
+    Виконує func repeat разів і повертає медіану та мінімум у мілісекундах.
+    setup (якщо задано) викликається перед кожним повтором і не входить у час.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(times), 3), "min_ms": round(min(times), 3)}
+
+
+def cold(func):
+    """Вимірює один (перший) виклик func."""
+    return measure(func, 1)
+
+
+def run_size(count, repeat, seed=0):
+    """Запускає всі бенчмарки для набору з count контактів і count нотаток."""
+    results = {}
+    start = time.perf_counter()
+    data = make_data(count, seed=seed)
+    results["dataset.generate"] = {"median_ms": round((time.perf_counter() - start) * 1000, 3)}
+    book, notebook = data["contacts"], data["notes"]
+    names = contact_names(count, seed)[::max(1, count // FIND_LOOKUPS)][:FIND_LOOKUPS]
+
+    def cached(name, func, clear):
+        """Міряє кешований пошук: без кешу (name) і з влучанням у кеш (name.cached)."""
+        results[name] = measure(func, repeat, setup=clear)
+        func()
+        results[name + ".cached"] = measure(func, repeat)
+
+    results["contacts.find"] = measure(lambda: [book.find(name) for name in names], repeat)
+    results["contacts.search_contacts.cold"] = cold(lambda: book.search_contacts(CONTACT_QUERIES[0]))
+    cached("contacts.search_contacts",
+           lambda: [book.search_contacts(q) for q in CONTACT_QUERIES], book._results.clear)
+    queries = [parse_query(shlex.split(q)) for q in WHERE_QUERIES]
+    results["contacts.query.cold"] = cold(lambda: list(QueryPlan(book, queries[0])))
+    results["contacts.query"] = measure(lambda: [list(QueryPlan(book, q)) for q in queries], repeat)
+    results["contacts.get_upcoming_birthdays.cold"] = cold(lambda: book.get_upcoming_birthdays(7))
+    cached("contacts.get_upcoming_birthdays", lambda: book.get_upcoming_birthdays(7), book._results.clear)
+
+    results["notes.search_by_content.cold"] = cold(lambda: notebook.search_by_content(NOTE_QUERIES[0]))
+    cached("notes.search_by_content",
+           lambda: [notebook.search_by_content(q) for q in NOTE_QUERIES], notebook._results.clear)
+    results["notes.search_by_tags.cold"] = cold(lambda: notebook.search_by_tags(TAG_QUERIES[0]))
+    cached("notes.search_by_tags",
+           lambda: [notebook.search_by_tags(t) for t in TAG_QUERIES], notebook._results.clear)
+    results["notes.recent.cold"] = cold(lambda: notebook.recent(20))
+    results["notes.recent"] = measure(lambda: notebook.recent(20), repeat)
+    results["notes.sort_by_tags.cold"] = cold(notebook.sort_by_tags)
+    results["notes.sort_by_tags"] = measure(notebook.sort_by_tags, repeat)
+
+    with open(os.devnull, "w", encoding="utf-8") as null:
+        use_plain_output(null)
+        try:
+            results["contacts.display_contacts"] = measure(
+                lambda: display_contacts(book, 0, DISPLAY_ROWS), max(1, repeat // 2))
+        finally:
+            use_plain_output(None)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            results["storage.save_data"] = measure(lambda: storage.save_data(data), repeat)
+            results["storage.file_bytes"] = {"value": os.path.getsize(storage.FILENAME)}
+            results["storage.load_data"] = measure(storage.load_data, repeat)
+            results["snapshot.write"] = measure(lambda: write_snapshot(storage.SNAPSHOT_FILENAME, data), repeat)
+            results["snapshot.file_bytes"] = {"value": os.path.getsize(storage.SNAPSHOT_FILENAME)}
+            results["snapshot.read"] = measure(lambda: read_snapshot(storage.SNAPSHOT_FILENAME), repeat)
+            snapshot = read_snapshot(storage.SNAPSHOT_FILENAME)
+            results["snapshot.find.cold"] = cold(lambda: [snapshot['contacts'].find(name) for name in names])
+        finally:
+            os.chdir(cwd)
+
+    del data, book, notebook
+    gc.collect()
+    return results
+
+
+def git_commit():
+    """Повертає поточний коміт git (або None поза репозиторієм)."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10k,100k", help="comma-separated: " + ", ".join(SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", metavar="FILE", help="write JSON here (default: stdout)")
+    options = parser.parse_args(argv)
+
+    sizes = [s.strip().lower() for s in options.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)}")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "repeat": options.repeat,
+            "seed": options.seed,
+        },
+        "results": {},
+    }
+    for size in sizes:
+        print(f"benchmarking {size}...", file=sys.stderr)
+        report["results"][size] = run_size(SIZES[size], options.repeat, options.seed)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
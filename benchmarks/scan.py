@@ -0,0 +1,60 @@
+"""
+Масштабування повного перебору (ShardedScan) з кількістю процесів.
+
+    python -m benchmarks.scan [--size 1m] [--workers 1,2,4,8] [--repeat 5]
+
+Для синтетичного набору (benchmarks.datasets) вимірюється пошук підрядка,
+який не покриває жоден індекс: NoteBook._scan_content і
+AddressBook.search_contacts із запитом коротшим за триграму.
+workers=1 - послідовний перебір; для інших значень поріг вимкнено,
+а перший (холодний) виклик, що створює пул, міряється окремо.
+"""
+import argparse
+import statistics
+import sys
+import time
+from benchmarks.datasets import make_data
+from benchmarks.run import SIZES
+from classbot.parallel import ShardedScan
+
+NOTE_QUERY = "lo"
+CONTACT_QUERY = "05"
+
+
+def timed(func, repeat):
+    """Повертає (секунди першого виклику, медіана наступних)."""
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return first, statistics.median(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", choices=SIZES, default="1m")
+    parser.add_argument("--workers", default="1,2,4,8", help="comma-separated process counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    options = parser.parse_args(argv)
+    data = make_data(SIZES[options.size])
+    book, notebook = data['contacts'], data['notes']
+
+    for workers in (int(w) for w in options.workers.split(",")):
+        for label, owner, func in (
+            ("notes", notebook, lambda: notebook._scan_content(NOTE_QUERY)),
+            ("contacts", book, lambda: book.search_contacts(CONTACT_QUERY)),
+        ):
+            owner._scanner = ShardedScan(workers=workers, threshold=0)
+            first, median = timed(func, options.repeat)
+            owner._scanner.close()
+            print(f"{options.size} {label:<8} workers={workers}: "
+                  f"cold {first * 1000:.0f} ms, warm {median * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
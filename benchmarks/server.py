@@ -0,0 +1,108 @@
+"""
+Затримка запитів до `classbot serve` на localhost.
+
+    python -m benchmarks.server [--size 100k] [--requests 2000] [--clients 4]
+
+Синтетичний набір (benchmarks.datasets) записується у знімок у тимчасовому
+каталозі, там запускається сервер на вільному TCP-порту, і вимірюється:
+- час від запуску до готовності (завантаження + побудова індексів);
+- затримка `contact get <ім'я>` і `contact get phone <префікс>` одним клієнтом;
+- пропускна здатність кількох клієнтів одночасно (читання і записи впереміш).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from benchmarks.datasets import make_data, contact_names
+from benchmarks.run import SIZES
+from classbot.client import Client
+from classbot.snapshot import write_snapshot
+from classbot.storage import SNAPSHOT_FILENAME
+
+
+def start_server(directory):
+    """Запускає сервер у directory і повертає (процес, адреса, секунди до готовності)."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])))
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "classbot.main", "serve", "--port", "0"],
+        cwd=directory, env=env, stderr=subprocess.PIPE, text=True,
+    )
+    line = process.stderr.readline()
+    ready = time.perf_counter() - start
+    if " on " not in line:
+        process.kill()
+        raise RuntimeError(f"server did not start: {line}")
+    return process, line.rsplit(" on ", 1)[1].strip(), ready
+
+
+def latencies(client, commands):
+    """Повертає затримки (мс) кожної команди."""
+    result = []
+    for command in commands:
+        start = time.perf_counter()
+        client.request(command)
+        result.append((time.perf_counter() - start) * 1000)
+    return result
+
+
+def summary(values):
+    values = sorted(values)
+    return (f"p50 {statistics.median(values):.3f} ms, "
+            f"p99 {values[int(len(values) * 0.99) - 1]:.3f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", choices=SIZES, default="100k")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=4)
+    options = parser.parse_args(argv)
+    count = SIZES[options.size]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_snapshot(os.path.join(tmp, SNAPSHOT_FILENAME), make_data(count))
+        process, address, ready = start_server(tmp)
+        try:
+            print(f"{options.size}: server ready in {ready:.2f} s on {address}")
+            names = contact_names(count)[:options.requests]
+            client = Client(address)
+            client.request("help")
+            print("contact get <name>:       ", summary(latencies(client, [f'contact get "{n}"' for n in names])))
+            print("contact get phone <prefix>:", summary(latencies(
+                client, [f"contact get phone 0{i % 100:02d}{i % 7}" for i in range(options.requests)])))
+            client.close()
+
+            def work(worker, results):
+                own = Client(address)
+                commands = []
+                for i, name in enumerate(names[worker::options.clients]):
+                    commands.append(f'contact get "{name}"')
+                    if i % 10 == 0:
+                        commands.append(f"contact set bench-{worker}-{i} phone 0{worker:02d}{i:07d}")
+                results[worker] = len(commands)
+                latencies(own, commands)
+                own.close()
+
+            results = {}
+            threads = [threading.Thread(target=work, args=(w, results)) for w in range(options.clients)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            total = sum(results.values())
+            print(f"{options.clients} clients: {total} requests in {elapsed:.2f} s ({total / elapsed:.0f} req/s)")
+        finally:
+            process.terminate()
+            process.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
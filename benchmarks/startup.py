@@ -0,0 +1,85 @@
+"""
+Вимірює час холодного старту classbot і перевіряє бюджет.
+
+    python -m benchmarks.startup [--runs 10] [--budget-ms 100]
+
+Міряє три речі:
+- import_ms: сумарний час імпорту classbot.main за даними python -X importtime;
+- interpreter_ms: старт голого інтерпретатора (python -c pass) для порівняння;
+- batch_ms: повний запуск classbot --batch на кількох командах у порожньому каталозі.
+
+Результат виводиться як JSON; код виходу 1, якщо медіана batch_ms перевищує бюджет.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SMALL_INPUT = """contact set John phone 0671234567
+contact get John
+note set "Todo" "Buy milk"
+note get tag work
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def import_time_ms():
+    """Повертає сумарний час імпорту classbot.main (мс) з python -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import classbot.main"],
+        capture_output=True, text=True, env=_env(), check=True,
+    )
+    for line in reversed(result.stderr.splitlines()):
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == "classbot.main":
+            return int(parts[1]) / 1000
+    raise RuntimeError("classbot.main not found in importtime output")
+
+
+def _wall_ms(cmd, cwd, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=cwd, env=_env(), stdout=subprocess.DEVNULL, check=False)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    options = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        commands = os.path.join(tmp, "commands.txt")
+        with open(commands, "w", encoding="utf-8") as f:
+            f.write(SMALL_INPUT)
+        interpreter = _wall_ms([sys.executable, "-c", "pass"], tmp, options.runs)
+        batch = _wall_ms([sys.executable, "-m", "classbot.main", "--batch", commands], tmp, options.runs)
+
+    imports = statistics.median(import_time_ms() for _ in range(min(options.runs, 5)))
+    results = {
+        "import_ms": round(imports, 1),
+        "interpreter_ms": round(interpreter, 1),
+        "batch_ms": round(batch, 1),
+        "budget_ms": options.budget_ms,
+        "within_budget": batch <= options.budget_ms,
+    }
+    print(json.dumps(results, indent=2))
+    return 0 if results["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,38 +1,79 @@
 from collections import UserDict
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
+from itertools import chain
 import re
+import sys
+from classbot.cache import ResultCache
 from classbot.console import error 
+from classbot.indexes import TrigramIndex, SortedIndex, FuzzyIndex, InvertedIndex, PrefixIndex
+from classbot.parallel import ShardedScan
+
+PHONE_WIDTH = 10
 
 class Field:
-    """Базовий клас для всіх полів запису (ім'я, телефон, і т.д.)."""
+    """
+    Базовий клас для всіх полів запису (ім'я, телефон, і т.д.).
+    Поля мають __slots__, щоб мільйон записів не тримав по словнику атрибутів на кожне поле.
+    """
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
     def __str__(self):
         return str(self.value)
+
+    @classmethod
+    def _trusted(cls, value):
+        """Створює поле з уже перевіреного значення (без повторної валідації)."""
+        field = cls.__new__(cls)
+        field.value = value
+        return field
+
+    def __getstate__(self):
+        return {'value': self.value}
+
+    def __setstate__(self, state):
+        # Старі pickle-файли містять __dict__ звичайного класу: {'value': ...}
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **(state[1] or {})}
+        for key, value in state.items():
+            setattr(self, key, value)
     
 class Name(Field):
     """Клас для зберігання імені контакту."""
-    pass
+    __slots__ = ()
 
 class Phone(Field):
     """Клас для зберігання номера телефону. Перевіряє, що номер складається з 10 цифр."""
+    __slots__ = ()
+
     def __init__(self, value):
-        if not value.isdigit() or len(value) != 10:
+        if not value.isdigit() or len(value) != PHONE_WIDTH:
             raise ValueError("Phone number must have exactly 10 digits.")
-        super().__init__(value) 
-        
+        super().__init__(value)
+
+@lru_cache(maxsize=4096)
+def parse_birthday(value):
+    """Розбирає дату DD.MM.YYYY. Результати кешуються: при імпорті дати часто повторюються."""
+    try:
+        return datetime.strptime(value, "%d.%m.%Y").date()
+    except ValueError:
+        raise ValueError("Invalid date format. Use DD.MM.YYYY")
+
 class Birthday(Field):
     """Клас для зберігання дня народження. Перевіряє формат DD.MM.YYYY."""
+    __slots__ = ()
+
     def __init__(self, value):
-        try:
-            self.value = datetime.strptime(value, "%d.%m.%Y").date()
-        except ValueError:
-            raise ValueError("Invalid date format. Use DD.MM.YYYY")
+        self.value = parse_birthday(value)
 
 
 class Address(Field):
     """Клас для зберігання адреси."""
+    __slots__ = ()
+
     def __init__(self, value):
         if not value:
             raise ValueError("Address cannot be empty")
@@ -40,74 +81,247 @@ class Address(Field):
             super().__init__(value)
 
 class Email(Field):
-    """Клас для зберігання email. Перевіряє валідність формату."""
+    """
+    Клас для зберігання email. Перевіряє валідність формату.
+    Домен інтернується - у великій книзі він спільний для тисяч адрес.
+    """
+    __slots__ = ('_local', '_domain')
+
     def __init__(self, value):
         if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', value):
             raise ValueError("Invalid email format")
-        super().__init__(value)
+        self.value = value
+
+    @property
+    def value(self):
+        return f"{self._local}@{self._domain}"
+
+    @value.setter
+    def value(self, value):
+        local, _, domain = value.rpartition('@')
+        self._local = local
+        self._domain = sys.intern(domain)
+
+    @property
+    def domain(self):
+        return self._domain
+
+
+def birthday_in_year(birthday, year):
+    """
+    Повертає дату дня народження у вказаному році.
+    29 лютого у невисокосний рік святкується 28 лютого.
+    """
+    try:
+        return birthday.replace(year=year)
+    except ValueError:
+        return date(year, 2, 28)
+
+
+def next_birthday(birthday, today):
+    """Повертає найближчу (сьогодні або пізніше) дату дня народження."""
+    bday = birthday_in_year(birthday, today.year)
+    if bday < today:
+        bday = birthday_in_year(birthday, today.year + 1)
+    return bday
+
+
+def format_upcoming(record, bday):
+    """Форматує рядок списку найближчих днів народження."""
+    return f"[bold]{record.name.value}[/bold] ({bday.strftime('%d.%m')})"
 
 
 class Record:
-    """Клас для зберігання повної інформації про контакт, включаючи ім'я, телефони та інші поля."""
+    """
+    Клас для зберігання повної інформації про контакт, включаючи ім'я, телефони та інші поля.
+    Телефони зберігаються одним рядком цифр фіксованої ширини, а атрибут phones
+    повертає їх як кортеж об'єктів Phone.
+    """
+    __slots__ = ('name', '_phones', 'birthday', 'address', 'email', '_book', 'version', '__weakref__')
+    # Поля, які зберігаються у файлі (_book - лише зв'язок з адресною книгою в пам'яті,
+    # version - лічильник змін запису в цій сесії)
+    _persistent = ('name', 'phones', 'birthday', 'address', 'email')
+
     def __init__(self, name):
         self.name = Name(name)
-        self.phones = []
+        self._phones = ""
         self.birthday = None
         self.address = None
         self.email = None
+        # Адресна книга, до якої належить запис; їй повідомляються зміни для оновлення індексів
+        self._book = None
+        self.version = 0
+
+    @property
+    def phones(self):
+        """Телефони запису (кортеж Phone)."""
+        return tuple(Phone._trusted(value) for value in self.phone_values())
+
+    @phones.setter
+    def phones(self, phones):
+        self._phones = "".join(getattr(p, 'value', p) for p in phones)
+
+    def phone_values(self):
+        """Повертає список номерів телефонів як рядків."""
+        packed = self._phones
+        return [packed[i:i + PHONE_WIDTH] for i in range(0, len(packed), PHONE_WIDTH)]
+
+    def _phone_offset(self, phone):
+        """Повертає позицію номера в упакованому рядку або -1 (пошук str.find з вирівнюванням)."""
+        if len(phone) != PHONE_WIDTH:
+            return -1
+        packed = self._phones
+        i = packed.find(phone)
+        while i >= 0 and i % PHONE_WIDTH:
+            i = packed.find(phone, i + 1)
+        return i
+
+    def _check_phone(self, phone):
+        """Перевіряє в адресній книзі, що номер не належить іншому контакту (якщо це вимагається)."""
+        if self._book is not None:
+            self._book._check_phone(self, phone)
 
     def add_phone(self, phone):
         """Додає номер телефону до запису."""
-        self.phones.append(Phone(phone))
+        value = Phone(phone).value
+        self._check_phone(value)
+        self._phones += value
+        self._changed("phones")
 
     def remove_phone(self, phone):
         """Видаляє номер телефону із запису."""
-        for p in self.phones:
-            if p.value == phone:
-                self.phones.remove(p)
-                break
+        i = self._phone_offset(phone)
+        if i >= 0:
+            self._phones = self._phones[:i] + self._phones[i + PHONE_WIDTH:]
+            self._changed("phones")
 
     def edit_phone(self, old_phone, new_phone):
         """Редагує існуючий номер телефону."""
-        for i, p in enumerate(self.phones):
-            if p.value == old_phone:
-                self.phones[i] = Phone(new_phone)
-                break
+        i = self._phone_offset(old_phone)
+        if i >= 0:
+            value = Phone(new_phone).value
+            self._check_phone(value)
+            self._phones = self._phones[:i] + value + self._phones[i + PHONE_WIDTH:]
+            self._changed("phones")
 
     def find_phone(self, phone):
         """Знаходить номер телефону в записі."""
-        for p in self.phones:
-            if p.value == phone:
-                return p
+        if self._phone_offset(phone) >= 0:
+            return Phone._trusted(phone)
         return None
 
     def set_birthday(self, birthday):
         """Встановлює день народження."""
         self.birthday = Birthday(birthday)
+        self._changed("birthday")
 
     def remove_birthday(self):
         """Видаляє день народження."""
         self.birthday = None
+        self._changed("birthday")
 
     def set_address(self, address):
         """Встановлює адресу."""
         self.address = Address(address)
+        self._changed("address")
 
     def remove_address(self):
         """Видаляє адресу."""
         self.address = None
+        self._changed("address")
 
     def set_email(self, email):
         """Встановлює email."""
         self.email = Email(email)
+        self._changed("email")
 
     def remove_email(self):
         """Видаляє email."""
         self.email = None
+        self._changed("email")
+
+    def update_from(self, other):
+        """Доповнює запис даними іншого запису (нові телефони, задані поля)."""
+        phones = [phone for phone in dict.fromkeys(other.phone_values()) if self._phone_offset(phone) < 0]
+        # Номери перевіряються до зміни: конфлікт не лишає запис оновленим наполовину
+        for phone in phones:
+            self._check_phone(phone)
+        self._phones += "".join(phones)
+        for key in ('birthday', 'address', 'email'):
+            value = getattr(other, key)
+            if value is not None:
+                setattr(self, key, value)
+        self._changed()
+
+    def _changed(self, field=None):
+        """
+        Позначає запис зміненим (version) і повідомляє про це адресну книгу.
+        field ("phones", "email", "birthday", "address") обмежує оновлення індексів.
+        """
+        self.version += 1
+        if self._book is not None:
+            self._book._record_changed(self, field)
+
+    def search_fields(self):
+        """Повертає значення полів запису, за якими працює пошук (у нижньому регістрі)."""
+        fields = [self.name.value.lower()]
+        fields.extend(self.phone_values())
+        if self.address:
+            fields.append(self.address.value.lower())
+        if self.email:
+            fields.append(self.email.value.lower())
+        if self.birthday:
+            fields.append(self.birthday.value.strftime('%d.%m.%Y'))
+        return fields
+
+    def to_dict(self):
+        """Повертає поля запису як словник простих типів (для знімка і журналу у форматі JSON)."""
+        data = {'name': self.name.value}
+        if self._phones:
+            data['phones'] = self.phone_values()
+        if self.birthday:
+            data['birthday'] = self.birthday.value.isoformat()
+        if self.address:
+            data['address'] = self.address.value
+        if self.email:
+            data['email'] = self.email.value
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Створює запис зі словника to_dict(); поля не перевіряються повторно."""
+        record = cls(data['name'])
+        phones = data.get('phones')
+        if phones:
+            record._phones = "".join(phones)
+        if 'birthday' in data:
+            record.birthday = Birthday._trusted(date.fromisoformat(data['birthday']))
+        if 'address' in data:
+            record.address = Address._trusted(data['address'])
+        if 'email' in data:
+            record.email = Email._trusted(data['email'])
+        return record
+
+    def __getstate__(self):
+        state = {key: getattr(self, key) for key in self._persistent}
+        state['phones'] = self.phone_values()
+        return state
+
+    def __setstate__(self, state):
+        # Підтримуються і старі pickle-файли, де phones - список об'єктів Phone
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **(state[1] or {})}
+        self.birthday = self.address = self.email = None
+        self._phones = ""
+        for key, value in state.items():
+            if key in self._persistent:
+                setattr(self, key, value)
+        self._book = None
+        self.version = 0
 
     def __str__(self):
         """Повертає рядкове представлення запису."""
-        phones = '; '.join(p.value for p in self.phones)
+        phones = '; '.join(self.phone_values())
         bday = f", Birthday: {self.birthday.value.strftime('%d.%m.%Y')}" if self.birthday else "" 
         address = f", Address: {self.address.value}" if self.address else ""
         email = f", Email: {self.email.value}" if self.email else ""
@@ -115,9 +329,240 @@ class Record:
     
 class AddressBook(UserDict):
     """Клас для зберігання та управління записами в адресній книзі."""
+    # Чи може планувальник запитів (classbot.query) брати кандидатів з індексів книги
+    indexed_queries = True
+
+    def __init__(self, *args, **kwargs):
+        # Індекси будуються ліниво, при першому пошуку
+        self._search_index = None
+        self._birthday_index = None
+        self._name_order = None
+        self._fuzzy_names = None
+        self._phone_index = None
+        self._email_index = None
+        self._domain_index = None
+        # Пул процесів для повного перебору, створюється при першому великому перебиранні
+        self._scanner = None
+        # Результати повторюваних пошуків; скидаються, щойно змінюється changes
+        self._results = ResultCache()
+        # Чи заборонено одному номеру належати кільком контактам
+        self.unique_phones = False
+        # Лічильник змін книги (додавання, видалення, зміни записів)
+        self.changes = 0
+        super().__init__(*args, **kwargs)
+
+    def __setitem__(self, name, record):
+        if self.unique_phones:
+            for phone in record.phone_values():
+                self._check_phone(record, phone)
+        old = self.data.get(name)
+        if old is not None and old is not record:
+            old._book = None
+        self.data[name] = record
+        record._book = self
+        self.changes += 1
+        self._index_record(record)
+        if self._name_order is not None:
+            self._name_order.add(name, name.lower())
+        if self._fuzzy_names is not None:
+            self._fuzzy_names.add(name, name)
+
+    def __delitem__(self, name):
+        record = self.data[name]
+        del self.data[name]
+        record._book = None
+        self.changes += 1
+        self._unindex_record(record)
+
+    def __getstate__(self):
+        return {'data': self.data}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.data = state['data']
+        for record in self.data.values():
+            record._book = self
+
+    def _index_record(self, record, field=None):
+        """
+        Додає (або оновлює) запис у побудованих індексах.
+        field обмежує оновлення індексами одного поля.
+        """
+        if self._search_index is not None:
+            self._search_index.add(record.name.value, record.search_fields())
+        if self._birthday_index is not None and field in (None, "birthday"):
+            self._index_birthday(record)
+        if self._phone_index is not None and field in (None, "phones"):
+            self._phone_index.add(record.name.value, record.phone_values())
+        if self._email_index is not None and field in (None, "email"):
+            self._index_email(record)
+        if self._scanner is not None and self._scanner.built:
+            self._scanner.add(record.name.value, record, self._scan_text(record))
+
+    def _unindex_record(self, record):
+        """Видаляє запис з побудованих індексів."""
+        if self._search_index is not None:
+            self._search_index.discard(record.name.value)
+        if self._birthday_index is not None:
+            self._birthday_index.discard(record.name.value)
+        if self._name_order is not None:
+            self._name_order.discard(record.name.value)
+        if self._fuzzy_names is not None:
+            self._fuzzy_names.discard(record.name.value)
+        if self._phone_index is not None:
+            self._phone_index.discard(record.name.value)
+        if self._email_index is not None:
+            self._email_index.discard(record.name.value)
+            self._domain_index.discard(record.name.value)
+        if self._scanner is not None:
+            self._scanner.discard(record.name.value)
+
+    def _index_birthday(self, record):
+        """Індексує день народження запису ключем (місяць, день)."""
+        if record.birthday:
+            bday = record.birthday.value
+            self._birthday_index.add(record.name.value, (bday.month, bday.day))
+        else:
+            self._birthday_index.discard(record.name.value)
+
+    def _index_email(self, record):
+        """Індексує email запису (у нижньому регістрі) і його домен."""
+        name = record.name.value
+        if record.email:
+            self._email_index.add(name, (record.email.value.lower(),))
+            self._domain_index.add(name, (record.email.domain.lower(),))
+        else:
+            self._email_index.discard(name)
+            self._domain_index.discard(name)
+
+    def _record_changed(self, record, field=None):
+        """Викликається записом після кожної зміни його полів."""
+        self.changes += 1
+        self._index_record(record, field)
+
+    def _get_search_index(self):
+        """Повертає триграмний індекс, будуючи його при першому зверненні."""
+        if self._search_index is None:
+            self._search_index = TrigramIndex()
+            for record in self.data.values():
+                self._search_index.add(record.name.value, record.search_fields())
+        return self._search_index
+
+    def _scan_items(self):
+        """Записи для паралельного перебору: (ім'я, запис, рядок)."""
+        for name, record in self.data.items():
+            yield name, record, self._scan_text(record)
+
+    @staticmethod
+    def _scan_text(record):
+        """Рядок запису для перебору: поля пошуку, розділені символом \\0."""
+        return "\0".join(record.search_fields())
+
+    def _get_birthday_index(self):
+        """Повертає календарний індекс днів народження, будуючи його при першому зверненні."""
+        if self._birthday_index is None:
+            self._birthday_index = SortedIndex()
+            for record in self.data.values():
+                self._index_birthday(record)
+        return self._birthday_index
+
+    def _get_name_order(self):
+        """Повертає індекс імен в алфавітному порядку (без урахування регістру)."""
+        if self._name_order is None:
+            self._name_order = SortedIndex()
+            self._name_order.update((name, name.lower()) for name in self.data)
+        return self._name_order
+
+    def _get_phone_index(self):
+        """Повертає індекс номер -> імена, будуючи його при першому зверненні."""
+        if self._phone_index is None:
+            self._phone_index = PrefixIndex()
+            self._phone_index.update(
+                (record.name.value, record.phone_values()) for record in self.data.values())
+        return self._phone_index
+
+    def _get_email_index(self):
+        """Повертає індекс email -> імена (і домен -> імена), будуючи їх при першому зверненні."""
+        if self._email_index is None:
+            self._email_index = PrefixIndex()
+            self._domain_index = InvertedIndex()
+            records = [record for record in self.data.values() if record.email]
+            self._email_index.update(
+                (record.name.value, (record.email.value.lower(),)) for record in records)
+            for record in records:
+                self._domain_index.add(record.name.value, (record.email.domain.lower(),))
+        return self._email_index
+
+    def _get_fuzzy_names(self):
+        """Повертає індекс нечіткого пошуку імен, будуючи його при першому зверненні."""
+        if self._fuzzy_names is None:
+            self._fuzzy_names = FuzzyIndex()
+            for name in self.data:
+                self._fuzzy_names.add(name, name)
+        return self._fuzzy_names
+
+    def build_indexes(self):
+        """Будує всі індекси наперед (наприклад, перед обслуговуванням запитів сервером)."""
+        self._get_search_index()
+        self._get_birthday_index()
+        self._get_name_order()
+        self._get_fuzzy_names()
+        self._get_phone_index()
+        self._get_email_index()
+
     def add_record(self, record):
         """Додає новий запис до адресної книги."""
-        self.data[record.name.value] = record
+        self[record.name.value] = record
+
+    def add_records(self, records):
+        """
+        Додає пакет записів. Побудовані індекси оновлюються для всього пакета
+        разом (відсортовані - одним сортуванням), а не скидаються.
+        Унікальність номерів тут не перевіряється - це робить імпорт (phone_conflicts).
+        """
+        records = list(records)
+        for record in records:
+            name = record.name.value
+            old = self.data.get(name)
+            if old is not None and old is not record:
+                old._book = None
+            self.data[name] = record
+            record._book = self
+            self.changes += 1
+        self._index_records(records)
+
+    def _index_records(self, records):
+        """Додає (або оновлює) пакет записів у побудованих індексах."""
+        if self._search_index is not None:
+            for record in records:
+                self._search_index.add(record.name.value, record.search_fields())
+        if self._birthday_index is not None:
+            for record in records:
+                if not record.birthday:
+                    self._birthday_index.discard(record.name.value)
+            self._birthday_index.update(
+                (record.name.value, (record.birthday.value.month, record.birthday.value.day))
+                for record in records if record.birthday)
+        if self._name_order is not None:
+            self._name_order.update((record.name.value, record.name.value.lower()) for record in records)
+        if self._fuzzy_names is not None:
+            for record in records:
+                self._fuzzy_names.add(record.name.value, record.name.value)
+        if self._phone_index is not None:
+            self._phone_index.update((record.name.value, record.phone_values()) for record in records)
+        if self._email_index is not None:
+            for record in records:
+                if not record.email:
+                    self._email_index.discard(record.name.value)
+                    self._domain_index.discard(record.name.value)
+            with_email = [record for record in records if record.email]
+            self._email_index.update(
+                (record.name.value, (record.email.value.lower(),)) for record in with_email)
+            for record in with_email:
+                self._domain_index.add(record.name.value, (record.email.domain.lower(),))
+        if self._scanner is not None and self._scanner.built:
+            for record in records:
+                self._scanner.add(record.name.value, record, self._scan_text(record))
 
     def find(self, name):
         """Знаходить запис за іменем."""
@@ -126,7 +571,84 @@ class AddressBook(UserDict):
     def delete(self, name):
         """Видаляє запис за іменем."""
         if name in self.data:
-            del self.data[name]
+            del self[name]
+
+    def _phone_owners(self, phone):
+        """Повертає множину імен контактів, яким належить номер."""
+        return self._get_phone_index().get(phone)
+
+    def _check_phone(self, record, phone):
+        """Якщо unique_phones, не дає додати номер, що вже належить іншому контакту."""
+        if not self.unique_phones:
+            return
+        owners = self._phone_owners(phone) - {record.name.value}
+        if owners:
+            raise ValueError(f"Phone {phone} already belongs to '{min(owners)}'")
+
+    def phone_conflicts(self, record, claimed=None):
+        """
+        Повертає пари (номер, власник) для номерів запису, що вже належать
+        іншим контактам. claimed - додатковий словник номер -> ім'я
+        (номери, зайняті ще не доданими записами).
+        """
+        name = record.name.value
+        conflicts = []
+        for phone in record.phone_values():
+            owners = set(self._phone_owners(phone))
+            if claimed is not None and phone in claimed:
+                owners.add(claimed[phone])
+            owners.discard(name)
+            if owners:
+                conflicts.append((phone, min(owners)))
+        return conflicts
+
+    def _records(self, names):
+        """Повертає записи для імен, відсортовані за іменем."""
+        return [self.data[name] for name in sorted(names)]
+
+    def find_by_phone(self, phone):
+        """Знаходить контакти, яким належить номер (точний збіг)."""
+        return self._records(self._phone_owners(phone))
+
+    def find_by_phone_prefix(self, prefix):
+        """Знаходить контакти з номерами, що починаються з prefix (у порядку номерів)."""
+        names = {}
+        for _, owners in self._get_phone_index().prefix(prefix):
+            for name in sorted(owners):
+                names.setdefault(name, None)
+        return [self.data[name] for name in names]
+
+    def find_by_email(self, email):
+        """Знаходить контакти з email (без урахування регістру)."""
+        return self._records(self._get_email_index().get(email.strip().lower()))
+
+    def find_by_email_prefix(self, prefix):
+        """Знаходить контакти, email яких починається з prefix."""
+        names = set()
+        for _, owners in self._get_email_index().prefix(prefix.strip().lower()):
+            names |= owners
+        return self._records(names)
+
+    def find_by_email_domain(self, domain):
+        """Знаходить контакти з email у домені (company.com або @company.com)."""
+        self._get_email_index()
+        return self._records(self._domain_index.get(domain.strip().lstrip("@").lower()))
+
+    def suggest_names(self, name, limit=5):
+        """
+        Повертає до limit імен, схожих на name (до 2 друкарських помилок) -
+        для підказки "did you mean", коли контакт не знайдено.
+        """
+        return self._get_fuzzy_names().search(name, max_dist=2, limit=limit)
+
+    def iter_sorted(self, start=0, stop=None):
+        """
+        Генератор записів в алфавітному порядку імен з позицій start..stop.
+        Записи видаються по одному з відсортованого індексу, без сортування
+        всієї книги, тож час показу сторінки не залежить від розміру книги.
+        """
+        for _, name in self._get_name_order().slice(start, stop):
+            yield self.data[name]
 
     def get_upcoming_birthdays(self, days=7):
         """
@@ -134,34 +656,55 @@ class AddressBook(UserDict):
         Якщо days не вказано, за замовчуванням використовується 7 днів.
         """
         today = datetime.today().date()
-        upcoming = []
-        for record in self.data.values():
-            if record.birthday:
-                bday = record.birthday.value.replace(year=today.year)
-                if bday < today:
-                    bday = bday.replace(year=today.year + 1)
-                delta = (bday - today).days
-                if 0 <= delta <= days:
-                    upcoming.append(f"[bold]{record.name.value}[/bold] ({bday.strftime('%d.%m')})")
-        return upcoming
+        return self._results.get(("birthdays", days, today), self.changes, lambda: [
+            format_upcoming(record, bday) for record, bday in self.iter_upcoming_birthdays(days, today)])
+
+    def iter_upcoming_birthdays(self, days=7, today=None):
+        """
+        Генератор пар (запис, дата дня народження) на наступні days днів
+        у хронологічному порядку. Перебір іде по календарному індексу від
+        сьогоднішньої дати і зупиняється на першій даті за межами вікна.
+        """
+        if today is None:
+            today = datetime.today().date()
+        for record in self._birthday_candidates(today, days):
+            bday = next_birthday(record.birthday.value, today)
+            if (bday - today).days > days:
+                break
+            yield record, bday
+
+    def _birthday_candidates(self, today, days):
+        """
+        Повертає записи з днем народження в календарному порядку,
+        починаючи з сьогоднішньої дати і з переходом через кінець року.
+        """
+        index = self._get_birthday_index()
+        start = (today.month, today.day)
+        for _, name in chain(index.iter_from(start), index.iter_before(start)):
+            yield self.data[name]
 
     def search_contacts(self, query):
-        """Шукає контакти за запитом у всіх полях."""
-        results = set()
+        """
+        Шукає контакти за запитом у всіх полях.
+        Результат запам'ятовується до наступної зміни книги.
+        """
         query = query.lower()
-        for record in self.data.values():
-            if query in record.name.value.lower():
-                results.add(record)
-            for phone in record.phones:
-                if query in phone.value:
-                    results.add(record)
-            if record.address and query in record.address.value.lower():
-                results.add(record)
-            if record.email and query in record.email.value.lower():
-                results.add(record)
-            if record.birthday and query in record.birthday.value.strftime('%d.%m.%Y'):
-                results.add(record)
-        return list(results)
-
-        
-            
\ No newline at end of file
+        return self._results.get(("search", query), self.changes, lambda: self._search_contacts(query))
+
+    def _search_contacts(self, query):
+        """
+        Пошук без кешу (query - у нижньому регістрі).
+        Для запитів від 3 символів перевіряються лише кандидати з триграмного індексу.
+        """
+        names = self._get_search_index().candidates(query)
+        if self._scanner is None:
+            self._scanner = ShardedScan()
+        if self._scanner.enabled(len(self.data) if names is None else len(names)):
+            # Кандидатів забагато - паралельний перебір усієї книги швидший
+            return self._scanner.search(query, self._scan_items)
+        # Кандидати - множина: сортування дає сталий порядок результатів
+        records = self.data.values() if names is None else (self.data[n] for n in sorted(names))
+        return [
+            record for record in records
+            if any(query in field for field in record.search_fields())
+        ]
@@ -0,0 +1,80 @@
+import sys
+import threading
+import time
+
+# Як часто (у секундах) зберігати знімок, якщо дані змінилися
+AUTOSAVE_INTERVAL = 30.0
+# Після скількох змін зберігати знімок, не чекаючи AUTOSAVE_INTERVAL
+AUTOSAVE_CHANGES = 1000
+# Як часто потік перевіряє, чи не час зберігати
+POLL_INTERVAL = 1.0
+
+
+class AutoSaver:
+    """
+    Фоновий потік, що зберігає знімок даних сесії, не зупиняючи введення команд.
+    Зберігає лише змінені дані (лічильники changes адресної книги і нотатника):
+    раз на interval секунд або одразу, коли змін набралося max_changes.
+    Сам запис - storage.background_checkpoint(data).
+    """
+    def __init__(self, storage, data, interval=AUTOSAVE_INTERVAL, max_changes=AUTOSAVE_CHANGES):
+        self.storage = storage
+        self.data = data
+        self.interval = interval
+        self.max_changes = max_changes
+        self.saves = 0
+        self._saved_changes = 0
+        self._last_save = time.monotonic()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        # Потік-демон: незавершений запис знімка не тримає вихід з програми
+        self._thread = threading.Thread(target=self._run, name="classbot-autosave", daemon=True)
+
+    def _changes(self):
+        """Сумарний лічильник змін книги і нотатника (0, якщо дані ще не завантажені)."""
+        if not getattr(self.data, "loaded", True):
+            return 0
+        return self.data['contacts'].changes + self.data['notes'].changes
+
+    def pending(self):
+        """Скільки змін зроблено з часу останнього збереження."""
+        changes = self._changes()
+        if changes < self._saved_changes:
+            # Дані перезавантажено зі свіжого знімка іншого процесу - лічильники почалися заново
+            self._saved_changes = changes
+        return changes - self._saved_changes
+
+    def start(self):
+        self._thread.start()
+
+    def notify(self):
+        """Просить потік перевірити зміни зараз, не чекаючи POLL_INTERVAL."""
+        self._wake.set()
+
+    def stop(self):
+        """Зупиняє потік; запис знімка, що вже йде, не чекається."""
+        self._stopped.set()
+        self._wake.set()
+
+    def save(self):
+        """Зберігає знімок (у потоці, з якого викликано)."""
+        changes = self._changes()
+        try:
+            if self.storage.background_checkpoint(self.data):
+                self._saved_changes = changes
+                self.saves += 1
+        except OSError as e:
+            print(f"classbot: autosave failed: {e}", file=sys.stderr)
+        self._last_save = time.monotonic()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(POLL_INTERVAL)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            pending = self.pending()
+            if not pending:
+                continue
+            if pending >= self.max_changes or time.monotonic() - self._last_save >= self.interval:
+                self.save()
@@ -0,0 +1,61 @@
+import hashlib
+import lzma
+import os
+import threading
+import zlib
+
+BLOBS_DIRNAME = "address_book.blobs"
+# Тексти, довші за цю кількість символів, зберігаються в сховищі, а не в знімку
+INLINE_LIMIT = 2048
+# Тексти, більші за цю кількість байтів, стискаються lzma (повільніше, але щільніше для логів)
+LZMA_THRESHOLD = 256 * 1024
+
+# Перший байт файлу - яким кодеком стиснуто вміст
+ZLIB, LZMA = b"z", b"x"
+
+
+class BlobStore:
+    """
+    Сховище текстів, адресованих вмістом: ключ - SHA-256 тексту, файл
+    directory/ab/abcdef... містить стиснутий текст. Однакові тексти
+    зберігаються один раз. Файли пишуться атомарно і ніколи не змінюються.
+    """
+    def __init__(self, directory=BLOBS_DIRNAME):
+        self.directory = directory
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def put(self, text):
+        """Зберігає текст (якщо такого ще немає) і повертає його ключ."""
+        raw = text.encode()
+        key = hashlib.sha256(raw).hexdigest()
+        path = self._path(key)
+        if os.path.exists(path):
+            return key
+        if len(raw) > LZMA_THRESHOLD:
+            packed = LZMA + lzma.compress(raw)
+        else:
+            packed = ZLIB + zlib.compress(raw)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(packed)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        return key
+
+    def get(self, key):
+        """Повертає текст за ключем."""
+        with open(self._path(key), "rb") as f:
+            packed = f.read()
+        if packed[:1] == LZMA:
+            return lzma.decompress(packed[1:]).decode()
+        return zlib.decompress(packed[1:]).decode()
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+
+blobs = BlobStore()
@@ -0,0 +1,147 @@
+from collections import OrderedDict
+import threading
+import weakref
+
+# Скільки різних запитів пам'ятає кеш
+RESULT_CACHE_ENTRIES = 256
+# Скільки елементів (посилань на записи) разом можуть тримати всі результати
+RESULT_CACHE_ITEMS = 1_000_000
+
+
+class ResultCache:
+    """
+    LRU-кеш результатів пошуку, прив'язаний до покоління даних.
+    Поколінням є лічильник змін книги чи нотатника: будь-яка зміна
+    його збільшує, і тоді всі збережені результати відкидаються.
+    Пам'ять обмежена і кількістю запитів, і сумарною довжиною результатів.
+    """
+    def __init__(self, max_entries=RESULT_CACHE_ENTRIES, max_items=RESULT_CACHE_ITEMS):
+        self.max_entries = max_entries
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._items = 0
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def get(self, key, generation, compute):
+        """
+        Повертає результат для key (список); якщо його немає або дані змінилися
+        з часу обчислення (generation), обчислює compute() і запам'ятовує.
+        """
+        with self._lock:
+            if generation != self._generation:
+                self._clear(generation)
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(result)
+            self.misses += 1
+        result = tuple(compute())
+        with self._lock:
+            # Поки результат обчислювався, дані могли змінитися - тоді він уже застарів
+            if generation == self._generation and len(result) <= self.max_items:
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self._items -= len(old)
+                self._entries[key] = result
+                self._items += len(result)
+                while len(self._entries) > self.max_entries or self._items > self.max_items:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._items -= len(evicted)
+        return list(result)
+
+    def _clear(self, generation):
+        self._entries.clear()
+        self._items = 0
+        self._generation = generation
+
+    def clear(self):
+        """Забуває всі результати (наприклад, щоб виміряти пошук без кешу)."""
+        with self._lock:
+            self._clear(None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Скільки підготовлених для виводу елементів тримає кеш рендерингу
+RENDER_CACHE_ENTRIES = 10_000
+# Скільки символів тексту разом можуть містити збережені результати рендерингу
+RENDER_CACHE_CHARS = 4_000_000
+
+
+class RenderCache:
+    """
+    LRU-кеш підготовлених для виводу об'єктів (панелей нотаток, рядків таблиці
+    контактів). Збережений результат дійсний, доки не зміниться версія
+    елемента: незмінені елементи не форматуються знову.
+    Елементи тримаються слабкими посиланнями (ключ - id і weakref), тож
+    видалений запис чи нотатка не живе в пам'яті лише через кеш.
+    Пам'ять обмежена і кількістю елементів, і сумарним розміром тексту (size).
+    """
+    def __init__(self, max_entries=RENDER_CACHE_ENTRIES, max_chars=RENDER_CACHE_CHARS):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._chars = 0
+        # id елементів, що вже знищені; прибираються під замком при наступному зверненні
+        self._dead = []
+        self._lock = threading.Lock()
+
+    def get(self, item, version, render, size=1):
+        """
+        Повертає render() для елемента, обчислюючи його лише для нової версії.
+        size - розмір результату в символах; завеликі результати не зберігаються.
+        """
+        key = id(item)
+        with self._lock:
+            self._purge()
+            entry = self._entries.get(key)
+            if entry is not None and entry[0]() is item and entry[1] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+        rendered = render()
+        if size > self.max_chars:
+            return rendered
+        # Колбек лише запам'ятовує id: збирач сміття може викликати його будь-де, зокрема під замком
+        ref = weakref.ref(item, lambda _, key=key: self._dead.append(key))
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (ref, version, rendered, size)
+            self._chars += size
+            while len(self._entries) > self.max_entries or self._chars > self.max_chars:
+                _, evicted = self._entries.popitem(last=False)
+                self._chars -= evicted[3]
+        return rendered
+
+    def discard(self, item):
+        """Забуває результат для елемента (наприклад, видаленого)."""
+        with self._lock:
+            entry = self._entries.get(id(item))
+            if entry is not None and entry[0]() is item:
+                self._remove(id(item))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._chars -= entry[3]
+
+    def _purge(self):
+        while self._dead:
+            key = self._dead.pop()
+            entry = self._entries.get(key)
+            # id міг уже дістатися новому елементу - прибираємо лише мертвий запис
+            if entry is not None and entry[0]() is None:
+                self._remove(key)
+
+    def __len__(self):
+        with self._lock:
+            self._purge()
+            return len(self._entries)
@@ -0,0 +1,83 @@
+"""
+Тонкий клієнт для `classbot serve` (classbot --connect): не завантажує ні
+даних, ні rich, а лише надсилає рядки команд серверу (протокол - classbot.server).
+"""
+import json
+import socket
+import sys
+
+SOCKET_FILENAME = "classbot.sock"
+DEFAULT_HOST = "127.0.0.1"
+
+
+class Client:
+    """Тонкий клієнт: надсилає команди серверу і отримує відповіді (без rich і без даних)."""
+    def __init__(self, address):
+        host, _, port = address.rpartition(":")
+        if host and port.isdigit():
+            self.sock = socket.create_connection((host, int(port)))
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(address)
+        self._file = self.sock.makefile("rwb")
+
+    def request(self, command):
+        """Виконує команду на сервері; повертає (ok, вивід)."""
+        self._file.write(json.dumps({"command": command}, ensure_ascii=False).encode() + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        response = json.loads(line)
+        return response["ok"], response["output"]
+
+    def close(self):
+        self._file.close()
+        self.sock.close()
+
+
+def run_client(address, lines=None, out=sys.stdout):
+    """
+    Режим --connect. Без lines - інтерактивний цикл з підказкою;
+    з lines - як --batch: для кожної команди рядок JSON {"line", "command", "ok", "output"}.
+    Повертає код виходу.
+    """
+    try:
+        client = Client(address)
+    except OSError as e:
+        print(f"classbot: cannot connect to {address}: {e}", file=sys.stderr)
+        return 2
+    failed = 0
+    try:
+        if lines is None:
+            while True:
+                try:
+                    command = input("📥 Enter a command: ")
+                except (EOFError, KeyboardInterrupt):
+                    break
+                if command.strip().lower() in ("exit", "close"):
+                    break
+                if command.strip():
+                    _, output = client.request(command)
+                    if output:
+                        print(output, file=out)
+            return 0
+        for line_no, line in enumerate(lines, 1):
+            stripped = line.strip()
+            if not stripped or stripped.startswith("#"):
+                continue
+            if stripped.lower() in ("exit", "close"):
+                break
+            ok, output = client.request(stripped)
+            out.write(json.dumps(
+                {"line": line_no, "command": stripped, "ok": ok, "output": output},
+                ensure_ascii=False,
+            ) + "\n")
+            failed += not ok
+        out.flush()
+        return 1 if failed else 0
+    except ConnectionError as e:
+        print(f"classbot: {e}", file=sys.stderr)
+        return 2
+    finally:
+        client.close()
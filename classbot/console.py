@@ -1,37 +1,141 @@
-from rich.console import Console
-from rich.panel import Panel
-from rich.markdown import Markdown
-from rich.text import Text
-from rich.columns import Columns
-from rich.table import Table
+import re
+import threading
+from time import perf_counter
 
-console = Console()
+# rich імпортується ліниво: для коротких скриптових запусків імпорт rich
+# (особливо rich.markdown з pygments) займає більшу частину часу старту.
+# Panel, Markdown, Table, Columns, Text імпортуються там, де рендеряться.
+
+# Теги розмітки rich ([bold], [/], [green] ...), які прибираються у простому виводі
+MARKUP_TAG_RE = re.compile(r"\[([a-z#/@][^\[]*?)\]")
+
+
+class _LazyConsole:
+    """
+    Замісник rich Console: справжня консоль створюється при першому зверненні,
+    тож імпорт classbot.console не тягне за собою rich.
+    """
+    def __init__(self):
+        object.__setattr__(self, "_console", None)
+
+    def _get(self):
+        if self._console is None:
+            from rich.console import Console
+            if _plain_file is not None:
+                real = Console(file=_plain_file, soft_wrap=True, highlight=False)
+            else:
+                real = Console()
+            object.__setattr__(self, "_console", real)
+        return self._console
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def print(self, *args, **kwargs):
+        _timed(self._get().print, *args, **kwargs)
+
+    def rule(self, *args, **kwargs):
+        _timed(self._get().rule, *args, **kwargs)
+
+    def __setattr__(self, name, value):
+        setattr(self._get(), name, value)
+
+
+console = _LazyConsole()
+
+# Кількість повідомлень про помилки (окремо для кожного потоку);
+# пакетний режим і сервер визначають за нею успіх команди
+_errors = threading.local()
+# У пакетному режимі прості повідомлення пишуться в цей файл без rich-рендерингу
+_plain_file = None
+# Сумарний час виводу в секундах; None - вимірювання вимкнене
+_render_seconds = None
+
+def track_render(enabled=True):
+    """Вмикає (або вимикає) підрахунок часу, витраченого на вивід."""
+    global _render_seconds
+    _render_seconds = 0.0 if enabled else None
+
+def render_seconds():
+    """Повертає сумарний час виводу з моменту track_render()."""
+    return _render_seconds or 0.0
+
+def _timed(func, *args, **kwargs):
+    global _render_seconds
+    if _render_seconds is None:
+        return func(*args, **kwargs)
+    start = perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _render_seconds += perf_counter() - start
+
+def console_errors():
+    """Повертає кількість виведених повідомлень про помилки."""
+    return getattr(_errors, "count", 0)
+
+def use_plain_output(file):
+    """
+    Перемикає вивід у файл без кольорів, переносів і підсвічування.
+    Повідомлення success/error/warning/info оминають рендеринг rich.
+    """
+    global _plain_file
+    _plain_file = file
+    if console._console is not None:
+        console.file = file
+        console.soft_wrap = True
+        console._highlight = False
+
+def _emit(icon, emoji, style, message):
+    if _plain_file is not None:
+        _timed(_plain_file.write, f"{icon} {MARKUP_TAG_RE.sub('', message)}\n")
+    else:
+        console.print(f"{emoji} [{style}]{message}[/]")
+
+def echo(message: str):
+    """Виводить рядок з rich-розміткою (у простому режимі - без розмітки)."""
+    if _plain_file is not None:
+        _timed(_plain_file.write, MARKUP_TAG_RE.sub('', message) + "\n")
+    else:
+        console.print(message)
 
 def success(message: str):
-    formatted = f":white_check_mark: [green]{message}[/]"
-    console.print(formatted)
+    _emit("✅", ":white_check_mark:", "green", message)
     return ""  # Повертаємо порожній рядок замість None
 
 def error(message: str):
-    formatted = f":x: [bold red]{message}[/]"
-    console.print(formatted)
+    _errors.count = console_errors() + 1
+    _emit("❌", ":x:", "bold red", message)
     return ""
 
 def warning(message: str):
-    formatted = f":warning: [yellow]{message}[/]"
-    console.print(formatted)
+    _emit("⚠️", ":warning:", "yellow", message)
     return ""
 
 def info(message: str):
-    formatted = f":information_source: [blue]{message}[/]"
-    console.print(formatted)
+    _emit("ℹ️", ":information_source:", "blue", message)
     return ""
 
 def show_panel(title: str, content: str, style: str = "cyan"):
+    from rich.panel import Panel
     console.print(Panel(content, title=title, style=style))
 
 def show_markdown(md_text: str):
+    from rich.markdown import Markdown
     console.print(Markdown(md_text))
 
+def show_suggestions(entered: str, suggestions, label: str = "command"):
+    """
+    Виводить панель з підказками "Did you mean".
+    label - що саме не знайдено: command, contact, note.
+    """
+    from rich.panel import Panel
+    panel_text = f"[bold red]Unknown {label}:[/] [yellow]{entered}[/]\n\n"
+    panel_text += "[green]Did you mean:[/]\n"
+    for s in suggestions:
+        panel_text += f"  • [bold cyan]{s}[/]\n"
+
+    console.print(Panel(panel_text, title="Suggestions", border_style="red"))
+
 def rule(title: str):
     console.rule(f"[bold blue]{title}[/]")
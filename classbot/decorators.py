@@ -1,17 +1,25 @@
 from classbot.console import info, error
+from classbot.metrics import metrics
 
 def input_error(func):
     """
     Декоратор для обробки помилок вводу, таких як KeyError, ValueError, IndexError.
     Повертає відповідне повідомлення про помилку.
+    З увімкненою статистикою помилки рахуються за назвою обробника.
     """
     def inner(*args, **kwargs):
         try:
             return func(*args, **kwargs)
         except KeyError:
+            if metrics.enabled:
+                metrics.record_error(func.__name__)
             return info("⚠️ Contact not found.")
         except ValueError as e:
+            if metrics.enabled:
+                metrics.record_error(func.__name__)
             return error(f"❌ {str(e)}")
         except IndexError:
+            if metrics.enabled:
+                metrics.record_error(func.__name__)
             return error("❌ Not enough arguments.")
     return inner
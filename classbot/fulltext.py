@@ -0,0 +1,182 @@
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+
+# Слово - це послідовність літер/цифр, можливо з апострофом всередині (м'ясо, п’ять)
+TOKEN_RE = re.compile(r"\w+(?:['’ʼ]\w+)*")
+QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text):
+    """Розбиває текст на слова у нижньому регістрі (Unicode, зокрема кирилиця)."""
+    return [
+        token.casefold().replace("’", "'").replace("ʼ", "'")
+        for token in TOKEN_RE.findall(text)
+    ]
+
+
+def parse_query(query):
+    """
+    Розбирає пошуковий запит на слова, префікси (слово*) та фрази ("кілька слів").
+    Повертає три списки: terms, prefixes, phrases.
+    """
+    terms, prefixes, phrases = [], [], []
+    for phrase, word in QUERY_RE.findall(query):
+        if phrase:
+            tokens = tokenize(phrase)
+            if len(tokens) > 1:
+                phrases.append(tokens)
+            else:
+                terms.extend(tokens)
+        elif word.endswith("*"):
+            prefixes.extend(tokenize(word))
+        else:
+            terms.extend(tokenize(word))
+    return terms, prefixes, phrases
+
+
+class FullTextIndex:
+    """
+    Інвертований повнотекстовий індекс з ранжуванням BM25.
+    Для кожного слова зберігаються позиції в документі, що дає змогу
+    шукати фрази; відсортований словник слів використовується для префіксів.
+    """
+    k1 = 1.5
+    b = 0.75
+
+    def __init__(self):
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_len = {}
+        self._total_len = 0
+        self._vocabulary = []
+
+    def add(self, doc, *texts):
+        """Індексує (або переіндексовує) документ за кількома текстами (заголовок, зміст)."""
+        self.discard(doc)
+        positions = {}
+        pos = 0
+        for text in texts:
+            for token in tokenize(text):
+                positions.setdefault(token, []).append(pos)
+                pos += 1
+            # Розрив між полями, щоб фраза не "склеювала" заголовок і зміст
+            pos += 1
+        for token, token_positions in positions.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                insort(self._vocabulary, token)
+            postings[doc] = token_positions
+        self._doc_terms[doc] = tuple(positions)
+        length = sum(len(p) for p in positions.values())
+        self._doc_len[doc] = length
+        self._total_len += length
+
+    def discard(self, doc):
+        """Видаляє документ з індексу."""
+        terms = self._doc_terms.pop(doc, None)
+        if terms is None:
+            return
+        for token in terms:
+            postings = self._postings[token]
+            del postings[doc]
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+        self._total_len -= self._doc_len.pop(doc)
+
+    def _expand_prefix(self, prefix):
+        """Повертає всі слова словника, що починаються з prefix."""
+        words = []
+        for i in range(bisect_left(self._vocabulary, prefix), len(self._vocabulary)):
+            word = self._vocabulary[i]
+            if not word.startswith(prefix):
+                break
+            words.append(word)
+        return words
+
+    def containing(self, tokens):
+        """
+        Повертає множину документів, що містять tokens (запит, розбитий на
+        слова) як підрядок: одне слово - як частину якогось слова; кілька -
+        підряд, причому перше може бути кінцем слова, а останнє - початком
+        ("ити хл" знаходить "купити хліб"). Перебирається словник, а не документи.
+        """
+        if len(tokens) == 1:
+            docs = set()
+            for word in self._vocabulary:
+                if tokens[0] in word:
+                    docs.update(self._postings[word])
+            return docs
+        heads = [word for word in self._vocabulary if word.endswith(tokens[0])]
+        tails = self._expand_prefix(tokens[-1])
+        middle = tokens[1:-1]
+        if not heads or not tails or any(token not in self._postings for token in middle):
+            return set()
+        candidates = set().union(*(self._postings[word] for word in heads))
+        candidates.intersection_update(set().union(*(self._postings[word] for word in tails)))
+        for token in middle:
+            candidates.intersection_update(self._postings[token])
+        last = len(tokens) - 1
+        docs = set()
+        for doc in candidates:
+            starts = {p for word in heads for p in self._postings[word].get(doc, ())}
+            ends = {p for word in tails for p in self._postings[word].get(doc, ())}
+            rest = [set(self._postings[token][doc]) for token in middle]
+            if any(p + last in ends and all(p + i in positions for i, positions in enumerate(rest, 1))
+                   for p in starts):
+                docs.add(doc)
+        return docs
+
+    def _has_phrase(self, doc, tokens):
+        """Перевіряє, чи містить документ слова tokens підряд."""
+        try:
+            first = self._postings[tokens[0]][doc]
+            rest = [set(self._postings[t][doc]) for t in tokens[1:]]
+        except KeyError:
+            return False
+        return any(all(p + i in positions for i, positions in enumerate(rest, 1)) for p in first)
+
+    def search(self, query, limit=None):
+        """
+        Шукає документи за запитом і повертає список (документ, оцінка)
+        від найкращого збігу. Фрази в лапках обов'язкові, слова і префікси
+        (слово*) додають до оцінки BM25.
+        """
+        terms, prefixes, phrases = parse_query(query)
+        for prefix in prefixes:
+            terms.extend(self._expand_prefix(prefix))
+        for tokens in phrases:
+            terms.extend(tokens)
+        if not terms or not self._doc_len:
+            return []
+
+        n_docs = len(self._doc_len)
+        avg_len = self._total_len / n_docs or 1
+        scores = {}
+        for token in set(terms):
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, positions in postings.items():
+                tf = len(positions)
+                norm = tf + self.k1 * (1 - self.b + self.b * self._doc_len[doc] / avg_len)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+        if phrases:
+            scores = {
+                doc: score for doc, score in scores.items()
+                if all(self._has_phrase(doc, tokens) for tokens in phrases)
+            }
+        ranked = ((score, doc) for doc, score in scores.items())
+        if limit is not None:
+            best = heapq.nlargest(limit, ranked, key=lambda item: item[0])
+        else:
+            best = sorted(ranked, key=lambda item: item[0], reverse=True)
+        return [(doc, score) for score, doc in best]
+
+    def __len__(self):
+        return len(self._doc_len)
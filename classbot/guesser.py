@@ -2,9 +2,9 @@ import difflib
 
 # Повний список дозволених команд
 KNOWN_COMMANDS = [
-    "contact set", "contact get", "contact delete",
+    "contact set", "contact get", "contact delete", "contact import",
     "note set", "note get", "note delete",
-    "help", "exit", "close"
+    "help", "stats", "exit", "close"
 ]
 
 # Альтернативні назви команд (alias -> нормальна назва)
@@ -1,9 +1,33 @@
-from classbot.address_book import Record, AddressBook
+from datetime import datetime, time
+from itertools import chain, islice
+from time import perf_counter
+from classbot.address_book import Record, AddressBook, format_upcoming
+from classbot.cache import RenderCache
 from classbot.decorators import input_error
-from classbot.notebook import Note, NoteBook
-from classbot.console import console, success, info, error, Table, Columns 
+from classbot.notebook import Note, NoteBook, panels
+from classbot.console import console, echo, success, info, error, show_suggestions
+from classbot.query import QueryPlan, parse_query
 import shlex
 
+# Розмір сторінки за замовчуванням і розмір порції при потоковому виводі
+PAGE_SIZE = 50
+
+# Скільки нотаток показує note get recent / oldest без N
+RECENT_NOTES = 10
+
+# Готові рядки таблиці контактів для виводу
+contact_rows = RenderCache()
+
+# Підказка для note get between
+BETWEEN_USAGE = "Usage: note get between DD.MM.YYYY DD.MM.YYYY [--modified]"
+
+def parse_range_date(value, bound):
+    """Розбирає межу діапазону note get between (bound - "start" або "end")."""
+    try:
+        return datetime.strptime(value, "%d.%m.%Y").date()
+    except ValueError:
+        raise ValueError(f"Invalid {bound} date '{value}' of the range. {BETWEEN_USAGE}")
+
 @input_error
 def contact_set(args, book: AddressBook):
     """
@@ -57,8 +81,12 @@ def contact_get(args, book: AddressBook):
     """
     Показує інформацію про контакти.
     contact get all - всі контакти
+    contact get all --page 3 --page-size 50 - одна сторінка контактів
     contact get birthdays - дні народження (7 днів)
     contact get birthdays 10 - дні народження (10 днів)
+    contact get phone 0671234567 - власник номера (067 - всі номери з префіксом)
+    contact get email john@site.com - за email (@site.com - домен, john* - префікс)
+    contact get where email ~ "@corp.ua" and birthday.month = 5 [--explain] - запит за умовами
     contact get John - знайти контакт John
     """
     if not args:
@@ -68,10 +96,17 @@ def contact_get(args, book: AddressBook):
     
     # Показати всі контакти
     if first_arg == 'all':
-        if not book.data:
+        page, page_size = parse_page_options(args[1:])
+        total = len(book.data)
+        if not total:
             return info("Address book is empty")
-        console.print(f"[bold green]Total contacts: {len(book.data)}[/bold green]")
-        display_contacts(book)
+        if page is None:
+            console.print(f"[bold green]Total contacts: {total}[/bold green]")
+            display_contacts(book)
+            return ""
+        start, stop, pages = page_bounds(total, page, page_size)
+        console.print(f"[bold green]Total contacts: {total} | Page {page} of {pages}[/bold green]")
+        display_contacts(book, start, stop, page_size)
         return ""
     
     # Показати дні народження
@@ -80,11 +115,37 @@ def contact_get(args, book: AddressBook):
         if len(args) > 1 and args[1].isdigit():
             days = int(args[1])
         
-        upcoming = book.get_upcoming_birthdays(days)
-        if upcoming:
-            return success(f"Birthdays in {days} days:\n" + "\n".join(upcoming))
-        return info(f"No birthdays in the next {days} days")
+        # Результати виводяться потоком, без побудови повного списку
+        upcoming = book.iter_upcoming_birthdays(days)
+        first = next(upcoming, None)
+        if first is None:
+            return info(f"No birthdays in the next {days} days")
+        success(f"Birthdays in {days} days:")
+        for record, bday in chain([first], upcoming):
+            console.print(format_upcoming(record, bday))
+        return ""
     
+    # Зворотний пошук за телефоном або email
+    if first_arg in ('phone', 'email') and len(args) > 1:
+        value = args[1]
+        if first_arg == 'phone':
+            digits = ''.join(ch for ch in value if ch.isdigit())
+            if not digits:
+                return error("Usage: contact get phone <number or prefix>")
+            results = book.find_by_phone(digits) if len(digits) == 10 else book.find_by_phone_prefix(digits)
+        elif value.startswith('@'):
+            results = book.find_by_email_domain(value)
+        elif value.endswith('*'):
+            results = book.find_by_email_prefix(value.rstrip('*'))
+        else:
+            results = book.find_by_email(value)
+        if results:
+            return success(f"Found {len(results)} contact(s):\n" + "\n".join(str(r) for r in results))
+        return info(f"No contacts with {first_arg} '{value}'")
+
+    if first_arg == 'where':
+        return contact_where(args[1:], book)
+
     # Знайти конкретний контакт
     name = args[0]
     record = book.find(name)
@@ -95,26 +156,132 @@ def contact_get(args, book: AddressBook):
     results = book.search_contacts(name)
     if results:
         return success("Found contacts:\n" + "\n".join(str(r) for r in results))
-    
-    return error(f"Contact '{name}' not found")
-
-def display_contacts(book):
-    """Виводить всі контакти у вигляді таблиці."""
-    table = Table(title="📒 Address Book", show_lines=True)
-    table.add_column("👤 Name", style="bold cyan", no_wrap=True)
-    table.add_column("📱 Phone(s)", style="white")
-    table.add_column("📧 Email", style="magenta")
-    table.add_column("🎂 Birthday", style="yellow")
-    table.add_column("🏡 Address", style="green")
-
-    for record in sorted(book.data.values(), key=lambda r: r.name.value.lower()):
-        phones = ", ".join(p.value for p in record.phones) or "-"
-        email = record.email.value if record.email else "-"
-        birthday = record.birthday.value.strftime("%d.%m.%Y") if record.birthday else "-"
-        address = record.address.value if record.address else "-"
-        table.add_row(record.name.value, phones, email, birthday, address)
 
-    console.print(table)
+    # Схожі імена (друкарські помилки)
+    suggestions = book.suggest_names(name)
+    error(f"Contact '{name}' not found")
+    if suggestions:
+        show_suggestions(name, suggestions, label="contact")
+    return ""
+
+def contact_where(args, book: AddressBook):
+    """
+    Виконує запит за умовами (classbot.query) і виводить контакти потоком.
+    З --explain спершу показує план, а наприкінці - скільки кандидатів перевірено.
+    """
+    explain = '--explain' in args
+    plan = QueryPlan(book, parse_query([arg for arg in args if arg != '--explain']))
+    if explain:
+        for line in plan.explain():
+            info(line)
+    start = perf_counter()
+    found = 0
+    for record in plan:
+        found += 1
+        echo(str(record))
+    if explain:
+        elapsed = (perf_counter() - start) * 1000
+        info(f"Examined {plan.examined} contact(s), matched {found} in {elapsed:.1f} ms")
+    if found:
+        return success(f"Found {found} contact(s)")
+    return info("No contacts match the query")
+
+def parse_page_options(args):
+    """
+    Розбирає опції --page N і --page-size M.
+    Повертає (page, page_size); page = None означає вивести все потоком.
+    """
+    page, page_size = None, PAGE_SIZE
+    options = iter(args)
+    for option in options:
+        if option not in ("--page", "--page-size"):
+            raise ValueError(f"Unknown option '{option}'. Use: --page N --page-size M")
+        value = next(options, "")
+        if not value.isdigit() or int(value) < 1:
+            raise ValueError(f"{option} expects a positive number")
+        if option == "--page":
+            page = int(value)
+        else:
+            page_size = int(value)
+    if page is None and page_size != PAGE_SIZE:
+        page = 1
+    return page, page_size
+
+def page_bounds(total, page, page_size):
+    """Повертає (start, stop, кількість сторінок) для сторінки page."""
+    pages = max(1, -(-total // page_size))
+    if page > pages:
+        raise ValueError(f"Page {page} is out of range (1-{pages})")
+    start = (page - 1) * page_size
+    return start, start + page_size, pages
+
+def _contacts_table(title=None):
+    """
+    Створює таблицю контактів. Ширина колонок задається пропорціями,
+    тож таблиці окремих порцій вирівнюються одна під одною.
+    """
+    from rich.table import Table
+    table = Table(title=title, show_header=title is not None, show_lines=True, expand=True)
+    table.add_column("👤 Name", style="bold cyan", no_wrap=True, ratio=2)
+    table.add_column("📱 Phone(s)", style="white", ratio=2)
+    table.add_column("📧 Email", style="magenta", ratio=2)
+    table.add_column("🎂 Birthday", style="yellow", ratio=1, min_width=10)
+    table.add_column("🏡 Address", style="green", ratio=3)
+    return table
+
+def contact_row(record):
+    """Повертає значення колонок таблиці контактів для запису."""
+    phones = ", ".join(record.phone_values()) or "-"
+    email = record.email.value if record.email else "-"
+    birthday = record.birthday.value.strftime("%d.%m.%Y") if record.birthday else "-"
+    address = record.address.value if record.address else "-"
+    return record.name.value, phones, email, birthday, address
+
+def display_contacts(book, start=0, stop=None, chunk_size=PAGE_SIZE):
+    """
+    Виводить контакти з позицій start..stop в алфавітному порядку.
+    Рядки беруться з відсортованого ітератора і друкуються порціями
+    по chunk_size, тож перші рядки з'являються одразу, а в пам'яті
+    тримається лише одна порція.
+    """
+    records = book.iter_sorted(start, stop)
+    title = "📒 Address Book"
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        table = _contacts_table(title)
+        for record in chunk:
+            table.add_row(*contact_rows.get(record, record.version, lambda: contact_row(record)))
+        console.print(table)
+        title = None
+
+@input_error
+def contact_import(args, book: AddressBook):
+    """
+    Імпортує контакти з файлу CSV або vCard.
+    contact import contacts.csv - колонки name, phone, email, address, birthday
+    contact import contacts.vcf - картки vCard
+    """
+    if not args:
+        return error("Usage: contact import <file.csv|file.vcf>")
+
+    from classbot.importer import import_contacts
+    path = ' '.join(args)
+    try:
+        with console.status(f"Importing contacts from [bold]{path}[/]...") as status:
+            report = import_contacts(
+                book, path,
+                progress=lambda r: status.update(f"Importing contacts from [bold]{path}[/]: {r.rows} row(s)..."),
+            )
+    except FileNotFoundError:
+        return error(f"File '{path}' not found")
+
+    for line_no, message in report.errors[:10]:
+        console.print(f"[red]  line {line_no}:[/red] {message}")
+    if len(report.errors) > 10:
+        console.print(f"[red]  ... and {len(report.errors) - 10} more error(s)[/red]")
+    return success(str(report))
 
 @input_error
 def contact_delete(args, book: AddressBook):
@@ -230,9 +397,14 @@ def note_get(args, notebook: NoteBook):
     """
     Показує нотатки.
     note get all - всі нотатки
+    note get all --page 2 --page-size 20 - одна сторінка нотаток
     note get "title" - конкретна нотатка
-    note get search "query" - пошук за змістом
+    note get search "query" - пошук за змістом (від найкращого збігу)
     note get tag "tag_name" - пошук за тегом
+    note get tag "work,urgent" - пошук за виразом: "," - І, "|" - АБО, "!" - НЕ
+    note get tags - статистика тегів
+    note get recent 20 - нотатки, змінені останніми (oldest 20 - найстаріші)
+    note get between 01.05.2024 31.05.2024 [--modified] - створені (змінені) за період
     """
     if not args:
         return error("Usage: note get <all|title|search|tag> [value]")
@@ -240,11 +412,24 @@ def note_get(args, notebook: NoteBook):
     command = args[0].lower().strip('"')
 
     if command == "all":
-        if not notebook.notes:
+        from rich.columns import Columns
+        page, page_size = parse_page_options(args[1:])
+        total = len(notebook.notes)
+        if not total:
             return info("No notes found")
-        console.rule("[bold magenta]🗂 All Notes")
-        notes = [note.__rich__() for note in notebook.notes.values()]
-        console.print(Columns(notes, equal=True, expand=True))
+        if page is None:
+            start, stop = 0, None
+            console.rule("[bold magenta]🗂 All Notes")
+        else:
+            start, stop, pages = page_bounds(total, page, page_size)
+            console.rule(f"[bold magenta]🗂 All Notes | Page {page} of {pages}")
+        # Панелі будуються і друкуються порціями, а не для всіх нотаток одразу
+        notes = notebook.iter_sorted(start, stop)
+        while True:
+            chunk = [note.__rich__() for note in islice(notes, page_size)]
+            if not chunk:
+                break
+            console.print(Columns(chunk, equal=True, expand=True))
         return ""
 
     elif command == "search" and len(args) > 1:
@@ -258,9 +443,60 @@ def note_get(args, notebook: NoteBook):
             return ""
         return info(f"No notes found for query '{query}'")
 
+    elif command in ("recent", "oldest"):
+        count = RECENT_NOTES
+        if len(args) > 1:
+            if not args[1].isdigit() or int(args[1]) < 1:
+                raise ValueError(f"Usage: note get {command} [N], N is a positive number")
+            count = int(args[1])
+        if command == "recent":
+            results, title = notebook.recent(count), "🕒 Recently modified notes"
+        else:
+            results, title = notebook.oldest(count), "🕰 Oldest notes"
+        if results:
+            console.rule(f"[bold magenta]{title}")
+            for note in results:
+                console.print(note)
+            return ""
+        return info("No notes found")
+
+    elif command == "between" and len(args) > 2:
+        options = args[3:]
+        if any(option != "--modified" for option in options):
+            raise ValueError(BETWEEN_USAGE)
+        start = datetime.combine(parse_range_date(args[1], "start"), time.min)
+        end = datetime.combine(parse_range_date(args[2], "end"), time.max)
+        if start > end:
+            raise ValueError("The start date must not be after the end date")
+        modified = "--modified" in options
+        results = notebook.between(start, end, modified)
+        what = "modified" if modified else "created"
+        if results:
+            console.rule(f"[bold magenta]📅 {len(results)} note(s) {what} {args[1]} - {args[2]}")
+            for note in results:
+                console.print(note)
+            return ""
+        return info(f"No notes {what} between {args[1]} and {args[2]}")
+
+    elif command == "tags":
+        from rich.table import Table
+        counts = notebook.tag_counts()
+        if not counts:
+            return info("No tags found")
+        table = Table(title="🏷 Tags")
+        table.add_column("Tag", style="green")
+        table.add_column("Notes", justify="right")
+        for tag, count in counts.items():
+            table.add_row(f"#{tag}", str(count))
+        console.print(table)
+        return ""
+
     elif command == "tag" and len(args) > 1:
         tag = args[1].strip('"')
-        results = notebook.search_by_tags(tag)
+        if any(op in tag for op in ",|!"):
+            results = notebook.query_tags(tag)
+        else:
+            results = notebook.search_by_tags(tag)
         if results:
             console.rule(f"[bold green]🏷 Notes with tag #{tag}")
             for note in results:
@@ -276,7 +512,11 @@ def note_get(args, notebook: NoteBook):
             console.rule(f"[bold blue]📝 Note: {title}")
             console.print(note)
             return ""
-        return error(f"Note '{title}' not found")
+        suggestions = notebook.suggest_titles(title)
+        error(f"Note '{title}' not found")
+        if suggestions:
+            show_suggestions(title, suggestions, label="note")
+        return ""
 
 @input_error
 def note_delete(args, notebook: NoteBook):
@@ -307,6 +547,45 @@ def note_delete(args, notebook: NoteBook):
     return error(" Invalid arguments")
 
 
+def show_cache_stats(data):
+    """Показує влучання і промахи кешів пошуку (якщо дані вже завантажені) і кешів рендерингу."""
+    if data is None or not getattr(data, "loaded", True):
+        return
+    for label, owner in (("Contact", data['contacts']), ("Note", data['notes'])):
+        cache = owner._results
+        lookups = cache.hits + cache.misses
+        rate = f"{cache.hits / lookups:.0%}" if lookups else "-"
+        info(f"{label} search cache: {cache.hits} hits, {cache.misses} misses ({rate}), {len(cache)} cached")
+    for label, cache in (("Contact row", contact_rows), ("Note panel", panels)):
+        info(f"{label} render cache: {cache.hits} hits, {cache.misses} misses, {len(cache)} cached")
+
+def show_stats(metrics, data=None):
+    """Показує перцентилі затримок команд, зібрані з --stats, і статистику кешів пошуку."""
+    show_cache_stats(data)
+    if not metrics.enabled:
+        return info("Statistics are off. Start classbot with --stats to collect them.")
+    rows = metrics.summary()
+    if not rows:
+        return info("No commands measured yet")
+    from rich.table import Table
+    table = Table(title="⏱ Command latency, ms")
+    table.add_column("Command", style="bold cyan", no_wrap=True)
+    for column in ("N", "p50", "p95", "p99", "parse", "handler", "render", "persist"):
+        table.add_column(column, justify="right")
+    for command, n, p50, p95, p99, _, phases in rows:
+        table.add_row(
+            command, str(n),
+            *(f"{seconds * 1000:.2f}" for seconds in (p50, p95, p99)),
+            *(f"{phases[phase] * 1000:.2f}" if phase in phases else "-"
+              for phase in ("parse", "handler", "render", "persist")),
+        )
+    console.print(table)
+    if metrics.errors:
+        errors = ", ".join(f"{name}: {n}" for name, n in sorted(metrics.errors.items()))
+        info(f"Input errors: {errors}")
+    console.print("[dim]Phase columns are p50 values.[/dim]")
+    return ""
+
 def show_help():
     """Показує довідку по командам."""
     return """[bold cyan]Available commands:[/bold cyan]
@@ -317,14 +596,20 @@ def show_help():
 - contact set name address value     - Set address field
 - contact set name birthday value    - Set birthday field
 - contact get all                    - Show all contacts  
+- contact get all --page N --page-size M - Show one page of contacts
 - contact get birthdays days        - Show birthdays (custom days)
 - contact get name                   - Find contact
+- contact get phone 067              - Find by phone number or prefix
+- contact get email @site.com        - Find by email, domain or prefix (john*)
+- contact get where email ~ "@corp.ua" and birthday.month = 5 - Query by conditions (--explain shows the plan)
+- contact import file.csv|file.vcf   - Import contacts from CSV or vCard
 - contact delete name                - Delete entire contact
 - contact delete name email          - Delete email field
 - contact delete name address        - Delete address field
 - contact delete name birthday       - Delete birthday field
 - contact delete name phone number   - Delete phone field
 - help                               - Show this help
+- stats                              - Search cache hits; command latency p50/p95/p99 (run with --stats)
 - exit                               - Save and quit
 
 
@@ -344,9 +629,15 @@ def show_help():
 - note set "title" tag "tag_name"   - Add tag to note
 - note set "title" content "text"   - Update note content
 - note get all                      - Show all notes
+- note get all --page N --page-size M - Show one page of notes
 - note get "title"                  - Show specific note
-- note get search "query"           - Search notes by content
+- note get search "query"           - Search notes by content (best matches first)
+- note get search 'milk "buy bread" shop*' - Words, phrases and prefixes
 - note get tag "tag_name"           - Find notes by tag
+- note get tag "work,urgent|home"   - Tag query: "," AND, "|" OR, "!" NOT
+- note get tags                     - Show tag statistics
+- note get recent 20                 - Most recently modified notes (oldest 20 - oldest notes)
+- note get between 01.05.2024 31.05.2024 - Notes created in a period (--modified - changed)
 - note delete "title"               - Delete entire note
 - note delete "title" tag "tag"     - Remove tag from note
 
@@ -0,0 +1,186 @@
+import csv
+import os
+import re
+from itertools import islice
+from classbot.address_book import Record
+
+BATCH_SIZE = 1000
+PHONE_SPLIT_RE = re.compile(r"[;,|]")
+VCARD_EXTENSIONS = (".vcf", ".vcard")
+
+
+class ImportReport:
+    """Підсумок імпорту: кількість створених/оновлених контактів і помилки по рядках."""
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.rows = 0
+        self.errors = []
+
+    @property
+    def imported(self):
+        return self.created + self.updated
+
+    def __str__(self):
+        return (f"Processed {self.rows} row(s): {self.created} created, "
+                f"{self.updated} updated, {len(self.errors)} error(s)")
+
+
+def _clean_phone(value):
+    """Залишає в номері лише цифри (+38 (067) 123-45-67 -> 380671234567)."""
+    digits = "".join(ch for ch in value if ch.isdigit())
+    # Міжнародний формат України: 380XXXXXXXXX -> 0XXXXXXXXX
+    if len(digits) == 12 and digits.startswith("38"):
+        digits = digits[2:]
+    return digits
+
+
+def iter_csv(path):
+    """
+    Потоково читає CSV з колонками name, phone, email, address, birthday.
+    Колонка phone може містити кілька номерів через ';' або ','.
+    Генерує пари (номер рядка, словник полів).
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        for line_no, row in enumerate(reader, 2):
+            row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+            phones = PHONE_SPLIT_RE.split(row.get("phone") or row.get("phones") or "")
+            yield line_no, {
+                "name": row.get("name", ""),
+                "phones": [_clean_phone(p) for p in phones if p.strip()],
+                "email": row.get("email", ""),
+                "address": row.get("address", ""),
+                "birthday": row.get("birthday", ""),
+            }
+
+
+def _vcard_lines(f):
+    """Повертає логічні рядки vCard, склеюючи перенесені (що починаються з пробілу)."""
+    current = None
+    for line in f:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def _vcard_birthday(value):
+    """Переводить BDAY з vCard (YYYY-MM-DD або YYYYMMDD) у формат DD.MM.YYYY."""
+    digits = value.replace("-", "")
+    if len(digits) == 8 and digits.isdigit():
+        return f"{digits[6:8]}.{digits[4:6]}.{digits[:4]}"
+    return value
+
+
+def iter_vcard(path):
+    """
+    Потоково читає vCard-файл (FN, TEL, EMAIL, ADR, BDAY).
+    Генерує пари (номер рядка початку картки, словник полів).
+    """
+    with open(path, encoding="utf-8-sig") as f:
+        card = None
+        for line_no, line in enumerate(_vcard_lines(f), 1):
+            key, _, value = line.partition(":")
+            name = key.split(";")[0].upper()
+            if name == "BEGIN" and value.upper() == "VCARD":
+                card_line = line_no
+                card = {"name": "", "phones": [], "email": "", "address": "", "birthday": ""}
+            elif card is None:
+                continue
+            elif name == "END":
+                yield card_line, card
+                card = None
+            elif name == "FN":
+                card["name"] = value.strip()
+            elif name == "TEL":
+                card["phones"].append(_clean_phone(value))
+            elif name == "EMAIL" and not card["email"]:
+                card["email"] = value.strip()
+            elif name == "ADR" and not card["address"]:
+                card["address"] = ", ".join(part.strip() for part in value.split(";") if part.strip())
+            elif name == "BDAY":
+                card["birthday"] = _vcard_birthday(value.strip())
+
+
+def iter_rows(path):
+    """Обирає парсер за розширенням файлу (vCard або CSV)."""
+    if os.path.splitext(path)[1].lower() in VCARD_EXTENSIONS:
+        return iter_vcard(path)
+    return iter_csv(path)
+
+
+def build_record(row):
+    """
+    Створює Record з рядка імпорту.
+    Поля перевіряються тими самими правилами (Phone/Email/Birthday), що й contact set.
+    """
+    record = Record(row["name"])
+    for phone in row["phones"]:
+        if not record.find_phone(phone):
+            record.add_phone(phone)
+    if row["email"]:
+        record.set_email(row["email"])
+    if row["address"]:
+        record.set_address(row["address"])
+    if row["birthday"]:
+        record.set_birthday(row["birthday"])
+    return record
+
+
+def import_contacts(book, path, batch_size=BATCH_SIZE, progress=None):
+    """
+    Імпортує контакти з CSV/vCard у адресну книгу.
+    Рядки обробляються пакетами по batch_size; кожен пакет перевіряється
+    і вставляється в книгу одним викликом add_records. Некоректні рядки
+    не зупиняють імпорт, а потрапляють у report.errors як (рядок, помилка).
+    Якщо контакт уже існує, нові дані доповнюють його.
+    З book.unique_phones рядки з номером, що належить іншому контакту, пропускаються.
+    progress(report) викликається після кожного пакета.
+    """
+    report = ImportReport()
+    rows = iter_rows(path)
+    # Номери, зайняті контактами з поточного пакета, які ще не додані в книгу
+    claimed = {}
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        pending = {}
+        for line_no, row in batch:
+            report.rows += 1
+            if not row["name"]:
+                report.errors.append((line_no, "Name is required"))
+                continue
+            try:
+                fresh = build_record(row)
+            except ValueError as e:
+                report.errors.append((line_no, str(e)))
+                continue
+            name = fresh.name.value
+            if book.unique_phones:
+                conflicts = book.phone_conflicts(fresh, claimed)
+                if conflicts:
+                    phone, owner = conflicts[0]
+                    report.errors.append((line_no, f"Phone {phone} already belongs to '{owner}'"))
+                    continue
+                claimed.update((phone, name) for phone in fresh.phone_values())
+            existing = pending.get(name) or book.find(name)
+            if existing is None:
+                pending[name] = fresh
+                report.created += 1
+            else:
+                existing.update_from(fresh)
+                if name not in pending:
+                    pending[name] = existing
+                    report.updated += 1
+        book.add_records(pending.values())
+        claimed.clear()
+        if progress is not None:
+            progress(report)
+    return report
@@ -0,0 +1,429 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from operator import itemgetter
+from classbot.fulltext import tokenize
+
+_EMPTY = frozenset()
+_MISSING = object()
+
+
+def trigrams(text):
+    """Повертає множину триграм рядка (рядки коротші за 3 символи не мають триграм)."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """
+    Індекс підрядків: триграма -> множина ключів.
+    Запит довжиною від 3 символів перевіряється лише на записах-кандидатах,
+    які містять усі його триграми.
+    """
+    def __init__(self):
+        self._postings = defaultdict(set)
+        self._keys = {}
+
+    def add(self, key, texts):
+        """Індексує (або переіндексовує) ключ за набором рядків."""
+        self.discard(key)
+        grams = set()
+        for text in texts:
+            grams |= trigrams(text)
+        for gram in grams:
+            self._postings[gram].add(key)
+        self._keys[key] = grams
+
+    def discard(self, key):
+        """Видаляє ключ з індексу."""
+        for gram in self._keys.pop(key, _EMPTY):
+            keys = self._postings[gram]
+            keys.discard(key)
+            if not keys:
+                del self._postings[gram]
+
+    def candidates(self, query):
+        """
+        Повертає множину ключів-кандидатів для підрядка query.
+        Якщо запит закороткий для триграм, повертає None.
+        """
+        grams = trigrams(query)
+        if not grams:
+            return None
+        postings = sorted((self._postings.get(g, _EMPTY) for g in grams), key=len)
+        result = set(postings[0])
+        for keys in postings[1:]:
+            if not result:
+                break
+            result &= keys
+        return result
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class InvertedIndex:
+    """
+    Інвертований індекс: ключ -> множина ідентифікаторів.
+    Для кожного ідентифікатора пам'ятаються його ключі, тож переіндексація
+    не потребує старих значень.
+    """
+    def __init__(self):
+        self._postings = {}
+        self._keys = {}
+
+    def add(self, ident, keys):
+        """Індексує (або переіндексовує) ідентифікатор за набором ключів."""
+        self.discard(ident)
+        keys = frozenset(keys)
+        for key in keys:
+            self._postings.setdefault(key, set()).add(ident)
+        self._keys[ident] = keys
+
+    def discard(self, ident):
+        """Видаляє ідентифікатор з індексу."""
+        for key in self._keys.pop(ident, _EMPTY):
+            idents = self._postings[key]
+            idents.discard(ident)
+            if not idents:
+                del self._postings[key]
+
+    def get(self, key):
+        """Повертає множину ідентифікаторів для ключа (не змінювати!)."""
+        return self._postings.get(key, _EMPTY)
+
+    def counts(self):
+        """Повертає словник ключ -> кількість ідентифікаторів."""
+        return {key: len(idents) for key, idents in self._postings.items()}
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class PrefixIndex(InvertedIndex):
+    """
+    Інвертований індекс з відсортованим списком ключів:
+    крім точного пошуку, підтримує запити за префіксом ключа.
+    """
+    def __init__(self):
+        super().__init__()
+        self._sorted = []
+
+    def add(self, ident, keys):
+        """Індексує (або переіндексовує) ідентифікатор за набором ключів."""
+        self.discard(ident)
+        keys = frozenset(keys)
+        for key in keys:
+            idents = self._postings.get(key)
+            if idents is None:
+                idents = self._postings[key] = set()
+                insort(self._sorted, key)
+            idents.add(ident)
+        self._keys[ident] = keys
+
+    def update(self, items):
+        """
+        Індексує багато пар (ідентифікатор, ключі) з одним сортуванням
+        списку ключів - для початкової побудови індексу і для пакетів записів.
+        Нові ключі дописуються і зливаються з уже відсортованими; лише якщо
+        якісь ключі зникли, список будується заново.
+        """
+        added = []
+        removed = False
+        for ident, keys in items:
+            for key in self._keys.pop(ident, _EMPTY):
+                idents = self._postings[key]
+                idents.discard(ident)
+                if not idents:
+                    del self._postings[key]
+                    removed = True
+            keys = frozenset(keys)
+            for key in keys:
+                idents = self._postings.get(key)
+                if idents is None:
+                    idents = self._postings[key] = set()
+                    added.append(key)
+                idents.add(ident)
+            self._keys[ident] = keys
+        if removed:
+            self._sorted = sorted(self._postings)
+        elif added:
+            # Відсортований список і дописаний хвіст зливаються за лінійний час
+            self._sorted.extend(added)
+            self._sorted.sort()
+
+    def discard(self, ident):
+        """Видаляє ідентифікатор з індексу."""
+        for key in self._keys.pop(ident, _EMPTY):
+            idents = self._postings[key]
+            idents.discard(ident)
+            if not idents:
+                del self._postings[key]
+                del self._sorted[bisect_left(self._sorted, key)]
+
+    def prefix(self, prefix):
+        """Генератор пар (ключ, ідентифікатори) для ключів, що починаються з prefix, за зростанням."""
+        for i in range(bisect_left(self._sorted, prefix), len(self._sorted)):
+            key = self._sorted[i]
+            if not key.startswith(prefix):
+                break
+            yield key, self._postings[key]
+
+    def count_prefix(self, prefix):
+        """Повертає кількість ключів, що починаються з prefix, за O(log n)."""
+        start = bisect_left(self._sorted, prefix)
+        return bisect_left(self._sorted, prefix + "\U0010ffff", start) - start
+
+
+class SortedIndex:
+    """
+    Відсортований вторинний індекс: список пар (ключ, ідентифікатор).
+    Вставка і видалення - через bisect, діапазонні запити - O(log n + k).
+    """
+    def __init__(self):
+        self._items = []
+        self._keys = {}
+
+    def add(self, ident, key):
+        """Додає (або переміщує) ідентифікатор під новий ключ."""
+        self.discard(ident)
+        insort(self._items, (key, ident))
+        self._keys[ident] = key
+
+    def update(self, pairs):
+        """
+        Додає багато пар (ідентифікатор, ключ) одним сортуванням замість
+        вставки по одній - для початкової побудови індексу.
+        """
+        pairs = dict(pairs)
+        for ident in pairs:
+            self.discard(ident)
+        self._items.extend((key, ident) for ident, key in pairs.items())
+        self._items.sort()
+        self._keys.update(pairs)
+
+    def discard(self, ident):
+        """Видаляє ідентифікатор з індексу."""
+        key = self._keys.pop(ident, _MISSING)
+        if key is _MISSING:
+            return
+        i = bisect_left(self._items, (key, ident))
+        del self._items[i]
+
+    def key_of(self, ident):
+        """Повертає ключ, під яким проіндексовано ідентифікатор."""
+        return self._keys.get(ident)
+
+    def iter_from(self, key):
+        """Повертає пари з ключем >= key у порядку зростання."""
+        start = bisect_left(self._items, (key,))
+        for i in range(start, len(self._items)):
+            yield self._items[i]
+
+    def iter_before(self, key):
+        """Повертає пари з ключем < key у порядку зростання."""
+        stop = bisect_left(self._items, (key,))
+        for i in range(stop):
+            yield self._items[i]
+
+    def irange(self, lo, hi):
+        """Повертає пари з lo <= ключ <= hi у порядку зростання."""
+        for item in self.iter_from(lo):
+            if item[0] > hi:
+                break
+            yield item
+
+    def count(self, lo, hi):
+        """Повертає кількість пар з lo <= ключ <= hi за O(log n)."""
+        key = itemgetter(0)
+        return bisect_right(self._items, hi, key=key) - bisect_left(self._items, lo, key=key)
+
+    def slice(self, start=0, stop=None):
+        """Повертає пари з позицій start..stop (не включно) у порядку зростання."""
+        stop = len(self._items) if stop is None else min(stop, len(self._items))
+        for i in range(start, stop):
+            yield self._items[i]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __reversed__(self):
+        """Пари у порядку спадання ключа (перші k - за O(k))."""
+        return reversed(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+
+def _pattern_masks(pattern):
+    """Бітові маски позицій кожного символу pattern (для levenshtein)."""
+    masks = {}
+    for i, ch in enumerate(pattern):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    return masks
+
+
+def levenshtein(a, b, masks=None):
+    """
+    Відстань Левенштейна між a і b бітово-паралельним алгоритмом Майерса/Хіррьо:
+    O(len(b)) операцій з цілими числами замість таблиці len(a) x len(b).
+    masks - заздалегідь обчислені _pattern_masks(a), якщо a порівнюється з багатьма рядками.
+    """
+    m = len(a)
+    if not m:
+        return len(b)
+    if masks is None:
+        masks = _pattern_masks(a)
+    full = (1 << m) - 1
+    last = 1 << (m - 1)
+    vp, vn, dist = full, 0, m
+    get = masks.get
+    for ch in b:
+        x = get(ch, 0) | vn
+        d0 = ((((x & vp) + vp) ^ vp) | x) & full
+        hp = vn | (full ^ (d0 | vp))
+        hn = vp & d0
+        if hp & last:
+            dist += 1
+        elif hn & last:
+            dist -= 1
+        x = ((hp << 1) | 1) & full
+        vn = x & d0
+        vp = ((hn << 1) & full) | (full ^ (x | d0))
+    return dist
+
+
+class BKTree:
+    """
+    BK-дерево для нечіткого пошуку рядків за відстанню Левенштейна.
+    Видалений ключ лишається вузлом дерева і пропускається при пошуку;
+    коли таких більше половини, дерево перебудовується.
+    """
+    def __init__(self):
+        self._root = None
+        self._live = set()
+        self._size = 0
+
+    def _insert(self, key):
+        self._size += 1
+        if self._root is None:
+            self._root = (key, {})
+            return
+        masks = _pattern_masks(key)
+        node = self._root
+        while True:
+            dist = levenshtein(key, node[0], masks)
+            if dist == 0:
+                self._size -= 1
+                return
+            child = node[1].get(dist)
+            if child is None:
+                node[1][dist] = (key, {})
+                return
+            node = child
+
+    def add(self, key):
+        """Додає ключ до дерева."""
+        if key not in self._live:
+            self._live.add(key)
+            self._insert(key)
+
+    def discard(self, key):
+        """Видаляє ключ з дерева."""
+        if key in self._live:
+            self._live.discard(key)
+            if (self._size - len(self._live)) * 2 > self._size:
+                self._rebuild()
+
+    def _rebuild(self):
+        """Будує дерево заново лише з живих ключів."""
+        self._root = None
+        self._size = 0
+        for key in self._live:
+            self._insert(key)
+
+    def search(self, key, max_dist=2):
+        """Повертає пари (відстань, ключ) з відстанню <= max_dist, від найближчих."""
+        if self._root is None:
+            return []
+        masks = _pattern_masks(key)
+        found = []
+        stack = [self._root]
+        while stack:
+            node_key, children = stack.pop()
+            dist = levenshtein(key, node_key, masks)
+            if dist <= max_dist and node_key in self._live:
+                found.append((dist, node_key))
+            for edge in range(max(1, dist - max_dist), dist + max_dist + 1):
+                child = children.get(edge)
+                if child is not None:
+                    stack.append(child)
+        found.sort()
+        return found
+
+    def __contains__(self, key):
+        return key in self._live
+
+    def __len__(self):
+        return len(self._live)
+
+
+class FuzzyIndex:
+    """
+    Нечіткий пошук імен (або заголовків) з друкарськими помилками.
+    BK-дерево будується над окремими словами, а не над цілими іменами:
+    різних слів набагато менше, ніж імен, тож дерево будується в рази швидше.
+    Ім'я підходить, якщо кожне слово запиту відрізняється від якогось
+    його слова, а сумарно - не більше ніж на max_dist правок.
+    """
+    def __init__(self):
+        self._words = BKTree()
+        self._idents = InvertedIndex()
+        self._tokens = {}
+
+    def add(self, ident, text):
+        """Індексує (або переіндексовує) ідентифікатор за текстом."""
+        self.discard(ident)
+        tokens = tuple(tokenize(text))
+        self._tokens[ident] = tokens
+        self._idents.add(ident, tokens)
+        for token in tokens:
+            self._words.add(token)
+
+    def discard(self, ident):
+        """Видаляє ідентифікатор з індексу."""
+        tokens = self._tokens.pop(ident, None)
+        if tokens is None:
+            return
+        self._idents.discard(ident)
+        for token in tokens:
+            if not self._idents.get(token):
+                self._words.discard(token)
+
+    def search(self, text, max_dist=2, limit=5):
+        """
+        Повертає до limit ідентифікаторів, найближчих до text
+        (від найменшої сумарної кількості правок).
+        """
+        query = tokenize(text)
+        if not query:
+            return []
+        matches = [dict((word, dist) for dist, word in self._words.search(token, max_dist))
+                   for token in query]
+        candidates = None
+        for words in sorted(matches, key=len):
+            idents = set()
+            for word in words:
+                idents |= self._idents.get(word)
+            candidates = idents if candidates is None else candidates & idents
+            if not candidates:
+                return []
+        ranked = []
+        for ident in candidates:
+            tokens = self._tokens[ident]
+            cost = sum(min(words.get(t, max_dist + 1) for t in tokens) for words in matches)
+            if cost <= max_dist:
+                ranked.append((cost, len(tokens), ident))
+        ranked.sort()
+        return [ident for _, _, ident in ranked[:limit]]
+
+    def __len__(self):
+        return len(self._tokens)
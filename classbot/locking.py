@@ -0,0 +1,70 @@
+from contextlib import contextmanager
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокування між процесами не підтримується
+    fcntl = None
+
+LOCK_FILENAME = "address_book.lock"
+
+
+class FileLock:
+    """
+    Рекомендаційне блокування (flock) окремого файлу, спільне для всіх
+    процесів classbot, що працюють з тими самими даними.
+    shared() - для читання, exclusive() - для запису. Вкладені виклики в тому ж
+    потоці не блокують повторно, а лише рахуються. flock не розрізняє потоків,
+    що ділять дескриптор, тож усередині процесу блокування тримає один потік
+    (RLock): інші потоки чекають, поки він не відпустить файл.
+    Там, де немає fcntl (Windows), блокування не виконується.
+    """
+    def __init__(self, filename=LOCK_FILENAME):
+        self.filename = filename
+        self._file = None
+        self._depth = 0
+        self._exclusive = False
+        self._guard = threading.RLock()
+
+    @contextmanager
+    def _hold(self, exclusive):
+        # _depth і _exclusive змінює лише потік, що тримає _guard
+        with self._guard:
+            if self._depth:
+                if exclusive and not self._exclusive:
+                    raise RuntimeError("Cannot upgrade a shared lock to an exclusive one")
+            else:
+                self._acquire(exclusive)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if not self._depth:
+                    self._release()
+
+    def shared(self):
+        """Спільне блокування: кілька читачів одночасно, але без записувачів."""
+        return self._hold(False)
+
+    def exclusive(self):
+        """Виключне блокування: лише один процес."""
+        return self._hold(True)
+
+    def _acquire(self, exclusive):
+        self._exclusive = exclusive
+        if fcntl is None:
+            return
+        if self._file is None:
+            self._file = open(self.filename, "ab")
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def _release(self):
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def close(self):
+        with self._guard:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -1,13 +1,22 @@
+import argparse
+import io
+import json
+import os
 import shlex
-from classbot.storage import load_data, save_data, FILENAME
+import sys
+from time import perf_counter
+from classbot.storage import open_storage, LazyData, STORAGE_BACKENDS
 from classbot.handlers import (
-    contact_set, contact_get, contact_delete, show_help, note_set,
+    contact_set, contact_get, contact_delete, contact_import, show_help, show_stats, note_set,
     note_get, note_delete)
-from classbot.notebook import NoteBook 
+from classbot.metrics import metrics
 from classbot.guesser import guess_command
-from classbot.address_book import AddressBook
-from classbot.console import console, success, error, info, warning, show_panel, rule
-from rich.panel import Panel
+from classbot.autosave import AUTOSAVE_INTERVAL
+from classbot.client import SOCKET_FILENAME, DEFAULT_HOST
+from classbot.console import (
+    console, console_errors, use_plain_output, echo, success, error, info, warning, show_panel, rule,
+    show_suggestions,
+    track_render, render_seconds)
 
 
 def parse_input(user_input):
@@ -19,9 +28,13 @@ def parse_input(user_input):
     if not stripped:
         return None, None, []
     
-    try:
-        parts = shlex.split(stripped)
-    except ValueError:
+    # shlex потрібен лише для лапок і екранування; інакше результат той самий, що й у split()
+    if '"' in stripped or "'" in stripped or "\\" in stripped:
+        try:
+            parts = shlex.split(stripped)
+        except ValueError:
+            parts = stripped.split()
+    else:
         parts = stripped.split()
     
     command = parts[0].lower()
@@ -36,34 +49,318 @@ def parse_input(user_input):
     return command, sub_command, args
 
 
-def show_suggestions(entered_command, suggestions):
+def persist_change(storage, command, sub_command, args, data):
+    """
+    Передає сховищу зміну, зроблену командою set/delete.
+    Ключем є перший аргумент команди - ім'я контакту або заголовок нотатки.
+    Імпорт змінює багато контактів одразу, тому зберігається одним знімком.
+    """
+    if command == "contact" and sub_command == "import":
+        storage.checkpoint(data)
+        return
+    if sub_command not in ("set", "delete") or not args:
+        return
+    if command == "contact":
+        storage.contact_changed(data['contacts'], args[0])
+    elif command == "note":
+        storage.note_changed(data['notes'], args[0].strip('"'))
+    storage.maybe_compact(data)
+
+
+def parse_args(argv=None):
+    """Розбирає аргументи командного рядка."""
+    parser = argparse.ArgumentParser(prog="classbot", description="CLI Assistant for managing contacts and notes")
+    parser.add_argument(
+        "mode", nargs="?", choices=("serve",),
+        help="'serve' keeps the data in memory and answers clients (see --connect)",
+    )
+    parser.add_argument(
+        "--storage", choices=STORAGE_BACKENDS,
+        default=os.environ.get("CLASSBOT_STORAGE", "journal"),
+        help="storage backend (default: $CLASSBOT_STORAGE or 'journal')",
+    )
+    parser.add_argument(
+        "--batch", metavar="FILE",
+        help="run commands from FILE ('-' for stdin) and print results as JSON lines",
+    )
+    parser.add_argument(
+        "--checkpoint", metavar="N", type=int, default=0,
+        help="in batch mode, save a snapshot every N commands (default: only at the end)",
+    )
+    parser.add_argument(
+        "--autosave", metavar="SECONDS", type=float, default=AUTOSAVE_INTERVAL,
+        help=f"save a snapshot in the background every SECONDS if data changed "
+             f"(default: {AUTOSAVE_INTERVAL:g}; 0 - only on exit)",
+    )
+    parser.add_argument(
+        "--unique-phones", action="store_true",
+        help="refuse to attach a phone number that already belongs to another contact",
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="measure per-command latency (see the 'stats' command)",
+    )
+    parser.add_argument(
+        "--profile", metavar="DIR",
+        help="implies --stats; save cProfile data of the slowest commands to DIR on exit",
+    )
+    parser.add_argument(
+        "--socket", metavar="PATH", default=SOCKET_FILENAME,
+        help=f"Unix socket for 'serve' (default: {SOCKET_FILENAME})",
+    )
+    parser.add_argument(
+        "--port", metavar="N", type=int,
+        help=f"serve over TCP on {DEFAULT_HOST}:N instead of a Unix socket (0 - any free port)",
+    )
+    parser.add_argument(
+        "--connect", metavar="ADDRESS", nargs="?", const=SOCKET_FILENAME,
+        help="send commands to a running 'classbot serve' (socket path or host:port)",
+    )
+    return parser.parse_args(argv)
+
+
+contact_commands = {
+    "set": contact_set,
+    "get": contact_get, 
+    "delete": contact_delete,
+    "import": contact_import,
+}
+
+note_commands = {
+    "set": note_set,
+    "get": note_get,
+    "delete": note_delete,
+}
+
+# Підкоманди, що змінюють дані: виконуються під блокуванням запису сховища
+WRITE_COMMANDS = ("set", "delete", "import")
+
+
+def run_handler(handler, target, command, sub_command, args, storage, data, timings=None):
+    """
+    Викликає обробник команди, виводить відповідь і зберігає зміну.
+    Зміна зберігається, лише якщо обробник справді змінив дані (target.changes):
+    команда з помилкою чи без змін не дописує нічого в журнал.
+    Якщо передано timings, туди записується час фаз handler і persist.
+    """
+    changes = target.changes
+    start = perf_counter()
+    response = handler(args, target)
+    if response:
+        echo(response)
+    handled = perf_counter()
+    if target.changes != changes:
+        persist_change(storage, command, sub_command, args, data)
+    if timings is not None:
+        timings["handler"] = handled - start
+        timings["persist"] = perf_counter() - handled
+
+
+def execute(command, sub_command, args, storage, data, timings=None):
     """
-    Виводить панель з підказками команд у форматі rich.
+    Виконує одну розібрану команду (крім exit/close).
+    Команди contact/note виконуються в storage.transaction(), щоб бачити
+    зміни інших процесів classbot, які працюють з тими самими файлами.
+    Повертає False, якщо команда невідома.
     """
-    panel_text = f"[bold red]Unknown command:[/] [yellow]{entered_command}[/]\n\n"
-    panel_text += "[green]Did you mean:[/]\n"
-    for s in suggestions:
-        panel_text += f"  • [bold cyan]{s}[/]\n"
+    if command == "help":
+        show_panel("HELP", show_help())
+
+    elif command == "stats":
+        show_stats(metrics, data)
+
+    elif command == "contact":
+        if sub_command in contact_commands:
+            with storage.transaction(data, write=sub_command in WRITE_COMMANDS):
+                run_handler(contact_commands[sub_command], data['contacts'],
+                            command, sub_command, args, storage, data, timings)
+        else:
+            suggestions = guess_command(command, sub_command)
+            if suggestions:
+                show_suggestions(f"{command} {sub_command}", suggestions)
+            else:
+                error("Invalid contact command. Use: set, get, delete, or help.")
+            return False
 
-    console.print(Panel(panel_text, title="Suggestions", border_style="red"))
+    elif command == "note":
+        if sub_command in note_commands:
+            with storage.transaction(data, write=sub_command in WRITE_COMMANDS):
+                run_handler(note_commands[sub_command], data['notes'],
+                            command, sub_command, args, storage, data, timings)
+        else:
+            suggestions = guess_command(command, sub_command)
+            if suggestions:
+                show_suggestions(f"{command} {sub_command}", suggestions)
+            else:
+                error("Invalid note command. Use: set, get, delete, or help.")
+            return False
+
+    else:
+        suggestions = guess_command(command, sub_command)
+        if suggestions:
+            show_suggestions(command, suggestions)
+        else:
+            error("Unknown command. Type 'help' to see available commands.")
+        return False
+
+    return True
 
 
-def main():
-    data = load_data()
-    book = data.get('contacts', AddressBook())
-    notebook = data.get('notes', NoteBook())
+def dispatch(user_input, storage, data):
+    """
+    Розбирає і виконує рядок команди.
+    Повертає (command, known): command = None для порожнього рядка,
+    для exit/close команда лише повертається, а не виконується.
+    З увімкненою статистикою вимірює фази parse/handler/render/persist.
+    """
+    if not metrics.enabled:
+        command, sub_command, args = parse_input(user_input)
+        if not command or command in ("close", "exit"):
+            return command, True
+        return command, execute(command, sub_command, args, storage, data)
+    return measured_dispatch(user_input, storage, data)
+
 
-    contact_commands = {
-        "set": contact_set,
-        "get": contact_get, 
-        "delete": contact_delete,
-    }
+def measured_dispatch(user_input, storage, data):
+    """dispatch() з вимірюванням фаз і (з --profile) профілюванням команди."""
+    profiler = None
+    if metrics.profile_dir:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    rendered = render_seconds()
+    start = perf_counter()
+    command, sub_command, args = parse_input(user_input)
+    timings = {"parse": perf_counter() - start}
+    if not command or command in ("close", "exit"):
+        if profiler is not None:
+            profiler.disable()
+        return command, True
 
-    note_commands = {
-        "set": note_set,
-        "get": note_get,
-        "delete": note_delete,
-    }
+    known = execute(command, sub_command, args, storage, data, timings)
+    total = perf_counter() - start
+    if profiler is not None:
+        profiler.disable()
+
+    if not known:
+        key = "unknown"
+    elif command in ("contact", "note"):
+        key = f"{command} {sub_command}"
+    else:
+        key = command
+    timings["render"] = render_seconds() - rendered
+    if "handler" in timings:
+        timings["handler"] = max(0.0, timings["handler"] - timings["render"])
+    timings["total"] = total
+    metrics.record(key, timings)
+    if profiler is not None:
+        metrics.keep_profile(key, total, profiler)
+    return command, known
+
+
+def run_batch(lines, storage, data, out=sys.stdout, checkpoint_every=0):
+    """
+    Неінтерактивний режим: виконує команди з lines без підказок і банерів.
+    Для кожної команди в out пишеться рядок JSON:
+    {"line": N, "command": "...", "ok": true/false, "output": "..."}.
+    Порожні рядки і рядки, що починаються з '#', пропускаються.
+    checkpoint_every > 0 зберігає знімок кожні N команд.
+    Повертає код виходу: 0 - всі команди успішні, 1 - були помилки.
+    """
+    buffer = io.StringIO()
+    use_plain_output(buffer)
+    failed = 0
+    executed = 0
+    for line_no, line in enumerate(lines, 1):
+        if line.lstrip().startswith("#"):
+            continue
+        errors_before = console_errors()
+        buffer.seek(0)
+        buffer.truncate()
+        command, known = dispatch(line, storage, data)
+        if not command:
+            continue
+        if command in ("close", "exit"):
+            break
+        ok = known and console_errors() == errors_before
+        output = buffer.getvalue()
+        out.write(json.dumps(
+            {"line": line_no, "command": line.strip(), "ok": ok, "output": output.rstrip()},
+            ensure_ascii=False,
+        ) + "\n")
+
+        failed += not ok
+        executed += 1
+        if checkpoint_every and executed % checkpoint_every == 0:
+            storage.checkpoint(data)
+
+    out.flush()
+    return 1 if failed else 0
+
+
+def finish_stats():
+    """Зберігає профілі найповільніших команд (з --profile) і повідомляє, куди."""
+    for path in metrics.dump_profiles():
+        print(f"classbot: profile saved to {path}", file=sys.stderr)
+
+
+def connect(options):
+    """Тонкий клієнт (--connect): команди з --batch або з клавіатури виконує сервер."""
+    from classbot.client import run_client
+    if options.batch is None:
+        return run_client(options.connect)
+    try:
+        stream = sys.stdin if options.batch == "-" else open(options.batch, encoding="utf-8")
+    except OSError as e:
+        print(f"classbot: cannot open batch file: {e}", file=sys.stderr)
+        return 2
+    with stream:
+        return run_client(options.connect, stream)
+
+
+def configure(options):
+    """Повертає функцію, яка застосовує опції командного рядка до завантажених даних."""
+    def on_load(data):
+        data['contacts'].unique_phones = options.unique_phones
+    return on_load
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    if options.connect:
+        return connect(options)
+    storage = open_storage(options.storage)
+    if options.stats or options.profile:
+        metrics.enable(profile_dir=options.profile)
+        track_render()
+
+    if options.mode == "serve":
+        from classbot.server import serve
+        try:
+            return serve(storage, options.socket, port=options.port, on_load=configure(options),
+                         autosave=options.autosave)
+        finally:
+            finish_stats()
+
+    if options.batch is not None:
+        try:
+            stream = sys.stdin if options.batch == "-" else open(options.batch, encoding="utf-8")
+        except OSError as e:
+            print(f"classbot: cannot open batch file: {e}", file=sys.stderr)
+            return 2
+        data = LazyData(storage, on_load=configure(options))
+        if options.autosave:
+            storage.start_autosave(data, options.autosave)
+        try:
+            with stream:
+                return run_batch(stream, storage, data, checkpoint_every=options.checkpoint)
+        finally:
+            storage.close(data)
+            finish_stats()
+
+    data = LazyData(storage, on_load=configure(options))
+    if options.autosave:
+        storage.start_autosave(data, options.autosave)
 
     rule("Welcome to CLASS CLI Assistant 🤖")
     info("Type 'help' to see available commands.\n")
@@ -71,57 +368,22 @@ def main():
     try:
         while True:
             user_input = console.input("📥 [bold cyan]Enter a command[/]: ")
-            command, sub_command, args = parse_input(user_input)
-
-            if not command:
-                continue
+            command, _ = dispatch(user_input, storage, data)
 
             if command in ["close", "exit"]:
                 success("Session ended. Goodbye!")
                 break
 
-            elif command == "help":
-                show_panel("HELP", show_help())
-
-            elif command == "contact":
-                if sub_command in contact_commands:
-                    response = contact_commands[sub_command](args, book)
-                    if response:
-                        console.print(response)
-                else:
-                    suggestions = guess_command(command, sub_command)
-                    if suggestions:
-                        show_suggestions(f"{command} {sub_command}", suggestions)
-                    else:
-                        error("Invalid contact command. Use: set, get, delete, or help.")
-
-            elif command == "note":
-                if sub_command in note_commands:
-                    response = note_commands[sub_command](args, notebook)
-                    if response:
-                        console.print(response)
-                else:
-                    suggestions = guess_command(command, sub_command)
-                    if suggestions:
-                        show_suggestions(f"{command} {sub_command}", suggestions)
-                    else:
-                        error("Invalid note command. Use: set, get, delete, or help.")
-
-            else:
-                suggestions = guess_command(command, sub_command)
-                if suggestions:
-                    show_suggestions(command, suggestions)
-                else:
-                    error("Unknown command. Type 'help' to see available commands.")
-
     except KeyboardInterrupt:
         warning("\nProgram interrupted by user (Ctrl+C).")
 
     finally:
-        save_data({'contacts': book, 'notes': notebook})
-        success(f"All data saved to [bold]{FILENAME}[/].")
+        storage.close(data)
+        success(f"All data saved to [bold]{storage.filename}[/].")
+        finish_stats()
         rule("Goodbye 👋")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import bisect
+import heapq
+import os
+import re
+from itertools import count
+
+# Межі кошиків гістограми: від 1 мкс, кожен наступний на 10% ширший (до ~20 хв)
+BUCKET_GROWTH = 1.1
+BUCKET_BOUNDS = []
+_bound = 1e-6
+while _bound < 1200:
+    BUCKET_BOUNDS.append(_bound)
+    _bound *= BUCKET_GROWTH
+del _bound
+
+PHASES = ("parse", "handler", "render", "persist")
+# Скільки найповільніших команд зберігати з --profile
+PROFILE_KEEP = 5
+
+
+class Histogram:
+    """
+    Гістограма затримок з логарифмічними кошиками.
+    Пам'ять не залежить від кількості вимірів; перцентилі мають похибку до 10%.
+    """
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        """Повертає p-й перцентиль (0-100) у секундах - верхню межу кошика."""
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                bound = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class Metrics:
+    """
+    Статистика виконання команд: гістограми загального часу і фаз
+    (parse/handler/render/persist) для кожної команди та лічильники помилок.
+    Поки enabled = False, нічого не вимірюється і не записується.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.profile_dir = None
+        self.histograms = {}
+        self.errors = {}
+        self._profiles = []
+        self._order = count()
+
+    def enable(self, profile_dir=None):
+        """Вмикає вимірювання; profile_dir - куди зберігати профілі найповільніших команд."""
+        self.enabled = True
+        self.profile_dir = profile_dir
+
+    def _histogram(self, command, phase):
+        key = (command, phase)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        return histogram
+
+    def record(self, command, timings):
+        """Записує виміри однієї команди: timings - словник фаза -> секунди (і 'total')."""
+        for phase, seconds in timings.items():
+            self._histogram(command, phase).add(seconds)
+
+    def record_error(self, name):
+        """Рахує помилку вводу, перехоплену декоратором input_error."""
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    def keep_profile(self, command, seconds, profiler):
+        """Зберігає профіль команди, якщо вона серед PROFILE_KEEP найповільніших."""
+        item = (seconds, next(self._order), command, profiler)
+        if len(self._profiles) < PROFILE_KEEP:
+            heapq.heappush(self._profiles, item)
+        elif seconds > self._profiles[0][0]:
+            heapq.heapreplace(self._profiles, item)
+
+    def dump_profiles(self):
+        """
+        Записує профілі найповільніших команд у profile_dir
+        (файли .prof для pstats/snakeviz) і повертає список шляхів.
+        """
+        if not self.profile_dir or not self._profiles:
+            return []
+        os.makedirs(self.profile_dir, exist_ok=True)
+        paths = []
+        ranked = sorted(self._profiles, key=lambda item: item[0], reverse=True)
+        for rank, (seconds, _, command, profiler) in enumerate(ranked, 1):
+            slug = re.sub(r"\W+", "-", command).strip("-") or "command"
+            path = os.path.join(self.profile_dir, f"{rank:02d}-{slug}-{seconds * 1000:.0f}ms.prof")
+            profiler.dump_stats(path)
+            paths.append(path)
+        return paths
+
+    def summary(self):
+        """
+        Повертає рядки статистики, від найповільнішої команди (за p95):
+        (команда, кількість, p50, p95, p99, max, {фаза: p50}) - час у секундах.
+        """
+        rows = []
+        for (command, phase), total in self.histograms.items():
+            if phase != "total":
+                continue
+            phases = {
+                name: self.histograms[(command, name)].percentile(50)
+                for name in PHASES if (command, name) in self.histograms
+            }
+            rows.append((
+                command, total.count, total.percentile(50), total.percentile(95),
+                total.percentile(99), total.max, phases,
+            ))
+        rows.sort(key=lambda row: row[3], reverse=True)
+        return rows
+
+    def reset(self):
+        """Очищає накопичену статистику."""
+        self.histograms.clear()
+        self.errors.clear()
+        self._profiles.clear()
+
+
+metrics = Metrics()
@@ -1,28 +1,116 @@
 from datetime import datetime
+from itertools import islice
+import sys
 from classbot.address_book import Field
+from classbot.blobs import blobs, INLINE_LIMIT
+from classbot.cache import ResultCache, RenderCache
 from classbot.console import console
-from rich.panel import Panel
-from rich.text import Text
+from classbot.indexes import InvertedIndex, SortedIndex, FuzzyIndex
+from classbot.fulltext import FullTextIndex, tokenize
+from classbot.parallel import ShardedScan
 
 
 class Tag(Field):
-    """Клас для зберігання тегу."""
+    """Клас для зберігання тегу. Значення інтернується, бо ті самі теги повторюються тисячі разів."""
+    __slots__ = ()
+
     def __init__(self, value):
         if not value or not value.strip():
             raise ValueError("Tag cannot be empty")
-        super().__init__(value.strip().lower())
+        super().__init__(sys.intern(value.strip().lower()))
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.value = sys.intern(self.value)
+
+
+# Скільки символів змісту тримати в пам'яті для нотатки, тіло якої у сховищі
+PREVIEW_LENGTH = 80
+
+
+# Готові панелі нотаток для виводу
+panels = RenderCache()
+
+
+class BlobRef:
+    """Посилання на зміст у сховищі blobs: ключ і короткий початок тексту."""
+    __slots__ = ('key', 'preview')
+
+    def __init__(self, key, preview):
+        self.key = key
+        self.preview = preview
 
 
 class Note:
-    """Клас для зберігання нотатки з тегами."""
+    """
+    Клас для зберігання нотатки з тегами.
+    Довгий зміст (понад INLINE_LIMIT символів) при записі зміни переноситься
+    у сховище blobs: у нотатці лишається BlobRef (ключ і preview),
+    а повний текст читається лише тоді, коли він потрібен (content).
+    _content - або сам текст, або BlobRef: один атрибут, тож потік, що читає
+    нотатку (фонове збереження), завжди бачить узгоджений стан.
+    """
+    __slots__ = ('title', '_content', 'tags', 'created_date', 'modified_date', '_notebook', 'version', '__weakref__')
+    # Поля, які зберігаються у файлі (_notebook - лише зв'язок з нотатником у пам'яті,
+    # version - лічильник змін нотатки в цій сесії)
+    _persistent = ('title', 'content', 'tags', 'created_date', 'modified_date')
+
     def __init__(self, title, content=""):
         self.title = title
         self.content = content
         self.tags = []
         self.created_date = datetime.now()
         self.modified_date = datetime.now()
+        # Нотатник, до якого належить нотатка; йому повідомляються зміни для оновлення індексів
+        self._notebook = None
+        self.version = 0
+
+    @property
+    def content(self):
+        """Повний зміст; якщо він у сховищі, читається звідти."""
+        content = self._content
+        if isinstance(content, BlobRef):
+            return blobs.get(content.key)
+        return content
+
+    @content.setter
+    def content(self, value):
+        self._content = value
+
+    @property
+    def preview(self):
+        """Початок змісту (PREVIEW_LENGTH символів) без звернення до сховища."""
+        content = self._content
+        if isinstance(content, BlobRef):
+            return content.preview
+        return content[:PREVIEW_LENGTH]
+
+    @property
+    def stored(self):
+        """Чи лежить зміст у сховищі blobs (а не в пам'яті)."""
+        return isinstance(self._content, BlobRef)
+
+    def store_content(self):
+        """
+        Переносить довгий зміст у сховище, лишаючи в пам'яті BlobRef.
+        Викликається сховищем під блокуванням запису, коли зміна нотатки записується.
+        """
+        content = self._content
+        if not isinstance(content, BlobRef) and len(content) > INLINE_LIMIT:
+            self._content = BlobRef(blobs.put(content), content[:PREVIEW_LENGTH])
 
     def __rich__(self):
+        # Зміст у сховищі чи ще не перенесений довгий текст не кешується: інакше панель тримала б його в пам'яті
+        content = self._content
+        if isinstance(content, BlobRef) or len(content) > INLINE_LIMIT:
+            return self._render()
+        # modified_date змінюється разом зі змістом і тегами; version - на випадок двох змін за мікросекунду
+        return panels.get(self, (self.modified_date, self.version), self._render, size=len(content))
+
+    def _render(self):
+        """Будує панель нотатки для rich."""
+        from rich.panel import Panel
+        from rich.text import Text
         content = Text(self.content, style="white")
         tag_str = ", ".join(f"#{tag.value}" for tag in self.tags)
         tag_text = Text(f"Tags: {tag_str}", style="green") if tag_str else ""
@@ -45,6 +133,7 @@ class Note:
             if not any(t.value == tag_obj.value for t in self.tags):
                 self.tags.append(tag_obj)
                 self.modified_date = datetime.now()
+                self._changed("tags")
         except ValueError as e:
             raise e
 
@@ -52,26 +141,233 @@ class Note:
         """Видаляє тег з нотатки."""
         self.tags = [t for t in self.tags if t.value != tag.lower()]
         self.modified_date = datetime.now()
+        self._changed("tags")
 
     def update_content(self, content):
         """Оновлює зміст нотатки."""
         self.content = content
         self.modified_date = datetime.now()
+        self._changed("content")
+
+    def _changed(self, field=None):
+        """Позначає нотатку зміненою (version) і повідомляє нотатник (field - "tags", "content" або None)."""
+        self.version += 1
+        if self._notebook is not None:
+            self._notebook._note_changed(self, field)
+
+    def tag_values(self):
+        """Повертає кортеж значень тегів нотатки."""
+        return tuple(tag.value for tag in self.tags)
+
+    def to_dict(self):
+        """
+        Повертає поля нотатки як словник простих типів (для знімка і журналу у форматі JSON).
+        Довгий зміст потрапляє у словник як 'blob' і 'preview'; саму нотатку метод не змінює.
+        """
+        data = {
+            'title': self.title,
+            'tags': list(self.tag_values()),
+            'created': self.created_date.isoformat(),
+            'modified': self.modified_date.isoformat(),
+        }
+        content = self._content
+        if not isinstance(content, BlobRef) and len(content) > INLINE_LIMIT:
+            content = BlobRef(blobs.put(content), content[:PREVIEW_LENGTH])
+        if isinstance(content, BlobRef):
+            data['blob'] = content.key
+            data['preview'] = content.preview
+        else:
+            data['content'] = content
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Створює нотатку зі словника to_dict(); теги не перевіряються повторно."""
+        if 'blob' in data:
+            note = cls(data['title'], BlobRef(data['blob'], data['preview']))
+        else:
+            note = cls(data['title'], data.get('content', ""))
+        note.tags = [Tag._trusted(sys.intern(tag)) for tag in data['tags']]
+        note.created_date = datetime.fromisoformat(data['created'])
+        note.modified_date = datetime.fromisoformat(data['modified'])
+        return note
+
+    def __getstate__(self):
+        return {key: getattr(self, key) for key in self._persistent}
+
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **(state[1] or {})}
+        self.content = ""
+        self.tags = []
+        for key, value in state.items():
+            if key in self._persistent:
+                setattr(self, key, value)
+        self._notebook = None
+        self.version = 0
 
     def __str__(self):
         tags_str = ', '.join(f"#{tag.value}" for tag in self.tags)
         tags_part = f" | Tags: {tags_str}" if tags_str else ""
-        return f"📝 {self.title}: {self.content[:50]}{'...' if len(self.content) > 50 else ''}{tags_part}"
+        preview = self.preview
+        more = len(preview) > 50 or self.stored
+        return f"📝 {self.title}: {preview[:50]}{'...' if more else ''}{tags_part}"
 
 
 class NoteBook:
     """Клас для управління колекцією нотаток."""
     def __init__(self):
         self.notes = {}
+        # Індекси будуються ліниво, при першому запиті
+        self._tag_index = None
+        self._tag_order = None
+        self._title_order = None
+        self._created_order = None
+        self._modified_order = None
+        self._fuzzy_titles = None
+        self._fulltext = None
+        # Пул процесів для повного перебору, створюється при першому великому перебиранні
+        self._scanner = None
+        # Результати повторюваних пошуків; скидаються, щойно змінюється changes
+        self._results = ResultCache()
+        # Лічильник змін нотатника (додавання, видалення, зміни нотаток)
+        self.changes = 0
+
+    def __getstate__(self):
+        return {'notes': self.notes}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.notes = state['notes']
+        for note in self.notes.values():
+            note._notebook = self
+
+    def _index_note(self, note, field=None):
+        """
+        Додає (або оновлює) нотатку в побудованих індексах.
+        field обмежує оновлення індексами одного поля ("tags" або "content").
+        """
+        if field != "content":
+            if self._tag_index is not None:
+                self._tag_index.add(note.title, note.tag_values())
+            if self._tag_order is not None:
+                self._tag_order.add(note.title, note.tag_values())
+        if field != "tags" and self._fulltext is not None:
+            self._fulltext.add(note.title, note.title, note.content)
+        if field != "tags" and self._scanner is not None and self._scanner.built:
+            self._scanner.add(note.title, note, self._scan_text(note))
+        if field is None and self._created_order is not None:
+            self._created_order.add(note.title, note.created_date)
+        # Будь-яка зміна нотатки оновлює modified_date
+        if self._modified_order is not None:
+            self._modified_order.add(note.title, note.modified_date)
+
+    def _unindex_note(self, note):
+        """Видаляє нотатку з побудованих індексів."""
+        if self._tag_index is not None:
+            self._tag_index.discard(note.title)
+        if self._tag_order is not None:
+            self._tag_order.discard(note.title)
+        if self._title_order is not None:
+            self._title_order.discard(note.title)
+        if self._created_order is not None:
+            self._created_order.discard(note.title)
+        if self._modified_order is not None:
+            self._modified_order.discard(note.title)
+        if self._fuzzy_titles is not None:
+            self._fuzzy_titles.discard(note.title)
+        if self._fulltext is not None:
+            self._fulltext.discard(note.title)
+        if self._scanner is not None:
+            self._scanner.discard(note.title)
+
+    def _note_changed(self, note, field=None):
+        """Викликається нотаткою після кожної зміни."""
+        self.changes += 1
+        self._index_note(note, field)
+
+    def _get_tag_index(self):
+        """Повертає інвертований індекс тег -> заголовки, будуючи його при першому зверненні."""
+        if self._tag_index is None:
+            self._tag_index = InvertedIndex()
+            for note in self.notes.values():
+                self._tag_index.add(note.title, note.tag_values())
+        return self._tag_index
+
+    def _get_tag_order(self):
+        """Повертає індекс нотаток, впорядкованих за тегами."""
+        if self._tag_order is None:
+            self._tag_order = SortedIndex()
+            for note in self.notes.values():
+                self._tag_order.add(note.title, note.tag_values())
+        return self._tag_order
+
+    def _get_title_order(self):
+        """Повертає індекс заголовків в алфавітному порядку (без урахування регістру)."""
+        if self._title_order is None:
+            self._title_order = SortedIndex()
+            self._title_order.update((title, title.lower()) for title in self.notes)
+        return self._title_order
+
+    def _get_created_order(self):
+        """Повертає індекс нотаток за датою створення, будуючи його при першому зверненні."""
+        if self._created_order is None:
+            self._created_order = SortedIndex()
+            self._created_order.update((note.title, note.created_date) for note in self.notes.values())
+        return self._created_order
+
+    def _get_modified_order(self):
+        """Повертає індекс нотаток за датою зміни, будуючи його при першому зверненні."""
+        if self._modified_order is None:
+            self._modified_order = SortedIndex()
+            self._modified_order.update((note.title, note.modified_date) for note in self.notes.values())
+        return self._modified_order
+
+    def _get_fuzzy_titles(self):
+        """Повертає індекс нечіткого пошуку заголовків, будуючи його при першому зверненні."""
+        if self._fuzzy_titles is None:
+            self._fuzzy_titles = FuzzyIndex()
+            for title in self.notes:
+                self._fuzzy_titles.add(title, title)
+        return self._fuzzy_titles
+
+    def _get_fulltext(self):
+        """Повертає повнотекстовий індекс, будуючи його при першому зверненні."""
+        if self._fulltext is None:
+            self._fulltext = FullTextIndex()
+            for note in self.notes.values():
+                self._fulltext.add(note.title, note.title, note.content)
+        return self._fulltext
+
+    def build_indexes(self):
+        """Будує всі індекси наперед (наприклад, перед обслуговуванням запитів сервером)."""
+        self._get_tag_index()
+        self._get_tag_order()
+        self._get_title_order()
+        self._get_created_order()
+        self._get_modified_order()
+        self._get_fuzzy_titles()
+        self._get_fulltext()
+
+    def _titles_with_tag(self, tag):
+        """Повертає множину заголовків нотаток з тегом tag."""
+        return self._get_tag_index().get(tag)
 
     def add_note(self, note):
         """Додає нотатку."""
+        old = self.notes.get(note.title)
+        if old is not None and old is not note:
+            # Індекси не чистяться: _index_note нижче переіндексовує той самий заголовок
+            # на тому ж місці, що й у self.notes (важливо для порядку ShardedScan)
+            old._notebook = None
         self.notes[note.title] = note
+        note._notebook = self
+        self.changes += 1
+        self._index_note(note)
+        if self._title_order is not None:
+            self._title_order.add(note.title, note.title.lower())
+        if self._fuzzy_titles is not None:
+            self._fuzzy_titles.add(note.title, note.title)
 
     def find_note(self, title):
         """Знаходить нотатку за заголовком."""
@@ -80,29 +376,141 @@ class NoteBook:
     def delete_note(self, title):
         """Видаляє нотатку."""
         if title in self.notes:
+            note = self.notes[title]
             del self.notes[title]
+            note._notebook = None
+            panels.discard(note)
+            self.changes += 1
+            self._unindex_note(note)
             return True
         return False
 
-    def search_by_content(self, query):
-        """Шукає нотатки за змістом."""
-        query = query.lower()
+    def suggest_titles(self, title, limit=5):
+        """Повертає до limit заголовків, схожих на title (до 2 друкарських помилок)."""
+        return self._get_fuzzy_titles().search(title, max_dist=2, limit=limit)
+
+    def iter_sorted(self, start=0, stop=None):
+        """Генератор нотаток в алфавітному порядку заголовків з позицій start..stop."""
+        for _, title in self._get_title_order().slice(start, stop):
+            yield self.notes[title]
+
+    def recent(self, count):
+        """Повертає count нотаток, змінених останніми (від найновішої), за O(log n + count)."""
+        return [self.notes[title] for _, title in islice(reversed(self._get_modified_order()), count)]
+
+    def oldest(self, count):
+        """Повертає count найстаріших нотаток (за датою створення)."""
+        return [self.notes[title] for _, title in islice(self._get_created_order(), count)]
+
+    def between(self, start, end, modified=False):
+        """
+        Повертає нотатки, створені (або, з modified, змінені) з start по end
+        включно, у хронологічному порядку - діапазонним запитом до індексу.
+        """
+        index = self._get_modified_order() if modified else self._get_created_order()
+        return [self.notes[title] for _, title in index.irange(start, end)]
+
+    def search_by_content(self, query, limit=None):
+        """
+        Шукає нотатки за заголовком і змістом, від найкращого збігу (BM25).
+        Підтримує фрази в лапках і префікси (слово*). Якщо цілих слів
+        не знайдено, шукає запит як підрядок.
+        Результат запам'ятовується до наступної зміни нотатника.
+        """
+        return self._results.get(("content", query, limit), self.changes,
+                                 lambda: self._search_by_content(query, limit))
+
+    def _search_by_content(self, query, limit=None):
+        """
+        Пошук за змістом без кешу: спершу збіги BM25, за ними - нотатки,
+        що містять запит як підрядок (milk знаходить і milkshake).
+        Підрядки шукаються за словником індексу, а не перебором змісту;
+        для запиту з кількох слів - лише якщо BM25 нічого не знайшов.
+        """
+        fulltext = self._get_fulltext()
+        ranked = [self.notes[title] for title, _ in fulltext.search(query, limit)]
+        tokens = tokenize(query)
+        if not tokens or (len(tokens) > 1 and ranked):
+            return ranked
+        seen = {note.title for note in ranked}
+        found = [self.notes[title] for title in sorted(fulltext.containing(tokens)) if title not in seen]
+        results = ranked + found
+        return results if limit is None else results[:limit]
+
+    def _scan_content(self, query):
+        """
+        Повний перебір нотаток з пошуком підрядка.
+        Великі нотатники перебираються паралельно на пулі процесів.
+        """
+        if self._scanner is None:
+            self._scanner = ShardedScan()
+        if self._scanner.enabled(len(self.notes)):
+            return self._scanner.search(query, self._scan_items)
         return [
             note for note in self.notes.values()
             if query in note.title.lower() or query in note.content.lower()
         ]
 
+    def _scan_items(self):
+        """Нотатки для паралельного перебору: (заголовок, нотатка, рядок)."""
+        for title, note in self.notes.items():
+            yield title, note, self._scan_text(note)
+
+    @staticmethod
+    def _scan_text(note):
+        """Рядок нотатки для перебору: заголовок і зміст у нижньому регістрі."""
+        return f"{note.title.lower()}\0{note.content.lower()}"
+
     def search_by_tags(self, tag):
-        """Шукає нотатки за тегом."""
-        tag = tag.lower()
-        return [
-            note for note in self.notes.values()
-            if any(t.value == tag for t in note.tags)
-        ]
+        """Шукає нотатки за тегом. Результат запам'ятовується до наступної зміни нотатника."""
+        tag = tag.strip().lower()
+        return self._results.get(("tag", tag), self.changes, lambda: self._search_by_tags(tag))
+
+    def _search_by_tags(self, tag):
+        """Пошук за тегом (у нижньому регістрі) через інвертований індекс, без кешу."""
+        return [self.notes[title] for title in sorted(self._titles_with_tag(tag))]
+
+    def query_tags(self, expression):
+        """
+        Шукає нотатки за виразом з тегів:
+        "," - І (work,urgent), "|" - АБО (work|home), "!" - НЕ (work,!done).
+        Результат запам'ятовується до наступної зміни нотатника.
+        """
+        expression = expression.lower()
+        return self._results.get(("tags", expression), self.changes, lambda: self._query_tags(expression))
+
+    def _query_tags(self, expression):
+        """Вираз з тегів (у нижньому регістрі) без кешу."""
+        found = set()
+        for group in expression.split("|"):
+            include, exclude = [], []
+            for term in group.split(","):
+                term = term.strip()
+                if term.startswith("!"):
+                    if term[1:].strip():
+                        exclude.append(term[1:].strip())
+                elif term:
+                    include.append(term)
+            if include:
+                sets = sorted((self._titles_with_tag(t) for t in include), key=len)
+                titles = set(sets[0]).intersection(*sets[1:])
+            elif exclude:
+                titles = set(self.notes)
+            else:
+                continue
+            for tag in exclude:
+                titles -= self._titles_with_tag(tag)
+            found |= titles
+        return [self.notes[title] for title in sorted(found)]
+
+    def tag_counts(self):
+        """Повертає словник тег -> кількість нотаток, від найпопулярнішого."""
+        counts = self._get_tag_index().counts()
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
 
     def sort_by_tags(self):
-        """Сортує нотатки за тегами."""
-        return sorted(self.notes.values(), key=lambda note: [tag.value for tag in note.tags])
+        """Повертає нотатки, впорядковані за тегами (з підтримуваного індексу)."""
+        return [self.notes[title] for _, title in self._get_tag_order()]
 
     def display_all_notes(self):
         """Виводить всі нотатки у форматі rich."""
@@ -0,0 +1,209 @@
+"""
+Паралельний повний перебір великих колекцій на процесах.
+
+Пошук підрядка, який не покриває жоден індекс, перебирає всі записи.
+ShardedScan ділить рядки колекції між кількома процесами, і кожен
+перевіряє свою частину, тож перебір мільйона нотаток масштабується
+з кількістю ядер.
+
+Процеси створюються через forkserver (або spawn, де його немає), а не fork:
+classbot працює з кількома потоками (автозбереження, пул сервера), і fork
+такого процесу може успадкувати захоплений іншим потоком замок.
+Процеси живуть, доки живе колекція: при змінах їм надсилаються лише
+змінені рядки, а не всі дані заново.
+"""
+from heapq import merge
+import os
+import threading
+
+# Менші колекції перебираються в поточному процесі: розсилання задач дорожче за перебір
+PARALLEL_THRESHOLD = 100_000
+# Коли видалених рядків стає більше, ніж живих, частини будуються заново
+COMPACT_MIN_HOLES = 10_000
+
+# Частина рядків колекції в процесі: номер рядка -> рядок
+_shard = None
+
+
+def _init_worker():
+    global _shard
+    _shard = {}
+
+
+def _apply(changes):
+    """Застосовує зміни (номер, рядок або None для видаленого) до частини процесу."""
+    for slot, text in changes:
+        if text is None:
+            _shard.pop(slot, None)
+        else:
+            _shard[slot] = text
+
+
+def _scan_shard(query):
+    """Повертає номери рядків частини, що містять query (за зростанням)."""
+    return [slot for slot, text in _shard.items() if query in text]
+
+
+def start_method():
+    """Спосіб запуску процесів: forkserver, а де його немає (Windows) - spawn."""
+    import multiprocessing
+    methods = multiprocessing.get_all_start_methods()
+    return "forkserver" if "forkserver" in methods else "spawn"
+
+
+def _pool_errors():
+    """Винятки зламаного чи зупиненого пулу (модуль пулу імпортується лише тоді, коли пул є)."""
+    from concurrent.futures.process import BrokenProcessPool
+    return (BrokenProcessPool, RuntimeError, OSError)
+
+
+class ShardedScan:
+    """
+    Пошук підрядка в рядках колекції на процесах.
+    Як і інші індекси, будується ліниво: search() викликає build(), що
+    видає (ключ, елемент, рядок) у порядку колекції, лише при першому
+    пошуку; далі колекція повідомляє про зміни через add() і discard().
+    Кожен процес тримає свою частину рядків (номер рядка за модулем
+    кількості процесів); зміни накопичуються і надсилаються перед пошуком.
+    Нові ключі отримують номери в кінці, тож результат - елементи
+    у порядку колекції, як у послідовному переборі.
+    """
+    def __init__(self, workers=None, threshold=PARALLEL_THRESHOLD):
+        self.workers = workers or os.cpu_count() or 1
+        self.threshold = threshold
+        self.built = False
+        self._executors = None
+        self._slots = {}
+        self._items = []
+        self._texts = []
+        self._holes = 0
+        # Зміни, ще не надіслані процесам: номер рядка -> рядок (None - видалений)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def enabled(self, size):
+        """Чи варто перебирати колекцію розміру size паралельно."""
+        return self.workers > 1 and size >= self.threshold
+
+    def add(self, key, item, text):
+        """Додає (або оновлює) елемент; до першого пошуку нічого не робить."""
+        with self._lock:
+            if not self.built:
+                return
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = len(self._items)
+                self._items.append(item)
+                self._texts.append(text)
+            else:
+                self._items[slot] = item
+                self._texts[slot] = text
+            self._pending[slot] = text
+
+    def discard(self, key):
+        """Видаляє елемент з ключем key, якщо він є."""
+        with self._lock:
+            slot = self._slots.pop(key, None)
+            if slot is None:
+                return
+            self._items[slot] = self._texts[slot] = None
+            self._pending[slot] = None
+            self._holes += 1
+            if self._holes > max(COMPACT_MIN_HOLES, len(self._slots)):
+                # Забагато порожніх номерів - простіше передати частини заново
+                self._reset()
+
+    def _reset(self):
+        self.built = False
+        self._slots = {}
+        self._items = []
+        self._texts = []
+        self._holes = 0
+        self._pending = {}
+        self._submit_all(_init_worker)
+
+    def _build(self, build):
+        for key, item, text in build():
+            self._slots[key] = len(self._items)
+            self._items.append(item)
+            self._texts.append(text)
+        self.built = True
+        self._send(enumerate(self._texts))
+
+    def _send(self, changes):
+        """Розсилає зміни процесам, яким належать номери рядків."""
+        if self._executors is None:
+            return
+        shards = [[] for _ in self._executors]
+        for slot, text in changes:
+            shards[slot % len(shards)].append((slot, text))
+        self._submit_all(_apply, shards)
+
+    def _submit_all(self, func, args=None):
+        """
+        Подає задачу кожному процесу (args - окремий аргумент для кожного).
+        Якщо пул уже зламаний, зупиняє його: новий отримає всі рядки заново.
+        """
+        if self._executors is None:
+            return
+        try:
+            for i, executor in enumerate(self._executors):
+                if args is None:
+                    executor.submit(func)
+                elif args[i]:
+                    executor.submit(func, args[i])
+        except _pool_errors():
+            self._stop()
+
+    def _start(self):
+        # Пул і multiprocessing імпортуються лише тут: вони помітно сповільнюють старт,
+        # а паралельний перебір потрібен лише великим колекціям
+        from concurrent.futures import ProcessPoolExecutor
+        import multiprocessing
+        # Процес на частину: задачі одного процесу виконуються по черзі, тож зміни
+        # завжди застосовуються до пошуку, поданого після них
+        context = multiprocessing.get_context(start_method())
+        self._executors = [
+            ProcessPoolExecutor(1, mp_context=context, initializer=_init_worker)
+            for _ in range(self.workers)
+        ]
+        self._pending = {}
+        self._send(enumerate(self._texts))
+
+    def search(self, query, build):
+        """Повертає елементи, рядки яких містять query."""
+        with self._lock:
+            if not self.built:
+                self._build(build)
+            if self._executors is None:
+                self._start()
+            elif self._pending:
+                self._send(self._pending.items())
+                self._pending = {}
+            executors, items, texts = self._executors, self._items, self._texts
+        try:
+            if executors is None:
+                raise RuntimeError("worker processes are not running")
+            futures = [executor.submit(_scan_shard, query) for executor in executors]
+            found = merge(*(future.result() for future in futures))
+            return [items[slot] for slot in found if items[slot] is not None]
+        except _pool_errors():
+            # Процес загинув (наприклад, через брак пам'яті) або пул уже зупинено -
+            # перебираємо тут, а процеси буде створено знову при наступному пошуку
+            with self._lock:
+                if self._executors is executors:
+                    self._stop()
+                return [items[slot] for slot, text in enumerate(texts)
+                        if text is not None and query in text]
+
+    def _stop(self):
+        if self._executors is not None:
+            for executor in self._executors:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._executors = None
+
+    def close(self):
+        """Зупиняє процеси і звільняє рядки."""
+        with self._lock:
+            self._stop()
+            self._reset()
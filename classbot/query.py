@@ -0,0 +1,264 @@
+"""
+Мова запитів до адресної книги:
+
+    contact get where email ~ "@corp.ua" and birthday.month = 5 and phone ^= 067
+
+Запит - умови <поле> <оператор> <значення>, з'єднані "and".
+Планувальник (QueryPlan) оцінює за індексами книги, скільки кандидатів
+дасть кожна умова, бере найвибірковішу, а решту умов перевіряє одним
+потоковим проходом по кандидатах. QueryPlan.explain() показує цей вибір.
+"""
+import operator
+import re
+from classbot.address_book import parse_birthday
+
+# Оператори в порядку розбору (довші - першими)
+OPERATORS = ("!=", "^=", "$=", "<=", ">=", "=", "~", "<", ">")
+TEXT_OPERATORS = ("=", "!=", "~", "^=", "$=")
+ORDER_OPERATORS = ("=", "!=", "<", "<=", ">", ">=")
+
+_TESTS = {
+    "=": operator.eq,
+    "~": lambda value, query: query in value,
+    "^=": str.startswith,
+    "$=": str.endswith,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+_OP_PATTERN = "|".join(re.escape(op) for op in OPERATORS)
+_FIELD_RE = re.compile(rf"([a-z_.]+)({_OP_PATTERN})?(.*)", re.IGNORECASE | re.DOTALL)
+_OP_RE = re.compile(rf"({_OP_PATTERN})(.*)", re.DOTALL)
+
+# Найбільший символ Unicode - верхня межа діапазону ключів з префіксом
+_MAX_CHAR = "\U0010ffff"
+
+
+def _birthday(record):
+    return (record.birthday.value,) if record.birthday else ()
+
+
+# Поле -> (тип значення, функція, що повертає значення поля запису)
+FIELDS = {
+    "name": ("text", lambda record: (record.name.value.lower(),)),
+    "phone": ("phone", lambda record: record.phone_values()),
+    "email": ("text", lambda record: (record.email.value.lower(),) if record.email else ()),
+    "email.domain": ("text", lambda record: (record.email.domain.lower(),) if record.email else ()),
+    "address": ("text", lambda record: (record.address.value.lower(),) if record.address else ()),
+    "birthday": ("date", _birthday),
+    "birthday.day": ("number", lambda record: tuple(b.day for b in _birthday(record))),
+    "birthday.month": ("number", lambda record: tuple(b.month for b in _birthday(record))),
+    "birthday.year": ("number", lambda record: tuple(b.year for b in _birthday(record))),
+}
+
+USAGE = 'Usage: contact get where <field> <op> <value> [and ...] [--explain]'
+
+
+class Condition:
+    """
+    Одна умова запиту. Текстові поля порівнюються без урахування регістру;
+    умова виконується, якщо їй відповідає хоча б одне значення поля (телефон
+    з кількох). "!=" - заперечення "=", тож контакти без поля теж підходять.
+    """
+    def __init__(self, field, op, value):
+        kind, self._values = FIELDS[field]
+        allowed = TEXT_OPERATORS if kind in ("text", "phone") else ORDER_OPERATORS
+        if op not in allowed:
+            raise ValueError(f"Operator '{op}' does not apply to {field}. Use: {', '.join(allowed)}")
+        self.field = field
+        self.op = op
+        self.raw = value
+        self.kind = kind
+        if kind == "text":
+            self.value = value.lower()
+        elif kind == "phone":
+            self.value = ''.join(ch for ch in value if ch.isdigit())
+            if not self.value:
+                raise ValueError(f"{field} expects digits, got '{value}'")
+        elif kind == "date":
+            self.value = parse_birthday(value)
+        else:
+            if not value.isdigit():
+                raise ValueError(f"{field} expects a number, got '{value}'")
+            self.value = int(value)
+
+    def matches(self, record):
+        values = self._values(record)
+        if self.op == "!=":
+            return self.value not in values
+        test = _TESTS[self.op]
+        return any(test(value, self.value) for value in values)
+
+    def __str__(self):
+        if self.kind == "text":
+            return f'{self.field} {self.op} "{self.raw}"'
+        return f"{self.field} {self.op} {self.raw}"
+
+
+def parse_query(args):
+    """
+    Розбирає аргументи команди (після "where") у список умов.
+    Поле, оператор і значення можна писати окремо або разом: birthday.month=5.
+    """
+    if not args:
+        raise ValueError(USAGE)
+    conditions = []
+    expect, field, op = "field", None, None
+    for arg in args:
+        if expect == "and":
+            if arg.lower() != "and":
+                raise ValueError(f"Expected 'and' before '{arg}'")
+            expect = "field"
+            continue
+        if expect == "field":
+            match = _FIELD_RE.fullmatch(arg)
+            if not match or match[1].lower() not in FIELDS or (match[2] is None and match[3]):
+                raise ValueError(f"Unknown field '{arg}'. Use: {', '.join(FIELDS)}")
+            field, op, value = match[1].lower(), match[2], match[3]
+            if op is None:
+                expect = "op"
+                continue
+        elif expect == "op":
+            match = _OP_RE.fullmatch(arg)
+            if not match:
+                raise ValueError(f"Expected an operator after {field}: {' '.join(OPERATORS)}")
+            op, value = match[1], match[2]
+        else:
+            value = arg
+        if expect != "value" and not value:
+            expect = "value"
+            continue
+        conditions.append(Condition(field, op, value))
+        expect = "and"
+    if expect != "and":
+        raise ValueError(f"Incomplete condition at the end of the query. {USAGE}")
+    return conditions
+
+
+class Access:
+    """
+    Шлях доступу до кандидатів для однієї умови: опис, оцінка кількості
+    і функція, що видає записи. exact - кандидати точно відповідають умові
+    і не потребують повторної перевірки.
+    """
+    def __init__(self, condition, label, estimate, rows, exact=True):
+        self.condition = condition
+        self.label = label
+        self.estimate = estimate
+        self.rows = rows
+        self.exact = exact
+
+    def __str__(self):
+        return f"{self.label} (~{self.estimate})"
+
+
+def _by_names(book, names):
+    """Функція, що видає записи для множини імен за алфавітом."""
+    return lambda: (book.data[name] for name in sorted(names))
+
+
+def _month_range(op, month):
+    """Повертає діапазон місяців [перший, останній] для умови birthday.month."""
+    first, last = {
+        "=": (month, month),
+        "<": (1, month - 1),
+        "<=": (1, month),
+        ">": (month + 1, 12),
+        ">=": (month, 12),
+    }[op]
+    return max(first, 1), min(last, 12)
+
+
+def index_access(book, condition):
+    """Повертає шлях доступу через індекс книги для умови або None."""
+    field, op, value = condition.field, condition.op, condition.value
+    if field == "name" and op in ("=", "^="):
+        index = book._get_name_order()
+        hi = value if op == "=" else value + _MAX_CHAR
+        return Access(condition, f'name index {op} "{condition.raw}"', index.count(value, hi),
+                      lambda: (book.data[name] for _, name in index.irange(value, hi)))
+    if field == "phone" and op == "=":
+        names = book._get_phone_index().get(value)
+        return Access(condition, f"phone index = {value}", len(names), _by_names(book, names))
+    if field == "phone" and op == "^=":
+        index = book._get_phone_index()
+        return Access(condition, f"phone prefix index {value}*", index.count_prefix(value),
+                      lambda: iter(book.find_by_phone_prefix(value)))
+    if field == "email" and op == "$=" and value.startswith("@") and "@" not in value[1:]:
+        field, op, value = "email.domain", "=", value[1:]
+    if field == "email.domain" and op == "=":
+        book._get_email_index()
+        names = book._domain_index.get(value)
+        return Access(condition, f"email domain index @{value}", len(names), _by_names(book, names))
+    if field == "email" and op == "=":
+        names = book._get_email_index().get(value)
+        return Access(condition, f'email index = "{value}"', len(names), _by_names(book, names))
+    if field == "email" and op == "^=":
+        index = book._get_email_index()
+        return Access(condition, f'email prefix index "{value}*"', index.count_prefix(value),
+                      lambda: iter(book.find_by_email_prefix(value)))
+    if field == "birthday" and op == "=":
+        index = book._get_birthday_index()
+        key = (value.month, value.day)
+        return Access(condition, f"birthday index {value:%d.%m}", index.count(key, key),
+                      lambda: (book.data[name] for _, name in index.irange(key, key)), exact=False)
+    if field == "birthday.month" and op != "!=":
+        index = book._get_birthday_index()
+        first, last = _month_range(op, value)
+        lo, hi = (first, 0), (last, 32)
+        estimate = index.count(lo, hi) if first <= last else 0
+        return Access(condition, f"birthday index months {first}..{last}", estimate,
+                      lambda: (book.data[name] for _, name in index.irange(lo, hi)))
+    if op in ("=", "~", "^=", "$=") and field in ("name", "phone", "email", "email.domain", "address"):
+        # Усі поля пошуку є в триграмному індексі: збіг означає, що запис містить усі триграми значення
+        names = book._get_search_index().candidates(value)
+        if names is not None:
+            return Access(condition, f'trigram index "{value}"', len(names), _by_names(book, names), exact=False)
+    return None
+
+
+class QueryPlan:
+    """
+    План запиту: найвибірковіший шлях доступу (або повний перебір)
+    і умови, що перевіряються на кожному кандидаті.
+    Ітерація по плану видає записи потоком; examined - скільки кандидатів перевірено.
+    """
+    def __init__(self, book, conditions):
+        self.book = book
+        self.conditions = conditions
+        self.total = len(book)
+        paths = []
+        if book.indexed_queries:
+            paths = [path for path in (index_access(book, c) for c in conditions) if path is not None]
+        paths.sort(key=lambda path: path.estimate)
+        self.access = paths[0] if paths and paths[0].estimate < self.total else None
+        self.considered = paths[1:] if self.access is not None else paths
+        self.filters = [c for c in conditions
+                        if not (self.access and self.access.exact and c is self.access.condition)]
+        self.examined = 0
+
+    def __iter__(self):
+        rows = self.access.rows() if self.access is not None else self.book.iter_sorted()
+        filters = self.filters
+        for record in rows:
+            self.examined += 1
+            if all(condition.matches(record) for condition in filters):
+                yield record
+
+    def explain(self):
+        """Повертає опис плану (рядки тексту)."""
+        lines = ["Query: " + " and ".join(str(c) for c in self.conditions)]
+        if self.access is not None:
+            lines.append(f"Access: {self.access} of {self.total} contacts")
+        elif not self.book.indexed_queries:
+            lines.append(f"Access: full scan of {self.total} contacts (this storage has no query indexes)")
+        elif self.considered:
+            lines.append(f"Access: full scan of {self.total} contacts (indexes are not selective)")
+        else:
+            lines.append(f"Access: full scan of {self.total} contacts (no index covers these conditions)")
+        if self.considered:
+            lines.append("Considered: " + ", ".join(str(path) for path in self.considered))
+        lines.append("Filter: " + (", ".join(str(c) for c in self.filters) or "none"))
+        return lines
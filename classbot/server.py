@@ -0,0 +1,253 @@
+"""
+Режим сервера: один процес тримає адресну книгу і нотатник у пам'яті
+(з побудованими індексами), а короткоживучі клієнти надсилають команди.
+
+Протокол - рядки JSON через Unix-сокет або TCP (лише localhost):
+    запит:   {"command": "contact get John", "id": 1}
+    відповідь: {"ok": true, "output": "...", "id": 1}
+id необов'язковий і повертається як є. Вивід - той самий простий текст,
+що й у пакетному режимі (--batch). Клієнт - classbot.client.
+"""
+import asyncio
+import io
+import json
+import os
+import signal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from classbot.client import SOCKET_FILENAME, DEFAULT_HOST
+from classbot.console import use_plain_output, console_errors
+from classbot.main import dispatch, parse_input, WRITE_COMMANDS
+
+# Як часто (у секундах) підтягувати зміни, записані іншими процесами classbot
+REFRESH_INTERVAL = 1.0
+# Скільки команд читання виконується одночасно
+READ_WORKERS = 4
+# Найдовший рядок запиту
+MAX_REQUEST_BYTES = 1 << 20
+
+
+class ReadWriteLock:
+    """
+    Асинхронне блокування: команди читання виконуються одночасно,
+    команда запису - лише сама. Записувач, що чекає, не пропускає нових
+    читачів поперед себе, тож потік читань не блокує записи назавжди.
+    """
+    def __init__(self):
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @asynccontextmanager
+    async def read(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._writer and not self._waiting_writers)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._readers -= 1
+                self._condition.notify_all()
+
+    @asynccontextmanager
+    async def write(self):
+        async with self._condition:
+            self._waiting_writers += 1
+            try:
+                await self._condition.wait_for(lambda: not self._writer and not self._readers)
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+class ThreadOutput:
+    """
+    Файл для use_plain_output, який пише у буфер поточного потоку:
+    команди, що виконуються одночасно, не змішують свій вивід.
+    """
+    def __init__(self):
+        self._local = threading.local()
+
+    def start(self):
+        """Починає новий буфер для поточного потоку."""
+        self._local.buffer = io.StringIO()
+
+    def getvalue(self):
+        return self._local.buffer.getvalue()
+
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is not None:
+            buffer.write(text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+def is_write(line):
+    """Чи змінює команда дані (set/delete/import)."""
+    command, sub_command, _ = parse_input(line)
+    return command in ("contact", "note") and sub_command in WRITE_COMMANDS
+
+
+class Server:
+    """
+    Обслуговує клієнтів над одними даними в пам'яті.
+    Команди виконуються в пулі потоків під ReadWriteLock: читання паралельно,
+    зміни - по одній. Зміни зберігаються тим самим сховищем (журналом), що й
+    в інтерактивному режимі, а зміни інших процесів підтягуються раз на REFRESH_INTERVAL.
+    """
+    def __init__(self, storage, on_load=None, autosave=None):
+        self.storage = storage
+        self.on_load = on_load
+        self.autosave = autosave
+        self.data = None
+        self.lock = ReadWriteLock()
+        self.output = ThreadOutput()
+        # Сховища, прив'язані до одного потоку (SQLite), отримують пул з одного потоку
+        workers = READ_WORKERS if storage.concurrent_reads else 1
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="classbot")
+        self.requests = 0
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def _load(self):
+        """Завантажує дані і будує індекси, щоб перші запити не чекали на них."""
+        self.storage.refresh_on_read = False
+        self.data = self.storage.load()
+        if self.on_load is not None:
+            self.on_load(self.data)
+        self._build_indexes()
+        if self.autosave:
+            self.storage.start_autosave(self.data, self.autosave)
+
+    def _build_indexes(self):
+        self.data['contacts'].build_indexes()
+        self.data['notes'].build_indexes()
+
+    def _refresh(self):
+        self.storage.refresh(self.data)
+        self._build_indexes()
+
+    def _execute(self, line):
+        """Виконує одну команду в потоці пулу і повертає (ok, вивід)."""
+        self.output.start()
+        errors = console_errors()
+        _, known = dispatch(line, self.storage, self.data)
+        ok = known and console_errors() == errors
+        return ok, self.output.getvalue().rstrip()
+
+    def _execute_write(self, line):
+        result = self._execute(line)
+        # Імпорт скидає індекси - будуємо їх знову, поки записувач ще сам
+        self._build_indexes()
+        return result
+
+    async def execute(self, line):
+        """Виконує рядок команди з урахуванням блокування читання/запису."""
+        self.requests += 1
+        if is_write(line):
+            async with self.lock.write():
+                return await self._run(self._execute_write, line)
+        async with self.lock.read():
+            return await self._run(self._execute, line)
+
+    async def handle_client(self, reader, writer):
+        """Обслуговує одне з'єднання: рядок запиту - рядок відповіді."""
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    break
+                if not line:
+                    break
+                response = await self.respond(line)
+                if response is None:
+                    break
+                writer.write(json.dumps(response, ensure_ascii=False).encode() + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def respond(self, line):
+        """Повертає відповідь на рядок запиту або None, якщо клієнт завершує сесію."""
+        try:
+            request = json.loads(line)
+            command = request["command"]
+            if not isinstance(command, str):
+                raise TypeError(command)
+        except (ValueError, KeyError, TypeError):
+            return {"ok": False, "output": "❌ Invalid request: expected {\"command\": \"...\"}"}
+        stripped = command.strip().lower()
+        if stripped in ("exit", "close"):
+            return None
+        ok, output = await self.execute(command)
+        response = {"ok": ok, "output": output}
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    async def refresh_forever(self):
+        """Періодично підтягує зміни інших процесів classbot."""
+        while True:
+            await asyncio.sleep(REFRESH_INTERVAL)
+            async with self.lock.write():
+                await self._run(self._refresh)
+
+    async def serve(self, socket_path=None, host=DEFAULT_HOST, port=None):
+        """Запускає сервер і працює до SIGINT/SIGTERM."""
+        use_plain_output(self.output)
+        await self._run(self._load)
+        if port is not None:
+            server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_REQUEST_BYTES)
+            address = f"{host}:{server.sockets[0].getsockname()[1]}"
+        else:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            server = await asyncio.start_unix_server(self.handle_client, socket_path, limit=MAX_REQUEST_BYTES)
+            address = socket_path
+        print(f"classbot: serving {len(self.data['contacts'])} contacts and "
+              f"{len(self.data['notes'].notes)} notes on {address}", file=sys.stderr, flush=True)
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        refresher = asyncio.create_task(self.refresh_forever())
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            refresher.cancel()
+            server.close()
+            async with self.lock.write():
+                await self._run(self.storage.close, self.data)
+            self.executor.shutdown()
+            if port is None and os.path.exists(socket_path):
+                os.unlink(socket_path)
+            print(f"classbot: served {self.requests} requests, data saved", file=sys.stderr)
+
+
+def serve(storage, socket_path=SOCKET_FILENAME, host=DEFAULT_HOST, port=None, on_load=None, autosave=None):
+    """
+    Точка входу для `classbot serve`; on_load(data) - як у LazyData,
+    autosave - інтервал фонового збереження в секундах (None або 0 - вимкнено).
+    """
+    asyncio.run(Server(storage, on_load, autosave).serve(socket_path, host, port))
+    return 0
@@ -0,0 +1,245 @@
+import heapq
+import json
+import mmap
+import os
+import struct
+import threading
+from collections.abc import MutableMapping
+from classbot.address_book import AddressBook, Record
+from classbot.notebook import NoteBook, Note
+
+# Формат знімка (усі числа little-endian):
+#   MAGIC
+#   HEADER: для contacts і notes - (кількість записів, зсув індексу)
+#   значення: JSON кожного запису (Record.to_dict / Note.to_dict) у UTF-8
+#   ключі: UTF-8 імен/заголовків
+#   індекс: ENTRY для кожного запису, відсортовано за ключем
+# Файл відкривається через mmap; при завантаженні читається лише заголовок,
+# а запис шукається в індексі бінарним пошуком і декодується при першому зверненні.
+MAGIC = b"CLSNAP01"
+HEADER = struct.Struct("<QQQQ")
+# (зсув ключа, довжина ключа, зсув значення, довжина значення)
+ENTRY = struct.Struct("<QIQI")
+SECTIONS = ("contacts", "notes")
+
+
+class SnapshotSection:
+    """Розділ знімка (контакти або нотатки) з бінарним пошуком за ключем у mmap."""
+    def __init__(self, buffer, count, index_offset):
+        self._buffer = buffer
+        self.count = count
+        self._index = index_offset
+
+    def _entry(self, i):
+        return ENTRY.unpack_from(self._buffer, self._index + i * ENTRY.size)
+
+    def _key(self, i):
+        key_offset, key_len, _, _ = self._entry(i)
+        return self._buffer[key_offset:key_offset + key_len]
+
+    def _find(self, key):
+        """Повертає номер запису з ключем key (bytes) або -1."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._key(lo) == key:
+            return lo
+        return -1
+
+    def get(self, key):
+        """Повертає закодоване значення (bytes) для ключа або None."""
+        i = self._find(key.encode())
+        if i < 0:
+            return None
+        _, _, value_offset, value_len = self._entry(i)
+        return self._buffer[value_offset:value_offset + value_len]
+
+    def __contains__(self, key):
+        return self._find(key.encode()) >= 0
+
+    def keys(self):
+        """Генератор ключів у відсортованому порядку."""
+        for i in range(self.count):
+            yield self._key(i).decode()
+
+    def items(self):
+        """Генератор пар (ключ, закодоване значення) у байтах, у відсортованому порядку."""
+        buffer = self._buffer
+        for i in range(self.count):
+            key_offset, key_len, value_offset, value_len = self._entry(i)
+            yield buffer[key_offset:key_offset + key_len], buffer[value_offset:value_offset + value_len]
+
+
+class SnapshotTable(MutableMapping):
+    """
+    Словникоподібний доступ до розділу знімка.
+    Записи декодуються при першому зверненні і кешуються; нові, змінені
+    та видалені записи тримаються в пам'яті поверх незмінного знімка.
+    """
+    def __init__(self, section, decode, link):
+        self._section = section
+        self._decode = decode
+        self._link = link
+        self._cache = {}
+        self._added = set()
+        self._deleted = set()
+
+    def __getitem__(self, key):
+        obj = self._cache.get(key)
+        if obj is not None:
+            return obj
+        if key in self._deleted:
+            raise KeyError(key)
+        raw = self._section.get(key)
+        if raw is None:
+            raise KeyError(key)
+        obj = self._decode(json.loads(raw))
+        self._link(obj)
+        self._cache[key] = obj
+        return obj
+
+    def __setitem__(self, key, obj):
+        self._cache[key] = obj
+        if key in self._deleted:
+            self._deleted.discard(key)
+        elif key not in self._added and key not in self._section:
+            self._added.add(key)
+
+    def __delitem__(self, key):
+        if key in self._added:
+            self._added.discard(key)
+            del self._cache[key]
+        elif key not in self._deleted and key in self._section:
+            self._deleted.add(key)
+            self._cache.pop(key, None)
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in self._cache:
+            return True
+        return key not in self._deleted and key in self._section
+
+    def __iter__(self):
+        deleted = self._deleted
+        for key in self._section.keys():
+            if key not in deleted:
+                yield key
+        yield from list(self._added)
+
+    def __len__(self):
+        return self._section.count - len(self._deleted) + len(self._added)
+
+    def encoded_items(self, encode):
+        """
+        Пари (ключ, значення) у байтах у порядку ключів для запису нового знімка.
+        Записи, які не декодувалися, копіюються зі старого знімка як є;
+        закешовані (можливо змінені) кодуються функцією encode.
+        """
+        fresh = sorted((key.encode(), encode(obj)) for key, obj in self._cache.items())
+        skip = {key.encode() for key in self._deleted} | {key for key, _ in fresh}
+        stored = (item for item in self._section.items() if item[0] not in skip)
+        return heapq.merge(stored, fresh)
+
+    def copy(self):
+        """
+        Копія поточного стану поверх того самого знімка: подальші додавання
+        і видалення в оригіналі її не змінюють (для фонового запису знімка).
+        """
+        table = SnapshotTable(self._section, self._decode, self._link)
+        table._cache = self._cache.copy()
+        table._added = self._added.copy()
+        table._deleted = self._deleted.copy()
+        return table
+
+    def __reduce__(self):
+        # pickle (наприклад, save_data) зберігає звичайний словник
+        return dict, (list(self.items()),)
+
+
+def _link_to(owner, attribute):
+    def link(obj):
+        setattr(obj, attribute, owner)
+    return link
+
+
+def read_snapshot(filename):
+    """
+    Відкриває знімок і повертає {'contacts': AddressBook, 'notes': NoteBook}
+    з лінивими SnapshotTable замість словників. Якщо файлу немає, повертає None.
+    """
+    try:
+        f = open(filename, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if buffer[:len(MAGIC)] != MAGIC:
+        buffer.close()
+        raise ValueError(f"{filename} is not a classbot snapshot")
+    contacts_count, contacts_index, notes_count, notes_index = HEADER.unpack_from(buffer, len(MAGIC))
+
+    book = AddressBook()
+    book.data = SnapshotTable(
+        SnapshotSection(buffer, contacts_count, contacts_index), Record.from_dict, _link_to(book, "_book"))
+    notebook = NoteBook()
+    notebook.notes = SnapshotTable(
+        SnapshotSection(buffer, notes_count, notes_index), Note.from_dict, _link_to(notebook, "_notebook"))
+    return {'contacts': book, 'notes': notebook}
+
+
+def encode(obj):
+    """Кодує Record або Note у компактний JSON (UTF-8)."""
+    return json.dumps(obj.to_dict(), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _encoded_items(table):
+    """Генератор пар (ключ, JSON-байти) у порядку ключів."""
+    if isinstance(table, SnapshotTable):
+        return table.encoded_items(encode)
+    return sorted((key.encode(), encode(obj)) for key, obj in table.items())
+
+
+def _write_section(f, table):
+    """Пише значення, ключі та індекс розділу; повертає (кількість, зсув індексу)."""
+    entries = []
+    for key, value in _encoded_items(table):
+        entries.append([key, f.tell(), len(value)])
+        f.write(value)
+    for entry in entries:
+        key = entry[0]
+        entry[0] = f.tell()
+        f.write(key)
+        entry.append(len(key))
+    index_offset = f.tell()
+    for key_offset, value_offset, value_len, key_len in entries:
+        f.write(ENTRY.pack(key_offset, key_len, value_offset, value_len))
+    return len(entries), index_offset
+
+
+def write_snapshot(filename, data, publish=True):
+    """
+    Записує контакти і нотатки у знімок. Файл пишеться поруч і атомарно
+    замінює старий, тож обірваний запис не псує попередній знімок.
+    З publish=False записаний тимчасовий файл не перейменовується -
+    повертається його ім'я, і викликач сам вирішує, чи ставити його на місце.
+    """
+    # Свій тимчасовий файл для кожного процесу і потоку: фонові записи не заважають один одному
+    tmp = f"{filename}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(0, 0, 0, 0))
+        contacts = _write_section(f, data['contacts'].data)
+        notes = _write_section(f, data['notes'].notes)
+        f.seek(len(MAGIC))
+        f.write(HEADER.pack(*contacts, *notes))
+        f.flush()
+        os.fsync(f.fileno())
+    if not publish:
+        return tmp
+    os.replace(tmp, filename)
+    return filename
@@ -0,0 +1,546 @@
+import calendar
+import os
+import sqlite3
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from datetime import date, datetime
+from classbot.address_book import AddressBook, Record, Birthday, Address, Email
+from classbot.notebook import NoteBook, Note, Tag
+from classbot.storage import replace_data
+
+DB_FILENAME = "address_book.db"
+# Скільки рядків читається за один запит при потоковому перегляді
+SORTED_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    name TEXT PRIMARY KEY,
+    birthday TEXT,
+    bday_month INTEGER,
+    bday_day INTEGER,
+    address TEXT,
+    email TEXT
+);
+CREATE TABLE IF NOT EXISTS phones (
+    name TEXT NOT NULL REFERENCES contacts(name) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    phone TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS notes (
+    title TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    created TEXT NOT NULL,
+    modified TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    title TEXT NOT NULL REFERENCES notes(title) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    tag TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_contacts_name_nocase ON contacts(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_notes_title_nocase ON notes(title COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_notes_created ON notes(created);
+CREATE INDEX IF NOT EXISTS idx_notes_modified ON notes(modified);
+CREATE INDEX IF NOT EXISTS idx_contacts_email ON contacts(email);
+CREATE INDEX IF NOT EXISTS idx_contacts_email_nocase ON contacts(email COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_contacts_email_domain
+    ON contacts(substr(email, instr(email, '@') + 1) COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_contacts_bday ON contacts(bday_month, bday_day);
+CREATE INDEX IF NOT EXISTS idx_phones_phone ON phones(phone);
+CREATE INDEX IF NOT EXISTS idx_phones_name ON phones(name);
+CREATE INDEX IF NOT EXISTS idx_tags_tag ON tags(tag);
+CREATE INDEX IF NOT EXISTS idx_tags_title ON tags(title);
+"""
+
+
+def connect(filename=DB_FILENAME):
+    """Відкриває базу даних і створює схему, якщо її ще немає."""
+    conn = sqlite3.connect(filename)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    # SQLite-овий lower() працює лише з ASCII, а в нас кирилиця
+    conn.create_function("py_lower", 1, lambda s: s.lower() if s is not None else None,
+                         deterministic=True)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _like_pattern(query):
+    """Екранує спецсимволи LIKE і повертає шаблон пошуку підрядка."""
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _iter_sorted(table, order, start, stop):
+    """
+    Потоково читає рядки таблиці в порядку order з позицій start..stop
+    порціями по SORTED_CHUNK, щоб не завантажувати всю таблицю одразу.
+    """
+    offset = start
+    while stop is None or offset < stop:
+        size = SORTED_CHUNK if stop is None else min(SORTED_CHUNK, stop - offset)
+        rows = table.select(f"ORDER BY {order} LIMIT ? OFFSET ?", (size, offset))
+        yield from rows
+        if len(rows) < size:
+            break
+        offset += size
+
+
+def _make_birthday(iso_value):
+    """Створює Birthday з ISO-дати без повторного strptime."""
+    bday = Birthday.__new__(Birthday)
+    bday.value = date.fromisoformat(iso_value)
+    return bday
+
+
+class _ContactTable(MutableMapping):
+    """
+    Словникоподібний доступ до таблиці contacts.
+    Записи завантажуються лише при зверненні і кешуються, щоб зміни,
+    зроблені в об'єкті Record, можна було записати назад у базу.
+    Завантажені записи прив'язуються до книги (book), як і додані через неї:
+    інакше їхні зміни не збільшували б book.changes і не зберігалися б.
+    """
+    def __init__(self, conn, book=None):
+        self._conn = conn
+        self._book = book
+        self._cache = {}
+
+    def _load_many(self, where="", params=()):
+        rows = self._conn.execute(
+            f"SELECT name, birthday, address, email FROM contacts {where}", params
+        ).fetchall()
+        records = []
+        for name, birthday, address, email in rows:
+            record = self._cache.get(name)
+            if record is None:
+                record = Record(name)
+                if birthday:
+                    record.birthday = _make_birthday(birthday)
+                if address:
+                    record.address = Address(address)
+                if email:
+                    record.email = Email(email)
+                record.phones = [phone for (phone,) in self._conn.execute(
+                    "SELECT phone FROM phones WHERE name = ? ORDER BY position", (name,)
+                )]
+                record._book = self._book
+                self._cache[name] = record
+            records.append(record)
+        return records
+
+    def __getitem__(self, name):
+        record = self._cache.get(name)
+        if record is not None:
+            return record
+        records = self._load_many("WHERE name = ?", (name,))
+        if not records:
+            raise KeyError(name)
+        return records[0]
+
+    def __setitem__(self, name, record):
+        self._cache[name] = record
+        self.write(record)
+
+    def __delitem__(self, name):
+        cur = self._conn.execute("DELETE FROM contacts WHERE name = ?", (name,))
+        cached = self._cache.pop(name, None)
+        if cur.rowcount == 0 and cached is None:
+            raise KeyError(name)
+
+    def __contains__(self, name):
+        if name in self._cache:
+            return True
+        return self._conn.execute(
+            "SELECT 1 FROM contacts WHERE name = ?", (name,)
+        ).fetchone() is not None
+
+    def __iter__(self):
+        for (name,) in self._conn.execute("SELECT name FROM contacts ORDER BY rowid").fetchall():
+            yield name
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+
+    def values(self):
+        return self._load_many("ORDER BY rowid")
+
+    def select(self, where, params=()):
+        """Повертає записи, що відповідають умові WHERE."""
+        return self._load_many(where, params)
+
+    def write(self, record):
+        """Записує стан Record у таблиці contacts і phones."""
+        bday = record.birthday.value if record.birthday else None
+        self._conn.execute(
+            "INSERT INTO contacts (name, birthday, bday_month, bday_day, address, email) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET birthday = excluded.birthday, "
+            "bday_month = excluded.bday_month, bday_day = excluded.bday_day, "
+            "address = excluded.address, email = excluded.email",
+            (
+                record.name.value,
+                bday.isoformat() if bday else None,
+                bday.month if bday else None,
+                bday.day if bday else None,
+                record.address.value if record.address else None,
+                record.email.value if record.email else None,
+            ),
+        )
+        self._conn.execute("DELETE FROM phones WHERE name = ?", (record.name.value,))
+        self._conn.executemany(
+            "INSERT INTO phones (name, position, phone) VALUES (?, ?, ?)",
+            [(record.name.value, i, p) for i, p in enumerate(record.phone_values())],
+        )
+
+    def write_cached(self, name):
+        """Записує в базу закешований (можливо змінений) запис."""
+        record = self._cache.get(name)
+        if record is not None:
+            self.write(record)
+
+
+class _NoteTable(MutableMapping):
+    """
+    Словникоподібний доступ до таблиці notes з лінивим завантаженням.
+    Завантажені нотатки прив'язуються до нотатника (notebook), як у _ContactTable.
+    """
+    def __init__(self, conn, notebook=None):
+        self._conn = conn
+        self._notebook = notebook
+        self._cache = {}
+
+    def _load_many(self, where="", params=()):
+        rows = self._conn.execute(
+            f"SELECT title, content, created, modified FROM notes {where}", params
+        ).fetchall()
+        notes = []
+        for title, content, created, modified in rows:
+            note = self._cache.get(title)
+            if note is None:
+                note = Note(title, content)
+                note.created_date = datetime.fromisoformat(created)
+                note.modified_date = datetime.fromisoformat(modified)
+                for (tag,) in self._conn.execute(
+                    "SELECT tag FROM tags WHERE title = ? ORDER BY position", (title,)
+                ):
+                    note.tags.append(Tag(tag))
+                note._notebook = self._notebook
+                self._cache[title] = note
+            notes.append(note)
+        return notes
+
+    def __getitem__(self, title):
+        note = self._cache.get(title)
+        if note is not None:
+            return note
+        notes = self._load_many("WHERE title = ?", (title,))
+        if not notes:
+            raise KeyError(title)
+        return notes[0]
+
+    def __setitem__(self, title, note):
+        self._cache[title] = note
+        self.write(note)
+
+    def __delitem__(self, title):
+        cur = self._conn.execute("DELETE FROM notes WHERE title = ?", (title,))
+        cached = self._cache.pop(title, None)
+        if cur.rowcount == 0 and cached is None:
+            raise KeyError(title)
+
+    def __contains__(self, title):
+        if title in self._cache:
+            return True
+        return self._conn.execute(
+            "SELECT 1 FROM notes WHERE title = ?", (title,)
+        ).fetchone() is not None
+
+    def __iter__(self):
+        for (title,) in self._conn.execute("SELECT title FROM notes ORDER BY rowid").fetchall():
+            yield title
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+
+    def values(self):
+        return self._load_many("ORDER BY rowid")
+
+    def select(self, where, params=()):
+        """Повертає нотатки, що відповідають умові WHERE."""
+        return self._load_many(where, params)
+
+    def write(self, note):
+        """Записує стан Note у таблиці notes і tags."""
+        self._conn.execute(
+            "INSERT INTO notes (title, content, created, modified) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(title) DO UPDATE SET content = excluded.content, "
+            "created = excluded.created, modified = excluded.modified",
+            (note.title, note.content, note.created_date.isoformat(),
+             note.modified_date.isoformat()),
+        )
+        self._conn.execute("DELETE FROM tags WHERE title = ?", (note.title,))
+        self._conn.executemany(
+            "INSERT INTO tags (title, position, tag) VALUES (?, ?, ?)",
+            [(note.title, i, t.value) for i, t in enumerate(note.tags)],
+        )
+
+    def write_cached(self, title):
+        """Записує в базу закешовану (можливо змінену) нотатку."""
+        note = self._cache.get(title)
+        if note is not None:
+            self.write(note)
+
+
+class SQLiteAddressBook(AddressBook):
+    """Адресна книга, записи якої зберігаються в SQLite і читаються за індексами."""
+    # Індекси в пам'яті означали б читання всієї таблиці - запити перебирають її за іменами
+    indexed_queries = False
+
+    def __init__(self, conn):
+        super().__init__()
+        self.data = _ContactTable(conn, self)
+
+    def _birthday_candidates(self, today, days):
+        """
+        Вибирає контакти з індексу (bday_month, bday_day) для вікна у days днів
+        у календарному порядку, починаючи з сьогоднішньої дати.
+        """
+        end_date = date.fromordinal(today.toordinal() + min(days, 365))
+        end = (end_date.month, end_date.day)
+        # У невисокосний рік 29 лютого святкується 28-го: вікно до 28.02 має захопити і (2, 29).
+        # Зайвих кандидатів відсіює next_birthday в iter_upcoming_birthdays
+        if end == (2, 28) and not calendar.isleap(end_date.year):
+            end = (2, 29)
+        params = (today.month, today.day) + end
+        order = "ORDER BY (bday_month, bday_day) < (?1, ?2), bday_month, bday_day"
+        if days >= 365:
+            where = "WHERE birthday IS NOT NULL"
+            params = params[:2]
+        elif params[:2] <= params[2:]:
+            where = "WHERE (bday_month, bday_day) >= (?1, ?2) AND (bday_month, bday_day) <= (?3, ?4)"
+        else:
+            where = "WHERE (bday_month, bday_day) >= (?1, ?2) OR (bday_month, bday_day) <= (?3, ?4)"
+        return self.data.select(f"{where} {order}", params)
+
+    def build_indexes(self):
+        """Решту пошуків обслуговують індекси SQLite; у пам'яті лише нечіткий пошук імен."""
+        self._get_fuzzy_names()
+
+    def iter_sorted(self, start=0, stop=None):
+        """Записи в алфавітному порядку через індекс idx_contacts_name_nocase."""
+        return _iter_sorted(self.data, "name COLLATE NOCASE, rowid", start, stop)
+
+    def _phone_owners(self, phone):
+        """Повертає множину імен контактів з номером через індекс idx_phones_phone."""
+        return {name for (name,) in self.data._conn.execute(
+            "SELECT name FROM phones WHERE phone = ?", (phone,)
+        )}
+
+    def find_by_phone(self, phone):
+        """Знаходить контакти з номером через індекс idx_phones_phone."""
+        return self.data.select(
+            "WHERE name IN (SELECT name FROM phones WHERE phone = ?) ORDER BY name", (phone,))
+
+    def find_by_phone_prefix(self, prefix):
+        """Діапазонний запит по idx_phones_phone: prefix <= phone < наступний префікс."""
+        if not prefix:
+            return self.data.select("WHERE name IN (SELECT name FROM phones) ORDER BY name")
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        names = [name for (name,) in self.data._conn.execute(
+            "SELECT name FROM phones WHERE phone >= ? AND phone < ? ORDER BY phone, name",
+            (prefix, upper),
+        )]
+        return [self.data[name] for name in dict.fromkeys(names)]
+
+    def find_by_email(self, email):
+        """Знаходить контакти з email через індекс idx_contacts_email_nocase."""
+        return self.data.select(
+            "WHERE email = ? COLLATE NOCASE ORDER BY name", (email.strip(),))
+
+    def find_by_email_prefix(self, prefix):
+        """Знаходить контакти, email яких починається з prefix (LIKE без урахування регістру)."""
+        return self.data.select(
+            "WHERE email LIKE ? ESCAPE '\\' ORDER BY name",
+            (_like_pattern(prefix.strip())[1:],))
+
+    def find_by_email_domain(self, domain):
+        """Знаходить контакти з email у домені через індекс idx_contacts_email_domain."""
+        return self.data.select(
+            "WHERE substr(email, instr(email, '@') + 1) = ? COLLATE NOCASE ORDER BY name",
+            (domain.strip().lstrip("@"),))
+
+    def _search_contacts(self, query):
+        """Шукає контакти за запитом у всіх полях засобами SQLite."""
+        pattern = _like_pattern(query)
+        return self.data.select(
+            "WHERE py_lower(name) LIKE ?1 ESCAPE '\\' "
+            "OR py_lower(address) LIKE ?1 ESCAPE '\\' "
+            "OR py_lower(email) LIKE ?1 ESCAPE '\\' "
+            "OR strftime('%d.%m.%Y', birthday) LIKE ?1 ESCAPE '\\' "
+            "OR name IN (SELECT name FROM phones WHERE phone LIKE ?1 ESCAPE '\\')",
+            (pattern,),
+        )
+
+
+class SQLiteNoteBook(NoteBook):
+    """Нотатник, нотатки якого зберігаються в SQLite."""
+    def __init__(self, conn):
+        super().__init__()
+        self.notes = _NoteTable(conn, self)
+
+    def build_indexes(self):
+        """Решту пошуків обслуговують індекси SQLite; у пам'яті лише нечіткий пошук заголовків."""
+        self._get_fuzzy_titles()
+
+    def iter_sorted(self, start=0, stop=None):
+        """Нотатки в алфавітному порядку через індекс idx_notes_title_nocase."""
+        return _iter_sorted(self.notes, "title COLLATE NOCASE, rowid", start, stop)
+
+    def recent(self, count):
+        """Нотатки, змінені останніми, через індекс idx_notes_modified."""
+        return self.notes.select("ORDER BY modified DESC, title DESC LIMIT ?", (count,))
+
+    def oldest(self, count):
+        """Найстаріші нотатки через індекс idx_notes_created."""
+        return self.notes.select("ORDER BY created, title LIMIT ?", (count,))
+
+    def between(self, start, end, modified=False):
+        """Нотатки за діапазоном дат через індекс idx_notes_created (або idx_notes_modified)."""
+        column = "modified" if modified else "created"
+        return self.notes.select(
+            f"WHERE {column} BETWEEN ? AND ? ORDER BY {column}, title",
+            (start.isoformat(), end.isoformat()),
+        )
+
+    def _search_by_content(self, query, limit=None):
+        """Шукає нотатки за змістом засобами SQLite."""
+        pattern = _like_pattern(query.lower())
+        return self.notes.select(
+            "WHERE py_lower(title) LIKE ?1 ESCAPE '\\' OR py_lower(content) LIKE ?1 ESCAPE '\\'",
+            (pattern,),
+        )
+
+    def _search_by_tags(self, tag):
+        """Шукає нотатки за тегом через індекс idx_tags_tag."""
+        return self.notes.select(
+            "WHERE title IN (SELECT title FROM tags WHERE tag = ?) ORDER BY title",
+            (tag,),
+        )
+
+    def _titles_with_tag(self, tag):
+        """Повертає множину заголовків нотаток з тегом tag через індекс idx_tags_tag."""
+        return {title for (title,) in self.notes._conn.execute(
+            "SELECT title FROM tags WHERE tag = ?", (tag,)
+        )}
+
+    def tag_counts(self):
+        """Повертає словник тег -> кількість нотаток засобами SQLite."""
+        return dict(self.notes._conn.execute(
+            "SELECT tag, COUNT(*) AS n FROM tags GROUP BY tag ORDER BY n DESC, tag"
+        ).fetchall())
+
+
+class SQLiteStorage:
+    """
+    Сховище на основі SQLite (address_book.db).
+    Кожна зміна одразу записується в базу, тому стискання не потрібне.
+    """
+    def __init__(self, filename=DB_FILENAME, legacy=None):
+        self.filename = filename
+        self.legacy = legacy
+        self.conn = None
+        # З'єднання SQLite прив'язане до потоку, який його відкрив
+        self.concurrent_reads = False
+        self.refresh_on_read = True
+        self._data = None
+        self._data_version = None
+
+    def load(self):
+        """Відкриває базу. Дані читаються ліниво, при першому зверненні."""
+        is_new = not os.path.exists(self.filename)
+        self.conn = connect(self.filename)
+        data = {'contacts': SQLiteAddressBook(self.conn), 'notes': SQLiteNoteBook(self.conn)}
+        if is_new and self.legacy is not None:
+            self._import_legacy(data)
+        self._data = data
+        self._data_version = self._current_version()
+        return data
+
+    def _current_version(self):
+        # PRAGMA data_version змінюється, коли інше з'єднання фіксує зміни
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def refresh(self, data):
+        """Підтягує зміни, які записали інші процеси."""
+        self._refresh()
+
+    def _refresh(self):
+        """Якщо базу змінив інший процес, скидає закешовані записи та індекси."""
+        version = self._current_version()
+        if version != self._data_version:
+            replace_data(self._data, {
+                'contacts': SQLiteAddressBook(self.conn), 'notes': SQLiteNoteBook(self.conn)})
+            self._data_version = version
+
+    @contextmanager
+    def transaction(self, data, write=False):
+        """
+        Обгортає одну команду (див. JournalStorage.transaction).
+        Команда, що змінює дані, виконується в BEGIN IMMEDIATE, тобто під
+        блокуванням запису SQLite, і фіксується одразу після себе.
+        """
+        data['contacts']  # відкриває базу, якщо це ще не зроблено
+        if not write:
+            if self.refresh_on_read:
+                self._refresh()
+            yield
+            return
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._refresh()
+            yield
+        finally:
+            # Версія читається ще під блокуванням запису: після коміту інший процес
+            # може встигнути записати своє, і тоді його зміни вважалися б уже прочитаними
+            version = self._current_version()
+            self.conn.commit()
+            self._data_version = version
+
+    def _import_legacy(self, data):
+        """Переносить дані зі старого сховища (знімок + журнал) у нову базу."""
+        legacy = self.legacy.load()
+        for record in legacy['contacts'].values():
+            data['contacts'].add_record(record)
+        for note in legacy['notes'].notes.values():
+            data['notes'].add_note(note)
+        self.conn.commit()
+
+    def contact_changed(self, book, name):
+        """Записує в базу поточний стан контакту."""
+        book.data.write_cached(name)
+        self.conn.commit()
+
+    def note_changed(self, notebook, title):
+        """Записує в базу поточний стан нотатки."""
+        notebook.notes.write_cached(title)
+        self.conn.commit()
+
+    def checkpoint(self, data):
+        """Фіксує в базі всі зміни, зроблені з останнього коміту."""
+        if self.conn is not None:
+            self.conn.commit()
+
+    def maybe_compact(self, data):
+        pass
+
+    def start_autosave(self, data, interval=None):
+        """Кожна зміна вже фіксується в базі, тож фонове збереження не потрібне."""
+
+    def close(self, data):
+        """Фіксує транзакцію і закриває базу."""
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
@@ -1,8 +1,25 @@
+import json
+import os
 import pickle
-from classbot.address_book import AddressBook
-from classbot.notebook import NoteBook
+import threading
+from contextlib import contextmanager
+from classbot.address_book import AddressBook, Record
+from classbot.autosave import AutoSaver, AUTOSAVE_INTERVAL
+from classbot.notebook import NoteBook, Note
+from classbot.locking import FileLock, LOCK_FILENAME
+from classbot.snapshot import read_snapshot, write_snapshot
 
 FILENAME = "address_book.pkl"
+SNAPSHOT_FILENAME = "address_book.snap"
+JOURNAL_FILENAME = "address_book.journal"
+
+# Як відновити об'єкт із запису журналу у форматі JSON
+DECODERS = {"contact": Record.from_dict, "note": Note.from_dict}
+
+# Скільки записів журналу накопичувати перед fsync (груповий коміт)
+FSYNC_EVERY = 32
+# Після скількох записів журнал стискається у новий знімок
+COMPACT_THRESHOLD = 1000
 
 def save_book(book):
     """Зберігає адресну книгу у файл за допомогою pickle."""
@@ -32,4 +49,437 @@ def load_data():
         with open(FILENAME, "rb") as f:
             return pickle.load(f)
     except FileNotFoundError:
-        return {'contacts': AddressBook(), 'notes': NoteBook()}
\ No newline at end of file
+        return {'contacts': AddressBook(), 'notes': NoteBook()}
+
+
+class Journal:
+    """
+    Журнал змін, який дописується в кінець файлу.
+    Перший рядок - заголовок {"generation": N}, далі кожен запис - це рядок
+    JSON {"kind", "key", "value"}, де value - словник to_dict() об'єкта або
+    null для видалення. Покоління збільшується при кожному стисканні, тож інші
+    процеси бачать, що журнал почався заново. Старі журнали з записами pickle
+    теж читаються (legacy = True після replay).
+    """
+    def __init__(self, filename=JOURNAL_FILENAME, fsync_every=FSYNC_EVERY):
+        self.filename = filename
+        self.fsync_every = fsync_every
+        self.count = 0
+        self.generation = 0
+        # Скільки байтів журналу вже застосовано до даних цього процесу
+        self.offset = 0
+        self.legacy = False
+        self._pending = 0
+        self._file = None
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.filename, "ab")
+        return self._file
+
+    def append(self, kind, key, obj):
+        """
+        Дописує один запис у журнал. Викликається під виключним блокуванням
+        після catch_up, тож кінець файлу - це offset (або обірваний запис, який відкидається).
+        """
+        f = self._open()
+        if os.fstat(f.fileno()).st_size != self.offset or not self.offset:
+            f.truncate(self.offset)
+            if not self.offset:
+                header = self._header()
+                f.write(header)
+                self.offset = len(header)
+        value = obj.to_dict() if obj is not None else None
+        line = json.dumps({"kind": kind, "key": key, "value": value}, ensure_ascii=False).encode() + b"\n"
+        f.write(line)
+        # Інші процеси мають побачити запис одразу після зняття блокування
+        f.flush()
+        self.offset += len(line)
+        self.count += 1
+        self._pending += 1
+        if self._pending >= self.fsync_every:
+            self.sync()
+
+    def _header(self):
+        return json.dumps({"generation": self.generation}).encode() + b"\n"
+
+    def sync(self):
+        """Скидає буфер і робить fsync накопичених записів."""
+        if self._file is not None and self._pending:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def replay(self, data):
+        """
+        Застосовує записи журналу до даних.
+        Обірваний останній запис (наприклад, після збою) ігнорується.
+        """
+        # Файл журналу міг бути замінений іншим процесом - дописувати треба вже в новий
+        self.close()
+        self.count = 0
+        self.generation = 0
+        self.offset = 0
+        try:
+            f = open(self.filename, "rb")
+        except FileNotFoundError:
+            return 0
+        with f:
+            # Записи pickle починаються з опкоду PROTO (0x80)
+            self.legacy = f.peek(1)[:1] == b"\x80"
+            if self.legacy:
+                self.count = self._replay_pickle(f, data)
+            else:
+                self._replay_json(f, data)
+        return self.count
+
+    def catch_up(self, data):
+        """
+        Застосовує записи, дописані іншими процесами після останнього читання.
+        Повертає False, якщо журнал тим часом стиснули (нове покоління) -
+        тоді дані треба завантажити заново.
+        """
+        try:
+            f = open(self.filename, "rb")
+        except FileNotFoundError:
+            return not self.offset
+        with f:
+            if self._read_generation(f.readline()) != self.generation:
+                return False
+            if os.fstat(f.fileno()).st_size > self.offset:
+                f.seek(self.offset)
+                self._replay_json(f, data)
+        return True
+
+    def file_generation(self):
+        """Покоління журналу на диску (інший процес міг уже почати нове)."""
+        try:
+            with open(self.filename, "rb") as f:
+                return self._read_generation(f.readline())
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _read_generation(line):
+        """Повертає покоління із заголовка (0 для порожнього журналу чи журналу без заголовка)."""
+        if line.startswith(b'{"generation"'):
+            try:
+                return json.loads(line)["generation"]
+            except (ValueError, KeyError):
+                pass
+        return 0
+
+    def _replay_json(self, f, data):
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entry = json.loads(line)
+                if "generation" in entry:
+                    self.generation = entry["generation"]
+                    self.offset += len(line)
+                    continue
+                value = entry["value"]
+                obj = DECODERS[entry["kind"]](value) if value is not None else None
+            except (ValueError, KeyError, TypeError):
+                break
+            apply_entry(data, entry["kind"], entry["key"], obj)
+            self.offset += len(line)
+            self.count += 1
+
+    def _replay_pickle(self, f, data):
+        applied = 0
+        while True:
+            try:
+                kind, key, obj = pickle.load(f)
+            except EOFError:
+                break
+            except (pickle.UnpicklingError, ValueError, AttributeError):
+                break
+            apply_entry(data, kind, key, obj)
+            applied += 1
+        return applied
+
+    def reset(self):
+        """Починає журнал заново (нове покоління) після того, як дані потрапили у знімок."""
+        self.close()
+        self.generation += 1
+        header = self._header()
+        with open(self.filename, "wb") as f:
+            f.write(header)
+        self.offset = len(header)
+        self.count = 0
+        self.legacy = False
+
+    def drop_before(self, offset):
+        """
+        Після фонового знімка лишає в журналі лише записи, починаючи з offset
+        (зроблені вже після того, як стан для знімка було зафіксовано), під
+        новим поколінням. Файл замінюється атомарно; викликається під виключним блокуванням.
+        """
+        with open(self.filename, "rb") as f:
+            f.seek(offset)
+            tail = f.read()
+        # Обірваний останній запис відкидається
+        tail = tail[:tail.rfind(b"\n") + 1]
+        self.close()
+        self.generation += 1
+        header = self._header()
+        tmp = self.filename + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(header + tail)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.filename)
+        self.offset = len(header) + max(0, self.offset - offset)
+        self.count = tail.count(b"\n")
+        self.legacy = False
+
+    def close(self):
+        self.sync()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def apply_entry(data, kind, key, obj):
+    """Застосовує один запис журналу до словника даних."""
+    if kind == "contact":
+        book = data['contacts']
+        if obj is None:
+            book.delete(key)
+        else:
+            # Зміна вже пройшла перевірку в процесі, який її записав
+            unique_phones, book.unique_phones = book.unique_phones, False
+            try:
+                book.add_record(obj)
+            finally:
+                book.unique_phones = unique_phones
+    elif kind == "note":
+        notebook = data['notes']
+        if obj is None:
+            notebook.delete_note(key)
+        else:
+            notebook.add_note(obj)
+
+
+def replace_data(data, fresh):
+    """Підміняє вміст словника даних щойно завантаженим, зберігаючи налаштування книги."""
+    fresh['contacts'].unique_phones = data['contacts'].unique_phones
+    data.update(fresh)
+
+
+class JournalStorage:
+    """
+    Сховище зі знімком (SNAPSHOT_FILENAME) та журналом змін (JOURNAL_FILENAME).
+    Кожна зміна дописується в журнал, а повний знімок пишеться лише
+    при стисканні, тому вартість збереження залежить від обсягу змін.
+    Знімок відкривається через mmap, і записи декодуються лише при зверненні.
+    Якщо знімка ще немає, читається старий pickle-файл (legacy_filename).
+
+    Дані живуть у пам'яті, тож читати їх можна з кількох потоків
+    одночасно (concurrent_reads), поки ніхто не пише.
+
+    Кілька процесів можуть працювати з тими самими файлами одночасно: кожна
+    команда виконується в transaction(), яка під блокуванням (LOCK_FILENAME)
+    спершу підтягує чужі записи журналу, а команда, що змінює дані, тримає
+    виключне блокування лише до кінця свого запису в журнал.
+    """
+    def __init__(self, filename=SNAPSHOT_FILENAME, journal_filename=JOURNAL_FILENAME,
+                 compact_threshold=COMPACT_THRESHOLD, legacy_filename=FILENAME,
+                 lock_filename=LOCK_FILENAME):
+        self.filename = filename
+        self.legacy_filename = legacy_filename
+        self.journal = Journal(journal_filename)
+        self.compact_threshold = compact_threshold
+        self.lock = FileLock(lock_filename)
+        # Фоновий запис знімка (start_autosave) блокує файл через окремий дескриптор:
+        # flock з різних дескрипторів виключає один одного навіть в одному процесі
+        self.saver = None
+        self._saver_lock = FileLock(lock_filename)
+        self._commit = threading.Lock()
+        self._closing = False
+        # Чи підтягувати чужі зміни перед кожною командою читання.
+        # Сервер вимикає це і викликає refresh() сам, під власним блокуванням запису.
+        self.refresh_on_read = True
+        self.concurrent_reads = True
+        self._data = None
+
+    def _load_legacy(self):
+        """Читає знімок старого формату (pickle)."""
+        try:
+            with open(self.legacy_filename, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _read(self):
+        """Читає знімок і відтворює поверх нього журнал."""
+        data = read_snapshot(self.filename)
+        if data is None:
+            data = self._load_legacy()
+            data.setdefault('contacts', AddressBook())
+            data.setdefault('notes', NoteBook())
+        self.journal.replay(data)
+        return data
+
+    def load(self):
+        """Відкриває знімок і відтворює поверх нього журнал."""
+        with self.lock.exclusive():
+            data = self._read()
+            if self.journal.legacy:
+                # Нові записи журналу - JSON, тож старий pickle-журнал одразу переноситься у знімок
+                self._compact(data)
+        self._data = data
+        return data
+
+    def _refresh(self):
+        """Підтягує зміни інших процесів; викликається під блокуванням."""
+        if self._data is not None and not self.journal.catch_up(self._data):
+            replace_data(self._data, self._read())
+
+    def refresh(self, data):
+        """Підтягує зміни, які записали інші процеси."""
+        with self.lock.shared():
+            self._refresh()
+
+    @contextmanager
+    def transaction(self, data, write=False):
+        """
+        Обгортає одну команду. Спершу дані доповнюються змінами інших процесів.
+        Для write=True виключне блокування тримається до виходу з блоку,
+        тож команда змінює актуальний стан і чужі зміни не губляться.
+        Читання блокування не тримає: знімок і дані в пам'яті не змінюються іншими.
+        """
+        data['contacts']  # завантажує дані, якщо це ще не зроблено
+        if not write:
+            if self.refresh_on_read:
+                self.refresh(data)
+            yield
+            return
+        with self.lock.exclusive():
+            self._refresh()
+            yield
+
+    def contact_changed(self, book, name):
+        """Записує в журнал поточний стан контакту (або його видалення)."""
+        self.journal.append("contact", name, book.find(name))
+
+    def note_changed(self, notebook, title):
+        """
+        Записує в журнал поточний стан нотатки (або її видалення).
+        Довгий зміст переноситься у сховище blobs тут, під блокуванням запису.
+        """
+        note = notebook.find_note(title)
+        if note is not None:
+            note.store_content()
+        self.journal.append("note", title, note)
+
+    def _compact(self, data):
+        write_snapshot(self.filename, data)
+        self.journal.reset()
+
+    def compact(self, data):
+        """Пише повний знімок і починає журнал заново."""
+        with self.lock.exclusive():
+            self._refresh()
+            self._compact(data)
+
+    def checkpoint(self, data):
+        """Зберігає всі дані одним знімком (після масових змін, наприклад імпорту)."""
+        self.compact(data)
+
+    def maybe_compact(self, data):
+        """
+        Стискає журнал, якщо він виріс понад поріг.
+        З автозбереженням лише будить фоновий потік - команда не чекає на запис знімка.
+        """
+        if self.saver is not None:
+            self.saver.notify()
+        elif self.journal.count >= self.compact_threshold:
+            self.compact(data)
+
+    def start_autosave(self, data, interval=AUTOSAVE_INTERVAL):
+        """Запускає фонове збереження знімка (AutoSaver) для даних сесії."""
+        self.saver = AutoSaver(self, data, interval=interval, max_changes=self.compact_threshold)
+        self.saver.start()
+
+    def background_checkpoint(self, data):
+        """
+        Пише знімок з фонового потоку, не зупиняючи команди.
+        Під коротким блокуванням копіюються таблиці і запам'ятовується позиція
+        в журналі; знімок пишеться без блокування, а потім під блокуванням стає
+        на місце, і з журналу прибираються записи до запам'ятованої позиції.
+        Зміни, зроблені під час запису, лишаються в журналі; записи журналу -
+        повні стани об'єктів, тож їх повторне застосування дає той самий результат.
+        Повертає False, якщо журнал тим часом стиснули інакше (знімок відкидається).
+        """
+        if not getattr(data, "loaded", True):
+            return False
+        with self._saver_lock.exclusive():
+            generation, offset = self.journal.generation, self.journal.offset
+            frozen = {'contacts': AddressBook(), 'notes': NoteBook()}
+            frozen['contacts'].data = data['contacts'].data.copy()
+            frozen['notes'].notes = data['notes'].notes.copy()
+        tmp = write_snapshot(self.filename, frozen, publish=False)
+        with self._commit:
+            with self._saver_lock.exclusive():
+                if self._closing or self.journal.file_generation() != generation:
+                    os.unlink(tmp)
+                    return False
+                os.replace(tmp, self.filename)
+                self.journal.drop_before(offset)
+        return True
+
+    def close(self, data):
+        """
+        Завершує сесію: скидає журнал на диск і за потреби стискає його.
+        З автозбереженням вихід не чекає на запис знімка - усі зміни вже в журналі.
+        """
+        if self.saver is not None:
+            self.saver.stop()
+            with self._commit:
+                self._closing = True
+        self.journal.sync()
+        if self.saver is None:
+            self.maybe_compact(data)
+        self.journal.close()
+        self.lock.close()
+
+
+class LazyData:
+    """
+    Дані сесії, які завантажуються зі сховища лише при першому зверненні
+    (data['contacts'] або data['notes']). Команди на кшталт help не читають файл.
+    on_load(data) викликається один раз одразу після завантаження.
+    """
+    def __init__(self, storage, on_load=None):
+        self._storage = storage
+        self._on_load = on_load
+        self._data = None
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    def __getitem__(self, key):
+        if self._data is None:
+            self._data = self._storage.load()
+            if self._on_load is not None:
+                self._on_load(self._data)
+        return self._data[key]
+
+
+STORAGE_BACKENDS = ("journal", "sqlite")
+
+
+def open_storage(backend="journal"):
+    """
+    Створює сховище за назвою: "journal" (знімок + журнал) або "sqlite".
+    """
+    if backend == "sqlite":
+        from classbot.sqlite_storage import SQLiteStorage
+        return SQLiteStorage(legacy=JournalStorage())
+    if backend == "journal":
+        return JournalStorage()
+    raise ValueError(f"Unknown storage backend '{backend}'. Use: {', '.join(STORAGE_BACKENDS)}")